@@ -0,0 +1,124 @@
+"""
+Бенчмарк подготовки аудио к распознаванию: задержка на секунду аудио.
+
+Прежний путь повторяет старый обработчик: запись скачанного файла на диск,
+pydub (декодирование, 16 кГц моно), экспорт WAV во временную папку и чтение
+его через sr.AudioFile. Новый путь - AudioTranscoder.to_pcm прямо из байтов
+и sr.AudioData из PCM буфера, без обращений к диску.
+
+Входные данные - синтетическая «речь» (модулированные гармоники) в WAV
+48 кГц стерео; при наличии ffmpeg - также Ogg/Opus, как у голосовых Telegram.
+
+Запуск из корня проекта:
+    python benchmarks/bench_audio_transcode.py
+"""
+import io
+import sys
+import math
+import time
+import wave
+import array
+import shutil
+import random
+import statistics
+import tempfile
+import subprocess
+import warnings
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+warnings.simplefilter("ignore")
+
+import speech_recognition as sr
+from pydub import AudioSegment
+
+from services.audio_transcoder import AudioTranscoder
+
+DURATIONS = (5, 15, 60)
+REPEATS = 5
+
+
+def make_speech_wav(seconds: float, rate: int = 48000, seed: int = 3) -> bytes:
+    """Синтетический сигнал: гармоники основного тона с «слогами» и паузами"""
+    rng = random.Random(seed)
+    samples = array.array('h')
+    syllable, pitch = 0, 140.0
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        if i % (rate // 5) == 0:
+            syllable = rng.random() > 0.3
+            pitch = rng.uniform(100, 220)
+        envelope = syllable * abs(math.sin(math.pi * t * 5))
+        value = sum(math.sin(2 * math.pi * pitch * k * t) / k for k in (1, 2, 3))
+        left = int(9000 * envelope * value + rng.gauss(0, 200))
+        samples.extend((left, left))
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return output.getvalue()
+
+
+def to_opus(wav_data: bytes) -> bytes:
+    return subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-i", "pipe:0", "-c:a", "libopus", "-b:a", "32k", "-f", "ogg", "pipe:1"],
+        input=wav_data, capture_output=True, check=True
+    ).stdout
+
+
+def legacy_path(data: bytes, suffix: str, temp_dir: Path) -> sr.AudioData:
+    source = temp_dir / f"voice{suffix}"
+    source.write_bytes(data)
+    audio = AudioSegment.from_file(str(source)).set_frame_rate(16000).set_channels(1)
+    wav_path = temp_dir / "voice.wav.tmp"
+    audio.export(str(wav_path), format="wav")
+    with sr.AudioFile(str(wav_path)) as audio_file:
+        audio_data = sr.Recognizer().record(audio_file)
+    source.unlink()
+    wav_path.unlink()
+    return audio_data
+
+
+def in_memory_path(data: bytes, transcoder: AudioTranscoder) -> sr.AudioData:
+    pcm = transcoder.to_pcm(data)
+    return sr.AudioData(pcm, transcoder.sample_rate, AudioTranscoder.SAMPLE_WIDTH)
+
+
+def measure(func, *args) -> float:
+    times = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def main():
+    transcoder = AudioTranscoder()
+    temp_dir = Path(tempfile.mkdtemp())
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    if not has_ffmpeg:
+        print("⚠️ ffmpeg не найден: измеряется только WAV\n")
+
+    for seconds in DURATIONS:
+        inputs = {'WAV 48k стерео': ('.wav', make_speech_wav(seconds))}
+        if has_ffmpeg:
+            inputs['Ogg/Opus'] = ('.oga', to_opus(inputs['WAV 48k стерео'][1]))
+
+        for title, (suffix, data) in inputs.items():
+            legacy = measure(legacy_path, data, suffix, temp_dir)
+            in_memory = measure(in_memory_path, data, transcoder)
+            print(
+                f"{seconds:>3} с {title:<15} прежний: {legacy / seconds * 1000:6.2f} мс/с аудио | "
+                f"в памяти: {in_memory / seconds * 1000:6.2f} мс/с аудио | "
+                f"ускорение ×{legacy / in_memory:.1f}"
+            )
+
+    temp_dir.rmdir()
+
+
+if __name__ == "__main__":
+    main()
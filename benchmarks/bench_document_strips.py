@@ -0,0 +1,132 @@
+"""
+Бенчмарк обработки больших изображений-документов: пиковая память и время.
+
+Сравнивает обработку полосами (ImageProcessor.process_image_strips) с
+обработкой целиком тем же конвейером. Каждый замер выполняется в отдельном
+подпроцессе; пик памяти - прирост VmHWM после импортов. Проверяется
+заявленный потолок для полос (Pillow хранит RGB по 4 байта на пиксель):
+
+    пик ≤ CEILING_RATIO × (W × H × 4) + CEILING_EXTRA_MB
+
+и совпадение результата с _apply_enhancements на небольшом изображении.
+При превышении потолка скрипт завершается с кодом 1.
+
+Запуск из корня проекта:
+    python benchmarks/bench_document_strips.py [мегапикселей, по умолчанию 50]
+"""
+import sys
+import json
+import time
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from PIL import Image, ImageChops
+
+from services.image_processor import ImageProcessor
+
+CEILING_RATIO = 1.15
+CEILING_EXTRA_MB = 64
+
+
+def read_status_kb(field: str) -> int:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def reset_peak():
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+
+def child_generate(path: str, megapixels: float):
+    from benchmarks.bench_photo_pipeline import make_photo
+    width = int((megapixels * 1e6 * 3 / 2) ** 0.5)
+    height = int(width * 2 / 3)
+    Path(path).write_bytes(make_photo(width, height))
+
+
+def child_measure(mode: str, input_path: str, output_path: str):
+    processor = ImageProcessor()
+    reset_peak()
+    baseline = read_status_kb('VmRSS')
+    started = time.perf_counter()
+
+    if mode == 'strips':
+        processor.process_image_strips(input_path, output_path)
+    else:
+        with Image.open(input_path) as img:
+            result = processor._apply_enhancements(img.convert('RGB'))
+            result.save(output_path, 'JPEG', quality=90)
+
+    elapsed = time.perf_counter() - started
+    print(json.dumps({'peak_mb': (read_status_kb('VmHWM') - baseline) / 1024, 'seconds': elapsed}))
+
+
+def run_child(*args) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, *args], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1]) if output.strip() else {}
+
+
+def check_equivalence():
+    """Полосы дают тот же результат, что и обработка целиком"""
+    from benchmarks.bench_photo_pipeline import make_photo
+    import io
+    processor = ImageProcessor()
+    img = Image.open(io.BytesIO(make_photo(1500, 1000))).convert('RGB')
+    reference = processor._apply_enhancements(img)
+    for strip_rows in (1, 7, 256):
+        strips = img.copy()
+        processor._enhance_strips(strips, strip_rows)
+        if ImageChops.difference(reference, strips).getbbox() is not None:
+            return False
+    return True
+
+
+def main(megapixels: float = 50):
+    print(f"🔍 Совпадение с обработкой целиком: {'✅' if check_equivalence() else '❌'}")
+
+    temp_dir = Path(tempfile.mkdtemp())
+    input_path = temp_dir / "document.jpg"
+    run_child('--generate', str(input_path), str(megapixels))
+    with Image.open(input_path) as img:
+        width, height = img.size
+    decoded_mb = width * height * 4 / 1024 / 1024
+    print(f"🖼 {width}×{height} ({width * height / 1e6:.1f} МП), декодированное RGB {decoded_mb:.0f} МБ\n")
+
+    results = {}
+    for mode in ('whole', 'strips'):
+        results[mode] = run_child('--measure', mode, str(input_path), str(temp_dir / f"{mode}.jpg"))
+        print(
+            f"   {mode:<6} пик +{results[mode]['peak_mb']:.0f} МБ "
+            f"({results[mode]['peak_mb'] / decoded_mb:.2f}× изображения), {results[mode]['seconds']:.1f} с"
+        )
+
+    ceiling = CEILING_RATIO * decoded_mb + CEILING_EXTRA_MB
+    ok = results['strips']['peak_mb'] <= ceiling
+    print(f"\n{'✅' if ok else '❌'} Потолок для полос: {ceiling:.0f} МБ")
+
+    for path in temp_dir.iterdir():
+        path.unlink()
+    temp_dir.rmdir()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == '--generate':
+        child_generate(sys.argv[2], float(sys.argv[3]))
+    elif len(sys.argv) == 5 and sys.argv[1] == '--measure':
+        child_measure(sys.argv[2], sys.argv[3], sys.argv[4])
+    else:
+        main(float(sys.argv[1]) if len(sys.argv) > 1 else 50)
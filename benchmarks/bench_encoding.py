@@ -0,0 +1,96 @@
+"""
+Бенчмарк кодирования результата: объем и время для разных режимов encode.
+
+Корпус - синтетические изображения разного характера (гладкие градиенты,
+фигуры, мелкая текстура, шум, «текст») в размере, в котором бот отправляет
+фото. Для каждого режима выводятся медиана и 90-й перцентиль объема и
+времени кодирования, а также медианный PSNR относительно исходных пикселей.
+
+Запуск из корня проекта:
+    python benchmarks/bench_encoding.py
+"""
+import io
+import sys
+import time
+import random
+import statistics
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from services.image_processor import ImageProcessor
+
+MODES = {
+    'прежний (q85)': None,
+    'q85 optimize+progressive': {},
+    'PSNR ≥ 36 дБ': {'min_psnr': 36},
+    'объем ≤ 150 КБ': {'max_bytes': 150 * 1024},
+    'WebP q80': {'format': 'WEBP', 'quality': 80},
+}
+
+
+def make_corpus(count: int = 40, size=(1280, 960), seed: int = 7) -> list:
+    """Синтетический корпус с разной сложностью для кодека"""
+    rng = random.Random(seed)
+    width, height = size
+    corpus = []
+    for i in range(count):
+        kind = i % 5
+        img = Image.linear_gradient('L').resize(size).convert('RGB')
+        draw = ImageDraw.Draw(img)
+        if kind == 1:
+            for _ in range(150):
+                x, y, r = rng.randrange(width), rng.randrange(height), rng.randrange(10, 200)
+                draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+        elif kind == 2:
+            for x in range(0, width, rng.randrange(3, 9)):
+                draw.line((x, 0, x + rng.randrange(-50, 50), height), fill=tuple(rng.randrange(256) for _ in range(3)))
+        elif kind == 3:
+            noise = Image.effect_noise(size, rng.randrange(10, 60)).convert('RGB')
+            img = Image.blend(img, noise, 0.5)
+        elif kind == 4:
+            for y in range(10, height, 24):
+                draw.text((10, y), "Lorem ipsum dolor sit amet 0123456789 " * 4, fill=(20, 20, 20))
+        corpus.append(img.filter(ImageFilter.SMOOTH) if kind == 1 else img)
+    return corpus
+
+
+def legacy_encode(img: Image.Image) -> bytes:
+    output = io.BytesIO()
+    img.save(output, 'JPEG', quality=85)
+    return output.getvalue()
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main():
+    processor = ImageProcessor()
+    corpus = make_corpus()
+    print(f"🖼 Корпус: {len(corpus)} изображений {corpus[0].width}×{corpus[0].height}\n")
+
+    for title, encoding in MODES.items():
+        sizes, times, psnrs = [], [], []
+        for img in corpus:
+            started = time.perf_counter()
+            if encoding is None:
+                data = legacy_encode(img)
+            else:
+                data, _, _ = processor.encode(img, **encoding)
+            times.append(time.perf_counter() - started)
+            sizes.append(len(data) / 1024)
+            psnrs.append(processor._psnr(img, data))
+
+        print(
+            f"{title:<26} объем: медиана {statistics.median(sizes):6.1f} КБ, p90 {percentile(sizes, 0.9):6.1f} КБ | "
+            f"время: медиана {statistics.median(times) * 1000:5.1f} мс, p90 {percentile(times, 0.9) * 1000:5.1f} мс | "
+            f"PSNR {statistics.median(psnrs):.1f} дБ"
+        )
+
+
+if __name__ == "__main__":
+    main()
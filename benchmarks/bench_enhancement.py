@@ -0,0 +1,126 @@
+"""
+Бенчмарк улучшения фото: прежние пять проходов против совмещенного конвейера.
+
+Прежний конвейер (SHARPEN, Contrast, Brightness, Color, SMOOTH) оставлен здесь
+только для сравнения. Для каждого размера выводятся время на мегапиксель,
+пиковая память процесса (каждый замер в отдельном подпроцессе, чтобы пики
+не накладывались) и отличие результата: среднее по каналам и наибольшее.
+
+Запуск из корня проекта:
+    python benchmarks/bench_enhancement.py
+"""
+import io
+import sys
+import json
+import time
+import random
+import resource
+import statistics
+import subprocess
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from PIL import Image, ImageChops, ImageDraw, ImageEnhance, ImageFilter, ImageStat
+
+from services.image_processor import ImageProcessor
+
+SIZES = [(1280, 960), (2560, 1920), (4000, 3000)]
+
+
+def legacy_enhancements(image: Image.Image) -> Image.Image:
+    """Прежняя реализация ImageProcessor._apply_enhancements"""
+    image = image.filter(ImageFilter.SHARPEN)
+    image = ImageEnhance.Contrast(image).enhance(1.2)
+    image = ImageEnhance.Brightness(image).enhance(1.1)
+    image = ImageEnhance.Color(image).enhance(1.15)
+    image = image.filter(ImageFilter.SMOOTH)
+    return image
+
+
+def fused_enhancements(image: Image.Image) -> Image.Image:
+    return ImageProcessor()._apply_enhancements(image)
+
+
+PIPELINES = {'legacy': legacy_enhancements, 'fused': fused_enhancements}
+
+
+def make_photo(width: int, height: int, seed: int = 42) -> Image.Image:
+    """Синтетическое фото: градиент, фигуры и шум JPEG"""
+    rng = random.Random(seed)
+    img = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for _ in range(300):
+        x, y = rng.randrange(width), rng.randrange(height)
+        r = rng.randrange(5, max(6, width // 12))
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=85)
+    buffer.seek(0)
+    return Image.open(buffer).convert('RGB')
+
+
+def read_peak_rss_kb() -> int:
+    """Пиковая память процесса (VmHWM) в КБ"""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_rss_child(pipeline: str, width: int, height: int):
+    """Замер в подпроцессе: прирост пиковой памяти при одном вызове конвейера"""
+    image = make_photo(width, height)
+    try:
+        # Сброс пика памяти после подготовки изображения (Linux 4.0+)
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+    before = read_peak_rss_kb()
+    PIPELINES[pipeline](image)
+    after = read_peak_rss_kb()
+    print(json.dumps({'delta_kb': after - before}))
+
+
+def peak_rss(pipeline: str, width: int, height: int) -> float:
+    output = subprocess.run(
+        [sys.executable, __file__, '--rss', pipeline, str(width), str(height)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])['delta_kb'] / 1024
+
+
+def abs_diff(first: Image.Image, second: Image.Image):
+    """Среднее по каналам и наибольшее отличие пикселей"""
+    difference = ImageChops.difference(first, second)
+    return statistics.mean(ImageStat.Stat(difference).mean), max(high for _, high in difference.getextrema())
+
+
+def main(repeats: int = 5):
+    for width, height in SIZES:
+        image = make_photo(width, height)
+        megapixels = width * height / 1e6
+
+        timings = {name: [] for name in PIPELINES}
+        for _ in range(repeats):
+            for name, func in PIPELINES.items():
+                started = time.perf_counter()
+                func(image)
+                timings[name].append(time.perf_counter() - started)
+
+        mean_diff, max_diff = abs_diff(legacy_enhancements(image), fused_enhancements(image))
+        print(f"🖼 {width}×{height} ({megapixels:.1f} МП), отличие: среднее {mean_diff:.2f}, наибольшее {max_diff} из 255")
+        for name in PIPELINES:
+            per_mp = statistics.median(timings[name]) * 1000 / megapixels
+            rss = peak_rss(name, width, height)
+            print(f"   {name:<6} {per_mp:6.1f} мс/МП, пик памяти +{rss:.0f} МБ")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == '--rss':
+        peak_rss_child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        main()
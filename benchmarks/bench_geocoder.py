@@ -0,0 +1,54 @@
+"""
+Бенчмарк офлайн-геокодера: время загрузки, потребление памяти, скорость поиска.
+
+Запуск из корня проекта:
+    python benchmarks/bench_geocoder.py
+"""
+import sys
+import time
+import random
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.geocoder import ReverseGeocoder
+
+
+def main(queries: int = 20000):
+    started = time.perf_counter()
+    geocoder = ReverseGeocoder()
+    load_time = time.perf_counter() - started
+
+    # Память меряем отдельной загрузкой: tracemalloc заметно замедляет работу
+    tracemalloc.start()
+    measured = ReverseGeocoder()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del measured
+
+    print(f"🗺 Городов в наборе: {len(geocoder)}")
+    print(f"⏱ Загрузка и построение индекса: {load_time * 1000:.1f} мс")
+    print(f"💾 Память индекса: {current / 1024 / 1024:.1f} МБ (пик при загрузке {peak / 1024 / 1024:.1f} МБ)")
+
+    rng = random.Random(42)
+    scenarios = {
+        'Европейская Россия': [(rng.uniform(45, 65), rng.uniform(25, 60)) for _ in range(queries)],
+        'Весь мир (суша и океан)': [(rng.uniform(-60, 75), rng.uniform(-180, 180)) for _ in range(queries)],
+    }
+
+    for title, points in scenarios.items():
+        found = 0
+        started = time.perf_counter()
+        for lat, lon in points:
+            if geocoder.nearest(lat, lon):
+                found += 1
+        elapsed = time.perf_counter() - started
+        print(
+            f"🔍 {title}: {elapsed / len(points) * 1e6:.1f} мкс/запрос, "
+            f"найдено {found}/{len(points)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
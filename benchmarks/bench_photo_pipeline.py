@@ -0,0 +1,100 @@
+"""
+Бенчмарк обработки фото: путь через временные файлы против обработки в памяти.
+
+Файловый путь повторяет прежний обработчик: запись photo_{id}.jpg, обработка
+с сохранением _processed.jpg, два вызова get_image_info и чтение результата
+для отправки. Путь в памяти декодирует байты из BytesIO и кодирует результат
+в BytesIO без обращений к диску.
+
+Запуск из корня проекта:
+    python benchmarks/bench_photo_pipeline.py
+"""
+import io
+import sys
+import time
+import random
+import statistics
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from PIL import Image, ImageDraw
+
+from services.image_processor import ImageProcessor
+
+
+def make_photo(width: int, height: int, seed: int = 42) -> bytes:
+    """Синтетическое фото: градиент с фигурами, сжатое в JPEG"""
+    rng = random.Random(seed)
+    img = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for _ in range(200):
+        x, y = rng.randrange(width), rng.randrange(height)
+        r = rng.randrange(5, max(6, width // 10))
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def disk_pipeline(processor: ImageProcessor, data: bytes, temp_dir: Path, index: int) -> bytes:
+    temp_file = temp_dir / f"photo_{index}.jpg"
+    with open(temp_file, 'wb') as f:
+        f.write(data)
+
+    processed_path = processor.process_image(str(temp_file))
+    processor.get_image_info(str(temp_file))
+    processor.get_image_info(processed_path)
+    with open(processed_path, 'rb') as photo:
+        result = photo.read()
+
+    Path(processed_path).unlink()
+    temp_file.unlink()
+    return result
+
+
+def memory_pipeline(processor: ImageProcessor, data: bytes) -> bytes:
+    return processor.process_image_bytes(data)['data']
+
+
+def measure(pipelines: dict, repeats: int) -> dict:
+    """Поочередный запуск путей, чтобы фоновая нагрузка влияла на оба одинаково"""
+    timings = {name: [] for name in pipelines}
+    for i in range(repeats):
+        for name, func in pipelines.items():
+            started = time.perf_counter()
+            func(i)
+            timings[name].append(time.perf_counter() - started)
+    return timings
+
+
+def main(repeats: int = 30):
+    processor = ImageProcessor()
+    temp_dir = Path(tempfile.gettempdir()) / "telegram_bot"
+    temp_dir.mkdir(exist_ok=True)
+
+    for width, height in [(800, 600), (1280, 960), (2560, 1920)]:
+        data = make_photo(width, height)
+
+        # Прогрев: первые вызовы загружают кодеки
+        disk_pipeline(processor, data, temp_dir, -1)
+        memory_pipeline(processor, data)
+
+        timings = measure({
+            'disk': lambda i: disk_pipeline(processor, data, temp_dir, i),
+            'memory': lambda i: memory_pipeline(processor, data),
+        }, repeats)
+
+        disk_ms = statistics.median(timings['disk']) * 1000
+        memory_ms = statistics.median(timings['memory']) * 1000
+        print(
+            f"🖼 {width}×{height} ({len(data) / 1024:.0f} КБ): "
+            f"файлы {disk_ms:.1f} мс, память {memory_ms:.1f} мс, "
+            f"разница {disk_ms - memory_ms:+.1f} мс ({(disk_ms / memory_ms - 1) * 100:+.0f}%)"
+        )
+
+
+if __name__ == "__main__":
+    main()
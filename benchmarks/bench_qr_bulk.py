@@ -0,0 +1,44 @@
+"""
+Бенчмарк пакетной генерации QR-кодов: пропускная способность по числу процессов.
+
+Генерируется архив для N уникальных ссылок (кэш QR не помогает) при 1, 2 и
+всех ядрах. Выводится общее время, коды в секунду, коды в секунду на ядро
+(по процессорному времени воркеров) и размер архива. Первый прогон каждого
+пула включает запуск процессов, поэтому перед замером делается разогрев.
+
+Запуск из корня проекта:
+    python benchmarks/bench_qr_bulk.py [число строк]
+"""
+import io
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.qr_bulk import QRBulkGenerator
+
+
+def main(rows: int = 1000):
+    payloads = [f"https://example.com/item/{index}?ref=bench" for index in range(rows)]
+    worker_counts = sorted({1, 2, os.cpu_count() or 1})
+
+    for workers in worker_counts:
+        generator = QRBulkGenerator(workers=workers, max_rows=rows)
+        try:
+            generator.build_zip(payloads[:workers * generator.batch_size], io.BytesIO())
+
+            archive = io.BytesIO()
+            stats = generator.build_zip(payloads, archive)
+        finally:
+            generator.shutdown()
+
+        print(
+            f"⚙️ {workers} проц.: {stats['codes']} кодов за {stats['seconds']:.2f} с | "
+            f"{stats['per_second']:7.0f}/с | {stats['per_core']:5.0f}/с на ядро | "
+            f"архив {archive.tell() / 1024:.0f} КБ"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
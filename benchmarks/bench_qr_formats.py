@@ -0,0 +1,72 @@
+"""
+Бенчмарк форматов QR-кодов: размер файла и время генерации.
+
+Сравниваются прежний путь (картинка qrcode/PIL, сохраненная в PNG; с цветами
+отличными от черно-белых она RGB), палитровый 1-битный PNG из матрицы
+модулей и SVG. Построение матрицы общее для всех вариантов и замеряется
+отдельно; время - медиана по повторам, кэш сервиса не используется.
+
+Запуск из корня проекта:
+    python benchmarks/bench_qr_formats.py
+"""
+import sys
+import time
+import statistics
+from io import BytesIO
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import qrcode
+
+from services.qr_generator import render_png, render_svg
+
+PAYLOADS = {
+    "ссылка": "https://example.com/",
+    "ссылка с параметрами": "https://example.com/catalog/item/12345?utm_source=telegram&utm_medium=bot",
+    "текст 300 симв.": "Съешь же ещё этих мягких французских булок, да выпей чаю. " * 5,
+}
+
+
+def build_qr(data: str) -> qrcode.QRCode:
+    qr = qrcode.QRCode(version=1, box_size=10, border=4, error_correction=qrcode.constants.ERROR_CORRECT_L)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def legacy_png(qr: qrcode.QRCode, fill_color: str) -> bytes:
+    bio = BytesIO()
+    qr.make_image(fill_color=fill_color, back_color='white').save(bio, 'PNG')
+    return bio.getvalue()
+
+
+def measure(func, repeats: int = 30):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(timings)
+
+
+def main():
+    for title, data in PAYLOADS.items():
+        qr, matrix_ms = measure(lambda: build_qr(data))
+        matrix = qr.get_matrix()
+        print(f"🔲 {title}: {len(matrix)}×{len(matrix)} модулей, матрица {matrix_ms:.2f} мс")
+
+        for fill_color in ('black', 'navy'):
+            variants = {
+                "PIL PNG (прежний)": lambda: legacy_png(qr, fill_color),
+                "PNG 1 бит": lambda: render_png(matrix, 10, fill_color),
+                "SVG": lambda: render_svg(matrix, 10, fill_color),
+            }
+            for name, render in variants.items():
+                image, render_ms = measure(render)
+                print(f"   {fill_color:<5} {name:<18} {len(image):>7} байт | {render_ms:6.2f} мс")
+        print()
+
+
+if __name__ == "__main__":
+    main()
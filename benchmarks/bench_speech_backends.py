@@ -0,0 +1,81 @@
+"""
+Бенчмарк движков распознавания речи: загрузка, задержка и RTF.
+
+Для каждого доступного движка (google - нужна сеть, vosk - пакет vosk и
+модель в SPEECH_MODEL_PATH) измеряется время загрузки модели, задержка
+распознавания записи целиком и фрагментами (как в боте) и коэффициент
+реального времени RTF = время распознавания / длительность записи
+(меньше 1 - быстрее реального времени).
+
+Записи - WAV файлы из аргументов; без аргументов используется синтетический
+сигнал (текста в нем нет, но задержку и RTF он показывает).
+
+Запуск из корня проекта:
+    SPEECH_MODEL_PATH=models/vosk-model-small-ru-0.22 python benchmarks/bench_speech_backends.py [запись.wav ...]
+"""
+import os
+import sys
+import time
+import warnings
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+warnings.simplefilter("ignore")
+
+from benchmarks.bench_audio_transcode import make_speech_wav
+from services.audio_transcoder import AudioTranscoder
+from services.speech_backends import BACKENDS, SpeechBackendError, SpeechUnrecognized, create_backend
+from services.voice_recognizer import VoiceRecognizer
+
+
+def load_clips(paths: list) -> dict:
+    transcoder = AudioTranscoder()
+    if paths:
+        return {Path(path).name: transcoder.to_pcm(Path(path).read_bytes()) for path in paths}
+    return {f"синтетика {seconds} с": transcoder.to_pcm(make_speech_wav(seconds)) for seconds in (10, 30, 60)}
+
+
+def main(paths: list):
+    model_path = os.getenv('SPEECH_MODEL_PATH')
+    clips = load_clips(paths)
+    transcoder = AudioTranscoder()
+
+    for name in BACKENDS:
+        started = time.perf_counter()
+        try:
+            backend = create_backend(name, model_path)
+        except SpeechBackendError as e:
+            print(f"⚠️ {name}: недоступен ({e})\n")
+            continue
+        load_time = time.perf_counter() - started
+        print(f"🎤 {name}: загрузка {load_time:.2f} с")
+
+        recognizer = VoiceRecognizer(backend=name, model_path=model_path)
+        for title, pcm in clips.items():
+            duration = transcoder.duration(pcm)
+
+            started = time.perf_counter()
+            try:
+                text = backend.recognize(pcm, transcoder.sample_rate)
+            except SpeechUnrecognized:
+                text = ""
+            except SpeechBackendError as e:
+                print(f"   {title:<24} ошибка: {e}")
+                continue
+            whole = time.perf_counter() - started
+
+            started = time.perf_counter()
+            recognizer._recognize_pcm(pcm)
+            chunked = time.perf_counter() - started
+
+            print(
+                f"   {title:<24} целиком: {whole:6.2f} с (RTF {whole / duration:.3f}) | "
+                f"фрагментами: {chunked:6.2f} с (RTF {chunked / duration:.3f}) | "
+                f"{len(text.split())} слов"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
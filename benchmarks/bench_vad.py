@@ -0,0 +1,69 @@
+"""
+Бенчмарк удаления тишины перед распознаванием: сколько аудио не уходит в движок.
+
+Корпус - синтетические голосовые: «речь» из bench_audio_transcode с паузой
+перед началом, паузами между фразами и тишиной в конце, как у типичной
+заметки, записанной с удержанием кнопки. Для каждой записи выводится доля
+удаленного аудио, объем PCM до и после и время работы детектора на секунду
+аудио.
+
+Запуск из корня проекта:
+    python benchmarks/bench_vad.py
+"""
+import sys
+import time
+import random
+import statistics
+import warnings
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+warnings.simplefilter("ignore")
+
+from benchmarks.bench_audio_transcode import make_speech_wav
+from services.audio_segmentation import trim_silence
+from services.audio_transcoder import AudioTranscoder
+
+
+def make_voice_note(transcoder: AudioTranscoder, rng: random.Random) -> bytes:
+    """Голосовая заметка: тишина, несколько фраз с паузами, тишина"""
+    silence = lambda seconds: b"\x00\x00" * int(seconds * transcoder.sample_rate)
+    parts = [silence(rng.uniform(0.3, 1.5))]
+    for phrase in range(rng.randint(2, 5)):
+        parts.append(transcoder.to_pcm(make_speech_wav(rng.uniform(2, 8), seed=rng.randrange(1000))))
+        parts.append(silence(rng.uniform(0.5, 2.5)))
+    return b"".join(parts)
+
+
+def main(count: int = 12):
+    transcoder = AudioTranscoder()
+    rng = random.Random(11)
+    removed, speeds = [], []
+    before_total = after_total = 0
+
+    for index in range(count):
+        pcm = make_voice_note(transcoder, rng)
+        started = time.perf_counter()
+        speech = trim_silence(pcm, transcoder.sample_rate)
+        elapsed = time.perf_counter() - started
+
+        duration = transcoder.duration(pcm)
+        removed.append(1 - len(speech) / len(pcm))
+        speeds.append(elapsed / duration * 1000)
+        before_total += len(pcm)
+        after_total += len(speech)
+        print(
+            f"   запись {index + 1:>2}: {duration:5.1f} с → {transcoder.duration(speech):5.1f} с "
+            f"(убрано {removed[-1]:.0%})"
+        )
+
+    print(
+        f"\n🔇 Медиана удаленного аудио: {statistics.median(removed):.0%}; "
+        f"PCM в движок: {before_total / 1024 / 1024:.1f} МБ → {after_total / 1024 / 1024:.1f} МБ; "
+        f"детектор: {statistics.median(speeds):.2f} мс на секунду аудио"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,114 @@ class Config:
     # URL API для получения погоды (Open-Meteo API)
     WEATHER_API_URL = "https://api.open-meteo.com/v1/forecast"
     
+    # Таймаут запроса к API погоды (сек) и лимит одновременных запросов
+    WEATHER_TIMEOUT = 5
+    WEATHER_MAX_CONCURRENT = 4
+    
+    # Адрес Telegram Bot API (None - официальный api.telegram.org)
+    # и сайта цитат; для нагрузочных тестов укажите заглушки из tools/stub_servers.py
+    TELEGRAM_API_URL = None
+    QUOTES_BASE_URL = None
+    
+    # Период фонового сбора цитат в локальный корпус (сек) и число страниц
+    # подборки, проверяемых за проход (обход продолжается со следующего прохода)
+    QUOTES_REFRESH_INTERVAL = 6 * 3600
+    QUOTES_PAGES_PER_REFRESH = 5
+    
+    # Порт HTTP эндпоинта /metrics (None - метрики не публикуются)
+    METRICS_PORT = None
+    
+    # Обработка фото в пуле процессов: число процессов (None - по числу ядер),
+    # лимит ожидающих задач и таймаут одной задачи (сек)
+    IMAGE_WORKERS = None
+    IMAGE_QUEUE_LIMIT = 20
+    IMAGE_JOB_TIMEOUT = 60
+    
+    # Разрешение обработки фото (пикселей по большей стороне; Telegram
+    # показывает фото в чате не крупнее 1280) и лимиты входящих фото
+    PHOTO_MAX_SIDE = 1280
+    PHOTO_MAX_PIXELS = 40_000_000
+    PHOTO_MAX_FILE_SIZE = 20 * 1024 * 1024
+    
+    # Предел для изображений, присланных файлом: они обрабатываются в исходном
+    # разрешении полосами, см. benchmarks/bench_document_strips.py
+    DOCUMENT_MAX_PIXELS = 100_000_000
+    
+    # Текст водяного знака и хранение скачанных фото для операций с кнопок
+    # (сколько фото и сколько секунд держать в памяти)
+    PHOTO_WATERMARK_TEXT = "tgbot"
+    PHOTO_SESSION_CACHE_SIZE = 32
+    PHOTO_SESSION_TTL = 600
+    
+    # Сколько секунд ждать остальные фото альбома после последнего полученного
+    MEDIA_GROUP_WINDOW = 1.0
+    
+    # Кодирование обработанных фото: формат ('JPEG' или 'WEBP'), качество,
+    # предельный объем в байтах и минимальный PSNR в дБ (None - без подбора).
+    # Подбор качества - несколько пробных кодирований, см. benchmarks/bench_encoding.py
+    PHOTO_OUTPUT_FORMAT = 'JPEG'
+    PHOTO_QUALITY = 85
+    PHOTO_MAX_BYTES = None
+    PHOTO_MIN_PSNR = None
+    
+    # Путь к ffmpeg для декодирования голосовых (None - искать в PATH)
+    FFMPEG_BINARY = None
+    
+    # Длинные голосовые режутся по паузам; сколько фрагментов распознавать одновременно
+    SPEECH_PARALLEL_CHUNKS = 4
+    
+    # Движок распознавания речи: 'google' (веб-API) или 'vosk' (локально, без сети;
+    # нужны pip install vosk и распакованная модель, например vosk-model-small-ru-0.22).
+    # Сравнение движков: benchmarks/bench_speech_backends.py
+    SPEECH_BACKEND = 'google'
+    SPEECH_MODEL_PATH = None
+    # Предел одного запроса к сетевому движку распознавания (сек); по истечении
+    # фрагмент считается нераспознанным, а не держит поток очереди
+    SPEECH_REQUEST_TIMEOUT = 15
+    
+    # Очередь распознавания речи: число потоков, лимит ожидающих задач, таймаут (сек),
+    # сколько сообщений одного пользователя распознается одновременно и сколько ждет
+    TRANSCRIBE_WORKERS = 2
+    TRANSCRIBE_QUEUE_LIMIT = 20
+    TRANSCRIBE_JOB_TIMEOUT = 120
+    TRANSCRIBE_PER_USER = 1
+    TRANSCRIBE_USER_QUEUE_LIMIT = 5
+    
+    # Лимиты записей для распознавания: длительность (сек) и размер (байт).
+    # Записи длиннее AUDIO_LONG_DURATION идут в отдельную очередь с
+    # TRANSCRIBE_LONG_WORKERS потоками и своим таймаутом
+    AUDIO_MAX_DURATION = 900
+    AUDIO_MAX_FILE_SIZE = 20 * 1024 * 1024
+    AUDIO_LONG_DURATION = 120
+    TRANSCRIBE_LONG_WORKERS = 1
+    TRANSCRIBE_LONG_JOB_TIMEOUT = 900
+    
+    # Временные файлы: папка (None - системная временная папка/telegram_bot),
+    # порог, после которого буфер в памяти переносится на диск (байт),
+    # лимит объема папки (МБ), возраст остатков для удаления и период уборки (сек)
+    TEMP_DIR = None
+    TEMP_SPOOL_SIZE = 8 * 1024 * 1024
+    TEMP_MAX_DISK_MB = 512
+    TEMP_MAX_AGE = 3600
+    TEMP_JANITOR_INTERVAL = 300
+    
+    # Кэш результатов обработки фото и голосовых: записей в памяти и в базе
+    MEDIA_CACHE_MEMORY_SIZE = 500
+    MEDIA_CACHE_MAX_ENTRIES = 10000
+    
+    # Кэш готовых QR-кодов (PNG в памяти; file_id отправленных - в 4 раза больше)
+    QR_CACHE_SIZE = 256
+    
+    # Пакетная генерация QR из CSV/TXT: процессов (None - по числу ядер),
+    # строк в файле, размер файла (байт) и формат картинок в архиве (png или svg)
+    QR_BULK_WORKERS = None
+    QR_BULK_MAX_ROWS = 1000
+    QR_BULK_MAX_FILE_SIZE = 1024 * 1024
+    QR_BULK_FORMAT = 'png'
+    
+    # Максимальное расстояние до ближайшего города для офлайн-геокодера (км)
+    GEOCODER_MAX_DISTANCE_KM = 100
+    
     # Конфигурация базы данных
     DATABASE_CONFIG = {
         'database': 'database.db'  # Путь к файлу базы данных SQLite
@@ -2,4 +2,4 @@
 from database.operations import DatabaseManager
 from .models import *
 
-__all__ = ['DatabaseManager', 'User', 'WeatherSubscription', 'Note', 'Habit', 'FinancialRecord', 'Reminder']
\ No newline at end of file
+__all__ = ['DatabaseManager', 'User', 'WeatherSubscription', 'Note', 'Habit', 'FinancialRecord', 'Reminder', 'MediaCacheEntry']
\ No newline at end of file
@@ -80,3 +80,26 @@ class UserData:
     data_key: str
     data_value: str
     created_at: datetime
+
+@dataclass
+class MediaCacheEntry:
+    cache_key: str
+    kind: str  # 'photo' or 'transcript'
+    file_id: Optional[str]
+    text: Optional[str]
+    last_used: datetime
+
+@dataclass
+class Quote:
+    text: str
+    author: str
+    text_hash: str
+    source: str = "citaty.info"
+    id: Optional[int] = None
+
+@dataclass
+class QuoteRotationState:
+    user_id: int
+    seed: int
+    position: int
+    size: int
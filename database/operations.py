@@ -94,6 +94,32 @@ class DatabaseManager:
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     PRIMARY KEY (user_id, data_key)
                 );
+                
+                CREATE TABLE IF NOT EXISTS media_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    kind TEXT,
+                    file_id TEXT,
+                    text TEXT,
+                    last_used DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+                
+                CREATE INDEX IF NOT EXISTS idx_media_cache_last_used ON media_cache (last_used);
+                
+                CREATE TABLE IF NOT EXISTS quotes (
+                    id INTEGER PRIMARY KEY,
+                    text TEXT,
+                    author TEXT,
+                    text_hash TEXT UNIQUE,
+                    source TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+                
+                CREATE TABLE IF NOT EXISTS quote_rotation (
+                    user_id INTEGER PRIMARY KEY,
+                    seed INTEGER,
+                    position INTEGER,
+                    size INTEGER
+                );
             ''')
     
     def _get_connection(self) -> sqlite3.Connection:
@@ -521,6 +547,105 @@ class DatabaseManager:
             else:
                 cursor.execute('DELETE FROM user_data WHERE user_id = ?', (user_id,))
     
+    # Media cache operations
+    def get_media_cache_entry(self, cache_key: str) -> Optional[MediaCacheEntry]:
+        """Получение результата обработки медиа с отметкой об использовании"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT cache_key, kind, file_id, text, last_used FROM media_cache WHERE cache_key = ?',
+                (cache_key,)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return None
+            cursor.execute(
+                'UPDATE media_cache SET last_used = ? WHERE cache_key = ?',
+                (datetime.now(), cache_key)
+            )
+            return MediaCacheEntry(
+                cache_key=row[0],
+                kind=row[1],
+                file_id=row[2],
+                text=row[3],
+                last_used=row[4]
+            )
+    
+    def save_media_cache_entry(self, entry: MediaCacheEntry):
+        """Сохранение результата обработки медиа"""
+        with self._get_connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO media_cache (cache_key, kind, file_id, text, last_used)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (entry.cache_key, entry.kind, entry.file_id, entry.text, entry.last_used))
+    
+    def delete_media_cache_entry(self, cache_key: str) -> bool:
+        """Удаление результата обработки медиа"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM media_cache WHERE cache_key = ?', (cache_key,))
+            return cursor.rowcount > 0
+    
+    def trim_media_cache(self, max_entries: int) -> int:
+        """Удаление давно не использованных записей сверх max_entries"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                DELETE FROM media_cache WHERE cache_key IN (
+                    SELECT cache_key FROM media_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            ''', (max_entries,))
+            return cursor.rowcount
+    
+    # Quote operations
+    def add_quotes(self, quotes: List[Quote]) -> int:
+        """Добавление цитат; уже известные (по text_hash) пропускаются. Возвращает число новых"""
+        with self._get_connection() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO quotes (text, author, text_hash, source) VALUES (?, ?, ?, ?)',
+                [(quote.text, quote.author, quote.text_hash, quote.source) for quote in quotes]
+            )
+            return conn.total_changes - before
+    
+    def get_quotes_max_id(self) -> int:
+        """Наибольший id цитаты (цитаты не удаляются, поэтому id идут подряд с 1)"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT MAX(id) FROM quotes')
+            return cursor.fetchone()[0] or 0
+    
+    def get_quote_from_id(self, quote_id: int) -> Optional[Quote]:
+        """Цитата с данным id или ближайшая следующая (поиск по первичному ключу)"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT id, text, author, text_hash, source FROM quotes WHERE id >= ? ORDER BY id LIMIT 1',
+                (quote_id,)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return Quote(id=row[0], text=row[1], author=row[2], text_hash=row[3], source=row[4])
+    
+    def get_quote_rotation(self, user_id: int) -> Optional[QuoteRotationState]:
+        """Состояние обхода корпуса цитат пользователем"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT user_id, seed, position, size FROM quote_rotation WHERE user_id = ?', (user_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return QuoteRotationState(user_id=row[0], seed=row[1], position=row[2], size=row[3])
+    
+    def save_quote_rotation(self, state: QuoteRotationState):
+        """Сохранение состояния обхода корпуса цитат"""
+        with self._get_connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO quote_rotation (user_id, seed, position, size) VALUES (?, ?, ?, ?)',
+                (state.user_id, state.seed, state.position, state.size)
+            )
+    
     # General operations
     def get_active_users(self) -> List[User]:
         """Получение активных пользователей"""
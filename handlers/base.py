@@ -3,6 +3,7 @@ from telebot.types import Message
 from database.operations import DatabaseManager
 from utils.keyboards import KeyboardManager
 from utils.error_handling import handle_errors
+from services.temp_storage import temp_storage
 import logging
 
 logger = logging.getLogger(__name__)
@@ -55,6 +56,20 @@ class StartHandler(BaseHandler):
 class HelpHandler(BaseHandler):
     """Обработчик команды помощи"""
     
+    # Файл со строками для пакетной генерации QR-кодов
+    QR_BULK_EXTENSIONS = ('.csv', '.txt')
+    
+    def __init__(self, bot: TeleBot, db: DatabaseManager, keyboards: KeyboardManager,
+                 qr_bulk=None, qr_bulk_max_file_size: int = 1024 * 1024, quote_rotation=None):
+        super().__init__(bot, db, keyboards)
+        if quote_rotation is None:
+            from services.quote_rotation import QuoteRotation
+            from services.quote_store import QuoteStore
+            quote_rotation = QuoteRotation(QuoteStore(db), db)
+        self.quote_rotation = quote_rotation
+        self.qr_bulk = qr_bulk
+        self.qr_bulk_max_file_size = qr_bulk_max_file_size
+    
     def register_handlers(self):
         @self.bot.message_handler(commands=['help'])
         @self.bot.message_handler(func=lambda message: message.text == '📋 Помощь')
@@ -101,9 +116,9 @@ class HelpHandler(BaseHandler):
         def handle_random_quote(message: Message):
             """Обработчик случайной цитаты"""
             try:
-                from services.quote_parser import QuoteParser
-                quote_parser = QuoteParser()
-                quote = quote_parser.get_random_quote()
+                # Из локального корпуса (сайт опрашивает только фоновый сборщик),
+                # без повторов, пока пользователь не увидит все цитаты
+                quote = self.quote_rotation.next_quote(message.chat.id)
                 
                 response = (
                     f"💫 **Случайная цитата:**\n\n"
@@ -129,7 +144,10 @@ class HelpHandler(BaseHandler):
             """Обработчик QR генератора"""
             instructions = (
                 "🔲 **Генератор QR кодов**\n\n"
-                "Отправьте текст или ссылку для создания QR кода:"
+                "Отправьте текст или ссылку для создания QR кода.\n\n"
+                "📄 Для нескольких кодов сразу отправьте CSV или TXT файл: "
+                "по коду на строку (из CSV берется первая колонка, заголовок url/text/ссылка пропускается) - "
+                "в ответ придет ZIP архив с картинками."
             )
             self.bot.send_message(message.chat.id, instructions)
             self.bot.register_next_step_handler(message, self.process_qr_generation)
@@ -138,26 +156,123 @@ class HelpHandler(BaseHandler):
     def process_qr_generation(self, message: Message):
         """Обработка генерации QR кода"""
         try:
-            from services.qr_generator import QRCodeService
-            qr_service = QRCodeService()
+            from services.qr_generator import qr_service
+            
+            if message.document:
+                self.process_qr_bulk(message)
+                return
             
-            data = message.text.strip()
+            data = (message.text or "").strip()
             if not data:
                 self.bot.send_message(message.chat.id, "❌ Текст не может быть пустым")
                 return
             
+            caption = f"✅ QR код создан для:\n`{data}`"
+            cache_key = qr_service.cache_key(data)
+            
+            # Этот код уже отправлялся: Telegram хранит фото, повторяем по file_id
+            file_id = qr_service.get_file_id(cache_key)
+            if file_id:
+                try:
+                    self.bot.send_photo(message.chat.id, file_id, caption=caption, parse_mode='Markdown')
+                    return
+                except Exception as e:
+                    logger.warning(f"Cached QR send error: {e}")
+                    qr_service.forget_file_id(cache_key)
+            
             qr_image = qr_service.generate_qr(data)
             
             if qr_image:
-                self.bot.send_photo(
+                sent = self.bot.send_photo(
                     message.chat.id,
                     qr_image,
-                    caption=f"✅ QR код создан для:\n`{data}`",
+                    caption=caption,
                     parse_mode='Markdown'
                 )
+                if sent.photo:
+                    qr_service.remember_file_id(cache_key, sent.photo[-1].file_id)
             else:
                 self.bot.send_message(message.chat.id, "❌ Ошибка создания QR кода")
         
         except Exception as e:
             logger.error(f"QR generation error: {e}")
-            self.bot.send_message(message.chat.id, "❌ Ошибка создания QR кода")
\ No newline at end of file
+            self.bot.send_message(message.chat.id, "❌ Ошибка создания QR кода")
+    
+    def process_qr_bulk(self, message: Message):
+        """Пакетная генерация QR-кодов из CSV/TXT файла в ZIP архив"""
+        from services.job_queue import QueueFullError, UserQueueFullError
+        from services.qr_bulk import QRBulkError, parse_payloads
+        
+        document = message.document
+        if self.qr_bulk is None:
+            self.bot.send_message(message.chat.id, "❌ Пакетная генерация QR кодов недоступна")
+            return
+        if not (document.file_name or "").lower().endswith(self.QR_BULK_EXTENSIONS):
+            self.bot.send_message(message.chat.id, "❌ Нужен файл CSV или TXT со строками для QR кодов")
+            return
+        if document.file_size and document.file_size > self.qr_bulk_max_file_size:
+            self.bot.send_message(
+                message.chat.id,
+                f"❌ Файл слишком большой: до {self.qr_bulk_max_file_size // 1024} КБ"
+            )
+            return
+        
+        file_info = self.bot.get_file(document.file_id)
+        try:
+            payloads = parse_payloads(
+                self.bot.download_file(file_info.file_path), self.qr_bulk.max_rows, document.file_name
+            )
+        except QRBulkError:
+            self.bot.send_message(
+                message.chat.id,
+                f"❌ В файле должно быть от 1 до {self.qr_bulk.max_rows} непустых строк"
+            )
+            return
+        
+        status = self.bot.send_message(message.chat.id, f"🔲 Создаю {len(payloads)} QR кодов...")
+        try:
+            self.qr_bulk.queue.submit(
+                self._build_qr_archive,
+                message.chat.id,
+                payloads,
+                status,
+                user_id=message.chat.id,
+                on_error=lambda error: self._qr_bulk_error(status, error)
+            )
+        except UserQueueFullError:
+            self._edit_qr_status(status, "⏳ Предыдущий архив еще создается. Дождитесь его.")
+        except QueueFullError:
+            self._edit_qr_status(status, "⏳ Сейчас создается слишком много архивов. Попробуйте через минуту.")
+    
+    def _build_qr_archive(self, chat_id: int, payloads: list, status: Message):
+        """Сборка архива и отправка (выполняется в очереди пакетной генерации)"""
+        with temp_storage.spool() as archive:
+            stats = self.qr_bulk.build_zip(payloads, archive)
+            archive.seek(0)
+            caption = (
+                f"✅ QR кодов: {stats['codes']}"
+                + (f" (не удалось: {stats['failed']})" if stats['failed'] else "")
+                + f"\n⚡ {stats['seconds']:.1f} с, {stats['per_core']:.0f} кодов/с на ядро"
+            )
+            self.bot.send_document(chat_id, archive, visible_file_name="qr_codes.zip", caption=caption)
+        self._delete_qr_status(status)
+    
+    def _qr_bulk_error(self, status: Message, error: BaseException):
+        """Сообщение о неудачной пакетной генерации"""
+        if isinstance(error, TimeoutError):
+            self._edit_qr_status(status, "⌛ Архив создавался слишком долго. Попробуйте файл поменьше.")
+        else:
+            logger.error(f"QR bulk generation error: {error}")
+            self._edit_qr_status(status, "❌ Ошибка создания QR кодов")
+    
+    def _edit_qr_status(self, status: Message, text: str):
+        try:
+            self.bot.edit_message_text(text, status.chat.id, status.message_id)
+        except Exception as e:
+            logger.warning(f"Status edit error: {e}")
+    
+    def _delete_qr_status(self, status: Message):
+        try:
+            self.bot.delete_message(status.chat.id, status.message_id)
+        except Exception:
+            pass
@@ -5,7 +5,7 @@ from utils.keyboards import KeyboardManager
 from utils.helpers import TextAnalyzer, PasswordGenerator, HealthCalculator, DateTimeHelper
 from utils.error_handling import handle_errors
 from utils.validators import InputValidator
-from services.qr_generator import QRCodeService
+from services.qr_generator import qr_service
 import logging
 from datetime import datetime
 from typing import Dict, Any
@@ -24,7 +24,7 @@ class UtilitiesHandler:
         self.health_calculator = HealthCalculator()
         self.date_helper = DateTimeHelper()
         self.validator = InputValidator()
-        self.qr_service = QRCodeService()
+        self.qr_service = qr_service
     
     def register_handlers(self):
         """Регистрация обработчиков"""
@@ -1,12 +1,23 @@
+import io
 import os
-import tempfile
+import time
 import logging
-from telebot import TeleBot
-from telebot.types import Message
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+import requests
+from telebot import TeleBot, apihelper
+from telebot.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto, PhotoSize
 from database.operations import DatabaseManager
+from services.audio_probe import PROBE_HEAD_BYTES, PROBE_TAIL_BYTES, AudioLimitError, probe_duration
+from services.job_queue import JobQueue, QueueFullError, UserQueueFullError, create_process_queue, create_thread_queue
+from services.media_cache import MediaCache
+from services.media_group import MediaGroupCollector
+from services.temp_storage import TempStorage, temp_storage as default_temp_storage
+from utils.cache import LRUCache
 from utils.keyboards import KeyboardManager
 from utils.error_handling import handle_errors
 from pathlib import Path
+from typing import Callable, List, Optional, Tuple
 
 # Инициализация логгера должна быть в начале файла
 logger = logging.getLogger(__name__)
@@ -14,26 +25,93 @@ logger = logging.getLogger(__name__)
 class VoicePhotoHandler:
     """Обработчик голосовых сообщений и фотографий"""
     
-    def __init__(self, bot: TeleBot, db: DatabaseManager, keyboards: KeyboardManager):
+    # Наборы операций над фото: название кнопки и шаги цепочки
+    PHOTO_PRESETS = {
+        'enhance': ("✨ Улучшить", ['enhance']),
+        'resize': ("📐 Уменьшить до 800px", ['resize']),
+        'grayscale': ("⚫ Черно-белое", ['grayscale']),
+        'watermark': ("💧 Водяной знак", ['watermark']),
+        'all': ("✨📐💧 Все сразу", ['enhance', 'resize', 'watermark']),
+    }
+    
+    # Частичная расшифровка: как часто обновлять статус (сек) и сколько текста в нем показывать
+    TRANSCRIPT_EDIT_INTERVAL = 1.5
+    TRANSCRIPT_PREVIEW_LENGTH = 3500
+    # Предел длины сообщения Telegram с запасом
+    MESSAGE_LIMIT = 4000
+    
+    def __init__(self, bot: TeleBot, db: DatabaseManager, keyboards: KeyboardManager,
+                 image_queue: Optional[JobQueue] = None, photo_max_side: int = 1280,
+                 photo_max_pixels: int = 40_000_000, photo_max_file_size: int = 20 * 1024 * 1024,
+                 media_cache: Optional[MediaCache] = None, photo_watermark: str = "tgbot",
+                 photo_session_size: int = 32, photo_session_ttl: int = 600,
+                 media_group_window: float = 1.0, photo_encoding: Optional[dict] = None,
+                 document_max_pixels: int = 100_000_000, ffmpeg_binary: Optional[str] = None,
+                 speech_parallel_chunks: int = 4, speech_backend: str = 'google',
+                 speech_model_path: Optional[str] = None, speech_request_timeout: float = 15.0,
+                 transcription_queue: Optional[JobQueue] = None,
+                 temp_storage: Optional[TempStorage] = None,
+                 long_transcription_queue: Optional[JobQueue] = None, audio_max_duration: int = 900,
+                 audio_max_file_size: int = 20 * 1024 * 1024, audio_long_duration: int = 120):
         self.bot = bot
         self.db = db
         self.keyboards = keyboards
-        self.temp_dir = Path(tempfile.gettempdir()) / "telegram_bot"
-        self.temp_dir.mkdir(exist_ok=True)
+        # Результаты обработки по file_unique_id: повторные фото и голосовые не обрабатываются заново
+        self.media_cache = media_cache or MediaCache(db)
+        # Разрешение обработки и лимиты входящих фото
+        self.photo_max_side = photo_max_side
+        self.photo_max_pixels = photo_max_pixels
+        self.photo_max_file_size = photo_max_file_size
+        self.photo_watermark = photo_watermark
+        # Параметры кодирования результата (формат, качество, объем, PSNR)
+        self.photo_encoding = photo_encoding or {}
+        # Изображения, присланные файлом, обрабатываются в исходном разрешении полосами
+        self.document_max_pixels = document_max_pixels
+        # Скачанные фото (по file_unique_id) и исходники под кнопками результатов.
+        # В кэше байты, а не декодированные изображения: обработка идет в других
+        # процессах, и передавать им пиксели дороже, чем заново декодировать JPEG.
+        self.photo_files = LRUCache(max_size=photo_session_size, ttl=photo_session_ttl)
+        self.photo_sessions = LRUCache(max_size=1000)
+        # Альбомы: сбор фото по media_group_id и параллельное скачивание
+        self.album_collector = MediaGroupCollector(self.process_photo_album, window=media_group_window)
+        self._download_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="photo-download")
+        # Временные файлы: уникальные имена, удаление после задачи, уборщик для остатков
+        self.temp_storage = temp_storage or default_temp_storage
         
         # Пытаемся импортировать реальные процессоры, иначе используем заглушки
         try:
-            from services.image_processor import ImageProcessor
+            from services.image_processor import ImageProcessor, process_image_bytes, process_image_document
             self.image_processor = ImageProcessor()
             logger.info("✅ ImageProcessor загружен")
         except ImportError:
-            from services.image_processor import ImageProcessor
+            from services.image_processor_stub import ImageProcessor, process_image_bytes, process_image_document
             self.image_processor = ImageProcessor()
-            logger.warning
+            logger.warning("⚠️ ImageProcessor недоступен, используется заглушка")
+        self.process_image_bytes = process_image_bytes
+        self.process_image_document = process_image_document
+        
+        # Обработка фото выполняется в пуле процессов, а не в потоке обработчика
+        self.image_queue = image_queue or create_process_queue("images")
+        # Скачивание и распознавание речи - в отдельной очереди потоков с лимитами на пользователя
+        self.transcription_queue = transcription_queue or create_thread_queue(
+            "transcription", workers=2, max_per_user=1, max_waiting_per_user=5
+        )
+        # Длинные записи - в своей очереди с одним потоком, чтобы не задерживать короткие
+        self.long_transcription_queue = long_transcription_queue or create_thread_queue(
+            "transcription-long", workers=1, max_per_user=1, max_waiting_per_user=2
+        )
+        # Лимиты записей для распознавания (сек, байт) и порог «длинной» записи (сек)
+        self.audio_max_duration = audio_max_duration
+        self.audio_max_file_size = audio_max_file_size
+        self.audio_long_duration = audio_long_duration
         
         try:
             from services.voice_recognizer import VoiceRecognizer
-            self.voice_recognizer = VoiceRecognizer()
+            self.voice_recognizer = VoiceRecognizer(
+                ffmpeg_binary=ffmpeg_binary, max_parallel_chunks=speech_parallel_chunks,
+                backend=speech_backend, model_path=speech_model_path,
+                request_timeout=speech_request_timeout
+            )
             logger.info("✅ VoiceRecognizer загружен")
         except ImportError:
             from services.voice_recognizer_stub import VoiceRecognizer
@@ -63,6 +141,7 @@ class VoicePhotoHandler:
                 message.chat.id,
                 "🖼 Отправьте фото для обработки\n\n"
                 "💡 *Доступные улучшения: контраст, резкость, цветокоррекция*\n"
+                "🎛 *Под результатом - кнопки: уменьшение, Ч/Б, водяной знак*\n"
                 "⚠️ *Для работы функции требуется установка библиотеки Pillow*",
                 parse_mode='Markdown'
             )
@@ -84,40 +163,39 @@ class VoicePhotoHandler:
         def handle_photo_message(message: Message):
             """Обработчик фотографий"""
             self.process_photo_message(message)
+        
+        @self.bot.message_handler(
+            content_types=['document'],
+            func=lambda message: (message.document.mime_type or '').startswith('image/')
+        )
+        @handle_errors
+        def handle_image_document(message: Message):
+            """Обработчик изображений, присланных файлом"""
+            self.process_image_document_message(message)
     
     @handle_errors
     def process_voice_message(self, message: Message):
         """Обработка голосовых сообщений"""
         try:
-            self.bot.send_message(message.chat.id, "🎤 Обрабатываю голосовое сообщение...")
-        
-            # Скачивание файла
-            file_info = self.bot.get_file(message.voice.file_id)
-            downloaded_file = self.bot.download_file(file_info.file_path)
-        
-            # Сохранение во временный файл
-            temp_file = self.temp_dir / f"voice_{message.message_id}.oga"
-            with open(temp_file, 'wb') as f:
-                f.write(downloaded_file)
-        
-            # Распознавание речи
-            text = self.voice_recognizer.recognize_speech(str(temp_file))
-        
-            # Очистка временного файла
-            temp_file.unlink(missing_ok=True)
-        
-            # Форматирование ответа в зависимости от результата
-            if "Ошибка" in text or "не удалось" in text.lower() or "установите" in text.lower():
-                # Если это сообщение от заглушки или ошибка
-                response = text
-            else:
-                # Если распознавание успешно
-                response = f"🎤 **Распознанный текст:**\n\n{text}"
-        
-            self.bot.send_message(
-                message.chat.id,
-                response,
-                parse_mode='Markdown'
+            cache_key = self._transcript_cache_key(message.voice)
+            cached = self.media_cache.get(cache_key)
+            if cached:
+                self.bot.send_message(
+                    message.chat.id,
+                    f"🎤 **Распознанный текст:**\n\n{cached.text}",
+                    parse_mode='Markdown'
+                )
+                return
+            
+            # Лимиты проверяются по метаданным Telegram, до скачивания
+            rejection, queue, duration = self._preflight_audio(message.voice)
+            if rejection:
+                self.bot.send_message(message.chat.id, rejection)
+                return
+            
+            status = self.bot.send_message(message.chat.id, "🎤 Обрабатываю голосовое сообщение...")
+            self._submit_transcription(
+                message.chat.id, status, message.voice, duration, cache_key, queue, "🎤 **Распознанный текст:**\n\n"
             )
             
         except Exception as e:
@@ -132,30 +210,20 @@ class VoicePhotoHandler:
     def process_audio_message(self, message: Message):
         """Обработка аудио файлов"""
         try:
-            self.bot.send_message(message.chat.id, "🎵 Обрабатываю аудио файл...")
-            
-            # Скачивание файла
-            file_info = self.bot.get_file(message.audio.file_id)
-            downloaded_file = self.bot.download_file(file_info.file_path)
+            cache_key = self._transcript_cache_key(message.audio)
+            cached = self.media_cache.get(cache_key)
+            if cached:
+                self.bot.send_message(message.chat.id, cached.text, parse_mode='Markdown')
+                return
             
-            # Сохранение во временный файл
-            temp_file = self.temp_dir / f"audio_{message.message_id}.mp3"
-            with open(temp_file, 'wb') as f:
-                f.write(downloaded_file)
+            rejection, queue, duration = self._preflight_audio(message.audio)
+            if rejection:
+                self.bot.send_message(message.chat.id, rejection)
+                return
             
-            # Распознавание речи
-            text = self.voice_recognizer.recognize_speech(str(temp_file))
+            status = self.bot.send_message(message.chat.id, "🎵 Обрабатываю аудио файл...")
+            self._submit_transcription(message.chat.id, status, message.audio, duration, cache_key, queue)
             
-            # Очистка временного файла
-            temp_file.unlink(missing_ok=True)
-            
-            # Отправка результата
-            self.bot.send_message(
-                message.chat.id,
-                text,
-                parse_mode='Markdown'
-            )
-                
         except Exception as e:
             logger.error(f"Audio processing error: {e}")
             self.bot.send_message(
@@ -164,84 +232,694 @@ class VoicePhotoHandler:
                 reply_markup=self.keyboards.main_menu()
             )
     
+    def _transcript_cache_key(self, media) -> str:
+        """Ключ кэша распознавания: после смены движка или модели текст распознается заново"""
+        return MediaCache.make_key(
+            media.file_unique_id, 'transcribe', language='ru-RU', engine=self.voice_recognizer.engine
+        )
+    
+    def _preflight_audio(self, media) -> Tuple[Optional[str], JobQueue, Optional[float]]:
+        """Проверка голосового или аудио до скачивания: (текст отказа или None, очередь, длительность)
+        
+        Длительность и размер берутся из сообщения; длинные записи идут в
+        отдельную очередь с низким приоритетом, чтобы не задерживать короткие
+        голосовые. Если Telegram не прислал длительность, она читается из
+        заголовков контейнера: скачиваются только начало файла и, для Ogg,
+        конец. Не удалось и это - проверка повторяется в задаче по скачанному файлу.
+        """
+        file_size = getattr(media, 'file_size', None)
+        duration = getattr(media, 'duration', None)
+        if file_size and file_size > self.audio_max_file_size:
+            return self._audio_limit_text(file_size=file_size), self.transcription_queue, duration
+        if not duration:
+            duration = self._probe_remote_duration(media.file_id)
+        if duration and duration > self.audio_max_duration:
+            return self._audio_limit_text(duration=duration), self.transcription_queue, duration
+        if duration and duration > self.audio_long_duration:
+            return None, self.long_transcription_queue, duration
+        return None, self.transcription_queue, duration
+    
+    def _probe_remote_duration(self, file_id: str) -> Optional[float]:
+        """Длительность по заголовкам файла на серверах Telegram, без скачивания всей записи"""
+        try:
+            file_info = self.bot.get_file(file_id)
+            if file_info.file_size and file_info.file_size > self.audio_max_file_size:
+                return None
+            head = self._download_range(file_info.file_path, f"0-{PROBE_HEAD_BYTES - 1}")
+            tail = b""
+            if head[:4] == b"OggS" and file_info.file_size and file_info.file_size > len(head):
+                tail = self._download_range(file_info.file_path, f"-{PROBE_TAIL_BYTES}")
+            return probe_duration(head, total_size=file_info.file_size, tail=tail)
+        except Exception as e:
+            logger.warning(f"Audio header probe error: {e}")
+            return None
+    
+    def _download_range(self, file_path: str, byte_range: str) -> bytes:
+        """Часть файла по заголовку Range; сервер без поддержки Range отдает начало файла"""
+        url = (apihelper.FILE_URL or "https://api.telegram.org/file/bot{0}/{1}").format(self.bot.token, file_path)
+        limit = PROBE_HEAD_BYTES if byte_range.startswith("0-") else PROBE_TAIL_BYTES
+        with requests.get(url, headers={'Range': f"bytes={byte_range}"}, proxies=apihelper.proxy,
+                          stream=True, timeout=10) as response:
+            response.raise_for_status()
+            if response.status_code != 206 and not byte_range.startswith("0-"):
+                # Конец файла без Range не получить, не скачав все
+                return b""
+            return response.raw.read(limit, decode_content=True)
+    
+    def _audio_limit_text(self, duration: Optional[float] = None, file_size: Optional[int] = None) -> str:
+        """Сообщение о превышении лимитов записи"""
+        if file_size:
+            return f"❌ Файл слишком большой: распознаются записи до {self.audio_max_file_size // (1024 * 1024)} МБ."
+        limit = self.audio_max_duration
+        limit_text = f"{limit // 60} мин." if limit >= 60 else f"{limit} сек."
+        return f"❌ Запись слишком длинная: распознаются записи до {limit_text}"
+    
+    def _submit_transcription(self, chat_id: int, status: Message, media, duration: Optional[float],
+                              cache_key: str, queue: JobQueue, title: str = ""):
+        """Постановка распознавания в очередь; статусное сообщение показывает позицию и ход работы"""
+        progress = {'queued': False}
+        try:
+            job = queue.submit(
+                self._transcribe,
+                media.file_id,
+                duration,
+                status,
+                progress,
+                user_id=chat_id,
+                on_done=lambda text: self._finish_transcription(status, text, cache_key, title),
+                on_error=lambda error: self._transcription_error(status, error)
+            )
+        except UserQueueFullError:
+            self._edit_status(status, "⏳ У вас уже несколько сообщений ждут распознавания. Дождитесь результата.")
+            return
+        except QueueFullError:
+            self._edit_status(status, "⏳ Сейчас распознается слишком много сообщений. Попробуйте через минуту.")
+            return
+        
+        position = queue.position(job)
+        if position > 0:
+            progress['queued'] = True
+            markup = InlineKeyboardMarkup()
+            markup.add(InlineKeyboardButton("❌ Отменить", callback_data=f"cancel_transcribe_{job.id}"))
+            self._edit_status(
+                status,
+                f"🎤 Сообщение в очереди на распознавание: позиция {position}",
+                reply_markup=markup
+            )
+    
+    def _transcribe(self, file_id: str, duration: Optional[float], status: Message, progress: dict) -> str:
+        """Скачивание и распознавание (выполняется в потоке очереди распознавания)"""
+        if progress['queued']:
+            self._edit_status(status, "🎤 Распознаю...")
+        
+        file_info = self.bot.get_file(file_id)
+        if file_info.file_size and file_info.file_size > self.audio_max_file_size:
+            raise AudioLimitError(self._audio_limit_text(file_size=file_info.file_size))
+        downloaded_file = self.bot.download_file(file_info.file_path)
+        
+        # Длительность не удалось узнать до скачивания - по заголовкам, до декодирования
+        if not duration:
+            duration = probe_duration(downloaded_file)
+            if duration and duration > self.audio_max_duration:
+                raise AudioLimitError(self._audio_limit_text(duration=duration))
+        
+        # Распознавание речи: декодирование в PCM идет в памяти, без временных файлов;
+        # длинные сообщения распознаются фрагментами, готовый текст виден по ходу
+        return self.voice_recognizer.recognize_bytes(
+            downloaded_file, on_progress=self._transcript_progress(status)
+        )
+    
+    def _finish_transcription(self, status: Message, text: str, cache_key: str, title: str):
+        """Итог распознавания (из очереди): ошибки и ответы заглушки - как есть, полный текст - в кэш"""
+        if self._is_recognition_error(text):
+            response = text
+        else:
+            response = f"{title}{text}"
+            # Расшифровку с нераспознанными из-за сбоя фрагментами не кэшируем:
+            # повторная отправка записи распознает ее заново
+            if not getattr(text, 'failed_chunks', 0):
+                self.media_cache.put(cache_key, MediaCache.TRANSCRIPT, text=text)
+        self._send_transcript(status, response)
+    
+    def _transcription_error(self, status: Message, error: BaseException):
+        """Сообщение о неудачном, отмененном или слишком долгом распознавании"""
+        if isinstance(error, AudioLimitError):
+            self._edit_status(status, str(error))
+        elif isinstance(error, CancelledError):
+            self._edit_status(status, "❌ Распознавание отменено")
+        elif isinstance(error, TimeoutError):
+            self._edit_status(status, "⌛ Распознавание заняло слишком много времени. Попробуйте сообщение покороче.")
+        else:
+            logger.error(f"Voice processing error: {error}")
+            self._edit_status(status, "❌ Ошибка обработки голосового сообщения. Попробуйте еще раз.")
+    
+    def _transcript_progress(self, status: Message) -> Callable[[int, int, str], None]:
+        """Показ частичной расшифровки в статусном сообщении по мере готовности фрагментов"""
+        last_edit = [0.0]
+        
+        def show(done: int, total: int, text: str):
+            # Telegram ограничивает частоту правок одного сообщения
+            now = time.monotonic()
+            if now - last_edit[0] < self.TRANSCRIPT_EDIT_INTERVAL:
+                return
+            last_edit[0] = now
+            if len(text) > self.TRANSCRIPT_PREVIEW_LENGTH:
+                text = "…" + text[-self.TRANSCRIPT_PREVIEW_LENGTH:]
+            self._edit_status(status, f"🎤 Распознано фрагментов: {done} из {total}\n\n{text}")
+        
+        return show
+    
+    def _send_transcript(self, status: Message, response: str):
+        """Итоговая расшифровка на месте статусного сообщения (длинная - несколькими сообщениями)"""
+        parts = []
+        while len(response) > self.MESSAGE_LIMIT:
+            # Режем по последнему пробелу, чтобы не разрывать слова
+            cut = response.rfind(" ", 0, self.MESSAGE_LIMIT)
+            cut = cut if cut > 0 else self.MESSAGE_LIMIT
+            parts.append(response[:cut])
+            response = response[cut:].lstrip()
+        parts.append(response)
+        try:
+            self.bot.edit_message_text(parts[0], status.chat.id, status.message_id, parse_mode='Markdown')
+        except Exception as e:
+            # Например, разметка сломалась на границе части - отправляем без нее
+            logger.warning(f"Could not edit transcript message: {e}")
+            self.bot.send_message(status.chat.id, parts[0])
+        for part in parts[1:]:
+            self.bot.send_message(status.chat.id, part)
+    
+    def _is_recognition_error(self, text: str) -> bool:
+        """Ответ распознавателя - сообщение об ошибке или от заглушки"""
+        return "Ошибка" in text or "не удалось" in text.lower() or "установите" in text.lower()
+    
     @handle_errors
     def process_photo_message(self, message: Message):
-        """Обработка фотографий"""
+        """Обработка фотографий: сразу улучшаем, остальные операции - кнопками под результатом"""
         try:
-            self.bot.send_message(message.chat.id, "🖼 Обрабатываю фото...")
+            # Фото альбома собираются и обрабатываются вместе
+            if message.media_group_id:
+                self.album_collector.add(message)
+                return
+            
+            # Вариант фото, достаточный для разрешения обработки
+            photo = self._choose_photo_size(message.photo)
+            if photo is None:
+                self.bot.send_message(message.chat.id, "❌ Фото слишком большое для обработки.")
+                return
+            
+            source = {'file_id': photo.file_id, 'file_unique_id': photo.file_unique_id}
+            self._run_photo_preset(message.chat.id, source, 'enhance')
         
-            # Получаем фото наивысшего качества
-            file_id = message.photo[-1].file_id
-            file_info = self.bot.get_file(file_id)
+        except Exception as e:
+            logger.error(f"Photo processing error: {e}")
+            self.bot.send_message(
+                message.chat.id,
+                "❌ Ошибка обработки фото. Попробуйте еще раз.",
+                reply_markup=self.keyboards.main_menu()
+            )
+    
+    @handle_errors
+    def process_image_document_message(self, message: Message):
+        """Обработка изображения-файла в исходном разрешении, результат - тоже файлом"""
+        document = message.document
+        if document.file_size and document.file_size > self.photo_max_file_size:
+            self.bot.send_message(message.chat.id, "❌ Файл слишком большой для обработки.")
+            return
+        
+        # Исходник и результат лежат на диске до отправки: место под оба проверяем заранее
+        if not self.temp_storage.has_room(2 * (document.file_size or self.photo_max_file_size)):
+            self.bot.send_message(message.chat.id, "⏳ Сейчас обрабатывается слишком много файлов. Попробуйте позже.")
+            return
+        
+        status = self.bot.send_message(message.chat.id, "🖼 Обрабатываю изображение в исходном разрешении...")
+        input_path = self.temp_storage.new_path("document")
+        output_path = self.temp_storage.new_path("document", "_processed.jpg")
+        
+        try:
+            file_info = self.bot.get_file(document.file_id)
+            input_path.write_bytes(self.bot.download_file(file_info.file_path))
+        except Exception as e:
+            logger.error(f"Document download error: {e}")
+            self.temp_storage.release(input_path)
+            self._edit_status(status, "❌ Не удалось скачать файл. Попробуйте еще раз.")
+            return
+        
+        # Воркер читает файл с диска и пишет результат на диск: пиксели не
+        # передаются между процессами, а в памяти воркера одно изображение
+        try:
+            job = self.image_queue.submit(
+                self.process_image_document,
+                str(input_path),
+                str(output_path),
+                self.document_max_pixels,
+                user_id=message.chat.id,
+                on_done=lambda result: self._send_processed_document(
+                    message.chat.id, status, document, result, input_path, output_path
+                ),
+                on_error=lambda error: self._document_error(status, error, input_path, output_path)
+            )
+        except QueueFullError:
+            self.temp_storage.release(input_path)
+            self._edit_status(
+                status,
+                "⏳ Сейчас обрабатывается слишком много фото. Попробуйте через минуту."
+            )
+            return
+        
+        position = self.image_queue.position(job)
+        if position > 0:
+            markup = InlineKeyboardMarkup()
+            markup.add(InlineKeyboardButton("❌ Отменить", callback_data=f"cancel_image_{job.id}"))
+            self._edit_status(
+                status,
+                f"🖼 Изображение в очереди на обработку: позиция {position}",
+                reply_markup=markup
+            )
+    
+    def _send_processed_document(self, chat_id: int, status: Message, document, result: Optional[dict],
+                                 input_path: Path, output_path: Path):
+        """Отправка обработанного изображения файлом (из очереди)"""
+        try:
+            if result is None:
+                self._edit_status(
+                    status,
+                    "❌ Не удалось обработать изображение: формат не поддерживается или файл поврежден."
+                )
+                return
+            if result.get('error') == 'too_large':
+                self._edit_status(
+                    status,
+                    f"❌ Изображение слишком большое: обрабатываются файлы до "
+                    f"{self.document_max_pixels // 1_000_000} мегапикселей."
+                )
+                return
+            
+            width, height = result['size']
+            name = Path(document.file_name or "image").stem
+            with open(output_path, 'rb') as output:
+                self.bot.send_document(
+                    chat_id,
+                    output,
+                    visible_file_name=f"{name}_processed.jpg",
+                    caption=f"✨ Улучшено в исходном разрешении: {width}×{height}",
+                    reply_markup=self.keyboards.main_menu()
+                )
+            self._delete_status(status)
+        except Exception as e:
+            logger.error(f"Processed document send error: {e}")
+            self._edit_status(status, "❌ Ошибка обработки фото. Попробуйте еще раз.")
+        finally:
+            self.temp_storage.release(input_path, output_path)
+    
+    def _document_error(self, status: Message, error: BaseException, input_path: Path, output_path: Path):
+        """Ошибка обработки изображения-файла: сообщение и удаление временных файлов"""
+        self._send_photo_error(status, error)
+        self.temp_storage.release(input_path, output_path)
+    
+    @handle_errors
+    def process_photo_album(self, messages: List[Message]):
+        """Обработка альбома: фото параллельно в пуле, результат одним send_media_group"""
+        chat_id = messages[0].chat.id
+        try:
+            sources = []
+            for message in messages:
+                photo = self._choose_photo_size(message.photo)
+                if photo:
+                    sources.append({'file_id': photo.file_id, 'file_unique_id': photo.file_unique_id})
+            
+            if not sources:
+                self.bot.send_message(chat_id, "❌ Фото слишком большие для обработки.")
+                return
+            if len(sources) == 1:
+                # Альбом из одного фото Telegram отправить не даст
+                self._run_photo_preset(chat_id, sources[0], 'enhance')
+                return
+            
+            album = {
+                'chat_id': chat_id,
+                'status': None,
+                'sources': sources,
+                'keys': [self._photo_cache_key(source, 'enhance') for source in sources],
+                'results': [None] * len(sources),
+                'remaining': 0,
+                'aborted': False,
+                'lock': threading.Lock(),
+            }
+            
+            # Уже обработанные фото берутся из кэша по file_id
+            pending = []
+            for index, cache_key in enumerate(album['keys']):
+                cached = self.media_cache.get(cache_key)
+                if cached:
+                    album['results'][index] = cached.file_id
+                else:
+                    pending.append(index)
+            album['remaining'] = len(pending)
+            
+            if not pending:
+                self._send_album(album)
+                return
+            
+            status = album['status'] = self.bot.send_message(
+                chat_id, f"🖼 Обрабатываю альбом: {len(pending)} фото..."
+            )
+            
+            # Скачивание параллельно, обработка - в пуле процессов
+            downloads = self._download_pool.map(
+                self._download_photo, [sources[index] for index in pending]
+            )
+            jobs = []
+            try:
+                for index, downloaded_file in zip(pending, downloads):
+                    jobs.append(self.image_queue.submit(
+                        self.process_image_bytes,
+                        downloaded_file,
+                        self.photo_max_side,
+                        self.photo_max_pixels,
+                        self._preset_operations('enhance'),
+                        self.photo_encoding,
+                        user_id=chat_id,
+                        on_done=lambda result, index=index: self._album_item_done(album, index, result),
+                        on_error=lambda error, index=index: self._album_item_done(album, index, None)
+                    ))
+            except QueueFullError:
+                with album['lock']:
+                    album['aborted'] = True
+                for job in jobs:
+                    self.image_queue.cancel(job.id)
+                self._edit_status(
+                    status,
+                    "⏳ Сейчас обрабатывается слишком много фото. Попробуйте через минуту."
+                )
+        
+        except Exception as e:
+            logger.error(f"Album processing error: {e}")
+            self.bot.send_message(
+                chat_id,
+                "❌ Ошибка обработки альбома. Попробуйте еще раз.",
+                reply_markup=self.keyboards.main_menu()
+            )
+    
+    def _download_photo(self, source: dict) -> bytes:
+        """Скачивание фото с сохранением в кэше скачанных файлов"""
+        downloaded_file = self.photo_files.get(source['file_unique_id'])
+        if downloaded_file is None:
+            file_info = self.bot.get_file(source['file_id'])
             downloaded_file = self.bot.download_file(file_info.file_path)
+            self.photo_files.set(source['file_unique_id'], downloaded_file)
+        return downloaded_file
+    
+    def _album_item_done(self, album: dict, index: int, result: Optional[dict]):
+        """Результат одного фото альбома; последний запускает отправку"""
+        with album['lock']:
+            if album['aborted']:
+                return
+            album['results'][index] = result
+            album['remaining'] -= 1
+            if album['remaining'] > 0:
+                return
+        self._send_album(album)
+    
+    def _send_album(self, album: dict):
+        """Отправка обработанного альбома одним сообщением"""
+        chat_id = album['chat_id']
+        try:
+            media = []
+            for source, result in zip(album['sources'], album['results']):
+                if isinstance(result, dict):
+                    media.append(InputMediaPhoto(io.BytesIO(result['data'])))
+                elif isinstance(result, str):
+                    media.append(InputMediaPhoto(result))
+                else:
+                    # Не удалось обработать: в альбоме остается исходное фото
+                    media.append(InputMediaPhoto(source['file_id']))
             
-            # Сохранение во временный файл
-            temp_file = self.temp_dir / f"photo_{message.message_id}.jpg"
-            with open(temp_file, 'wb') as f:
-                f.write(downloaded_file)
+            processed = sum(1 for result in album['results'] if result is not None)
+            media[0].caption = f"✅ **Обработано фото:** {processed} из {len(media)}"
+            media[0].parse_mode = 'Markdown'
             
-            # Получаем информацию об изображении до обработки
-            original_info = self.image_processor.get_image_info(str(temp_file))
+            sent = self.bot.send_media_group(chat_id, media)
             
-            # Обработка изображения
-            processed_image_path = self.image_processor.process_image(str(temp_file))
+            # Загруженные результаты повторно отправляются по file_id
+            for message, result, cache_key in zip(sent, album['results'], album['keys']):
+                if isinstance(result, dict) and message.photo:
+                    self.media_cache.put(
+                        cache_key, MediaCache.PHOTO,
+                        file_id=message.photo[-1].file_id,
+                        text=self._photo_caption('enhance', result)
+                    )
             
-            if processed_image_path and processed_image_path != str(temp_file):
-                # Получаем информацию об обработанном изображении
-                processed_info = self.image_processor.get_image_info(processed_image_path)
+            if album['status']:
+                self._delete_status(album['status'])
+        
+        except Exception as e:
+            logger.error(f"Album sending error: {e}")
+            self.bot.send_message(
+                chat_id,
+                "❌ Ошибка обработки альбома. Попробуйте еще раз.",
+                reply_markup=self.keyboards.main_menu()
+            )
+    
+    def _run_photo_preset(self, chat_id: int, source: dict, preset: str):
+        """Выполнение цепочки операций над фото: из кэша или через очередь"""
+        # Это фото уже так обрабатывалось: отправляем загруженный ранее результат
+        cache_key = self._photo_cache_key(source, preset)
+        if self._send_cached_photo(chat_id, source, cache_key):
+            return
+        
+        status = self.bot.send_message(chat_id, "🖼 Обрабатываю фото...")
+        
+        # Скачанное фото хранится недолго: следующая операция не скачивает его заново
+        downloaded_file = self._download_photo(source)
+        
+        # Фото обрабатывается в памяти: одно декодирование и одно кодирование на всю цепочку
+        try:
+            job = self.image_queue.submit(
+                self.process_image_bytes,
+                downloaded_file,
+                self.photo_max_side,
+                self.photo_max_pixels,
+                self._preset_operations(preset),
+                self.photo_encoding,
+                user_id=chat_id,
+                on_done=lambda result: self._send_processed_photo(
+                    chat_id, status, source, preset, downloaded_file, result, cache_key
+                ),
+                on_error=lambda error: self._send_photo_error(status, error)
+            )
+        except QueueFullError:
+            self._edit_status(
+                status,
+                "⏳ Сейчас обрабатывается слишком много фото. Попробуйте через минуту."
+            )
+            return
+        
+        position = self.image_queue.position(job)
+        if position > 0:
+            markup = InlineKeyboardMarkup()
+            markup.add(InlineKeyboardButton("❌ Отменить", callback_data=f"cancel_image_{job.id}"))
+            self._edit_status(
+                status,
+                f"🖼 Фото в очереди на обработку: позиция {position}",
+                reply_markup=markup
+            )
+    
+    def _photo_cache_key(self, source: dict, preset: str) -> str:
+        """Ключ кэша обработанного фото
+        
+        В ключ входят шаги цепочки с параметрами (например, текст водяного
+        знака), размер и параметры кодирования: после смены любого из них в
+        конфигурации кэш дает промах.
+        """
+        return MediaCache.make_key(
+            source['file_unique_id'], preset,
+            operations=self._preset_operations(preset), max_side=self.photo_max_side, **self.photo_encoding
+        )
+    
+    def _preset_operations(self, preset: str) -> list:
+        """Цепочка операций ImageProcessor для набора с кнопки"""
+        steps = {
+            'enhance': ('enhance', {}),
+            'resize': ('resize', {'max_size': (800, 800)}),
+            'grayscale': ('grayscale', {}),
+            'watermark': ('watermark', {'text': self.photo_watermark}),
+        }
+        return [steps[name] for name in self.PHOTO_PRESETS[preset][1]]
+    
+    def _photo_operations_keyboard(self, current: str) -> InlineKeyboardMarkup:
+        """Кнопки остальных операций под обработанным фото"""
+        markup = InlineKeyboardMarkup(row_width=2)
+        markup.add(*[
+            InlineKeyboardButton(title, callback_data=f"photo_op_{preset}")
+            for preset, (title, _) in self.PHOTO_PRESETS.items()
+            if preset != current
+        ])
+        return markup
+    
+    def _choose_photo_size(self, sizes: List[PhotoSize]) -> Optional[PhotoSize]:
+        """Выбор наименьшего варианта фото, покрывающего разрешение обработки
+        
+        Telegram присылает несколько размеров одного фото по возрастанию;
+        скачивать больший, чем нужен для обработки, вариант нет смысла.
+        Варианты сверх лимитов пикселей и размера файла не рассматриваются.
+        """
+        allowed = [
+            size for size in sizes
+            if size.width * size.height <= self.photo_max_pixels
+            and (size.file_size or 0) <= self.photo_max_file_size
+        ]
+        if not allowed:
+            return None
+        
+        allowed.sort(key=lambda size: size.width * size.height)
+        for size in allowed:
+            if max(size.width, size.height) >= self.photo_max_side:
+                return size
+        return allowed[-1]
+    
+    def _send_cached_photo(self, chat_id: int, source: dict, cache_key: str) -> bool:
+        """Отправка результата из кэша по file_id (False - результата нет)"""
+        cached = self.media_cache.get(cache_key)
+        if not cached:
+            return False
+        
+        preset = cache_key.split(":", 1)[0]
+        try:
+            sent = self.bot.send_photo(
+                chat_id,
+                cached.file_id,
+                caption=cached.text,
+                parse_mode='Markdown',
+                reply_markup=self._photo_operations_keyboard(preset)
+            )
+            self.photo_sessions.set((chat_id, sent.message_id), source)
+            return True
+        except Exception as e:
+            # file_id мог стать недействительным (например, после смены токена бота)
+            logger.warning(f"Cached photo send error: {e}")
+            self.media_cache.invalidate(cache_key)
+            return False
+    
+    def _photo_caption(self, preset: str, result: dict) -> str:
+        """Подпись к обработанному фото"""
+        original_width, original_height = result['original_size']
+        width, height = result['size']
+        size_line = f"📐 **Размер:** {original_width}×{original_height} → {width}×{height}\n"
+        
+        if preset == 'enhance':
+            return (
+                "✅ **Фото обработано!**\n\n"
+                + size_line +
+                "✨ **Улучшения:**\n"
+                "• Повышена резкость\n"
+                "• Улучшен контраст\n"
+                "• Оптимизирована яркость\n"
+                "• Усилена цветопередача\n"
+                "• Уменьшены шумы\n\n"
+                "💡 *Изображение оптимизировано для лучшего качества*"
+            )
+        
+        return f"✅ **Готово:** {self.PHOTO_PRESETS[preset][0]}\n\n" + size_line
+    
+    def _send_processed_photo(self, chat_id: int, status: Message, source: dict, preset: str,
+                              original: bytes, result: Optional[dict], cache_key: str):
+        """Отправка результата обработки (вызывается из очереди)"""
+        try:
+            if result:
+                caption = self._photo_caption(preset, result)
                 
-                # Формируем информативное сообщение
-                caption = (
-                    "✅ **Фото обработано!**\n\n"
-                    f"📐 **Размер:** {original_info.get('width', '?')}×{original_info.get('height', '?')} → "
-                    f"{processed_info.get('width', '?')}×{processed_info.get('height', '?')}\n"
-                    "✨ **Улучшения:**\n"
-                    "• Повышена резкость\n"
-                    "• Улучшен контраст\n"
-                    "• Оптимизирована яркость\n"
-                    "• Усилена цветопередача\n"
-                    "• Уменьшены шумы\n\n"
-                    "💡 *Изображение оптимизировано для лучшего качества*"
+                # Отправка обработанного фото прямо из памяти
+                sent = self.bot.send_photo(
+                    chat_id,
+                    io.BytesIO(result['data']),
+                    caption=caption,
+                    parse_mode='Markdown',
+                    reply_markup=self._photo_operations_keyboard(preset)
                 )
                 
-                # Отправка обработанного фото
-                with open(processed_image_path, 'rb') as photo:
-                    self.bot.send_photo(
-                        message.chat.id,
-                        photo,
-                        caption=caption,
-                        parse_mode='Markdown'
-                    )
+                # Кнопки под результатом работают с тем же исходным фото
+                self.photo_sessions.set((chat_id, sent.message_id), source)
                 
-                # Очистка временных файлов
-                try:
-                    if Path(processed_image_path).exists():
-                        Path(processed_image_path).unlink()
-                except Exception as e:
-                    logger.warning(f"Could not delete processed image: {e}")
+                # Telegram хранит загруженное фото: повторно его можно отправить по file_id
+                if sent.photo:
+                    self.media_cache.put(cache_key, MediaCache.PHOTO, file_id=sent.photo[-1].file_id, text=caption)
                 
             else:
                 # Если обработка не удалась, отправляем исходное фото
-                with open(temp_file, 'rb') as photo:
-                    self.bot.send_photo(
-                        message.chat.id,
-                        photo,
-                        caption="📸 **Фото получено!**\n\n"
-                               "❌ *Не удалось обработать изображение*\n"
-                               "💡 *Попробуйте отправить другое фото*",
-                        parse_mode='Markdown'
-                    )
+                self.bot.send_photo(
+                    chat_id,
+                    io.BytesIO(original),
+                    caption="📸 **Фото получено!**\n\n"
+                           "❌ *Не удалось обработать изображение*\n"
+                           "💡 *Попробуйте отправить другое фото*",
+                    parse_mode='Markdown'
+                )
             
-            # Очистка исходного файла
-            try:
-                temp_file.unlink(missing_ok=True)
-            except Exception as e:
-                logger.warning(f"Could not delete temp file: {e}")
+            self._delete_status(status)
         
         except Exception as e:
-            logger.error(f"Photo processing error: {e}")
+            logger.error(f"Photo sending error: {e}")
             self.bot.send_message(
-                message.chat.id,
+                chat_id,
                 "❌ Ошибка обработки фото. Попробуйте еще раз.",
                 reply_markup=self.keyboards.main_menu()
-            )
\ No newline at end of file
+            )
+    
+    def _send_photo_error(self, status: Message, error: BaseException):
+        """Сообщение о неудачной, отмененной или слишком долгой обработке"""
+        if isinstance(error, CancelledError):
+            self._edit_status(status, "❌ Обработка фото отменена")
+        elif isinstance(error, TimeoutError):
+            self._edit_status(status, "⌛ Обработка фото заняла слишком много времени. Попробуйте фото поменьше.")
+        else:
+            logger.error(f"Photo processing error: {error}")
+            self._edit_status(status, "❌ Ошибка обработки фото. Попробуйте еще раз.")
+    
+    def _edit_status(self, status: Message, text: str, reply_markup=None):
+        """Обновление статусного сообщения"""
+        try:
+            self.bot.edit_message_text(
+                text,
+                status.chat.id,
+                status.message_id,
+                reply_markup=reply_markup
+            )
+        except Exception as e:
+            logger.warning(f"Could not edit status message: {e}")
+    
+    def _delete_status(self, status: Message):
+        """Удаление статусного сообщения после отправки результата"""
+        try:
+            self.bot.delete_message(status.chat.id, status.message_id)
+        except Exception as e:
+            logger.warning(f"Could not delete status message: {e}")
+    
+    @handle_errors
+    def handle_callback_query(self, call: CallbackQuery):
+        """Обработка callback запросов для фото"""
+        data = call.data
+        
+        if data.startswith("cancel_image_"):
+            job_id = data[len("cancel_image_"):]
+            if self.image_queue.cancel(job_id, user_id=call.message.chat.id):
+                self.bot.answer_callback_query(call.id, "Обработка отменена")
+            else:
+                self.bot.answer_callback_query(call.id, "Фото уже обработано")
+        
+        elif data.startswith("cancel_transcribe_"):
+            job_id = data[len("cancel_transcribe_"):]
+            if any(queue.cancel(job_id, user_id=call.message.chat.id)
+                   for queue in (self.transcription_queue, self.long_transcription_queue)):
+                self.bot.answer_callback_query(call.id, "Распознавание отменено")
+            else:
+                self.bot.answer_callback_query(call.id, "Сообщение уже распознается")
+        
+        elif data.startswith("photo_op_"):
+            preset = data[len("photo_op_"):]
+            source = self.photo_sessions.get((call.message.chat.id, call.message.message_id))
+            if preset not in self.PHOTO_PRESETS or source is None:
+                self.bot.answer_callback_query(call.id, "Фото устарело, отправьте его еще раз")
+                return
+            
+            self.bot.answer_callback_query(call.id, self.PHOTO_PRESETS[preset][0])
+            self._run_photo_preset(call.message.chat.id, source, preset)
@@ -2,20 +2,24 @@ from telebot import TeleBot
 from telebot.types import Message
 from database.operations import DatabaseManager
 from services.weather_api import WeatherService
+from services.geocoder import ReverseGeocoder
 from utils.keyboards import KeyboardManager
 from database.models import WeatherSubscription
 from datetime import datetime
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
 class WeatherHandler:
     """Обработчик погоды"""
-    def __init__(self, bot: TeleBot, db: DatabaseManager, weather_service: WeatherService, keyboards: KeyboardManager):
+    def __init__(self, bot: TeleBot, db: DatabaseManager, weather_service: WeatherService, keyboards: KeyboardManager,
+                 geocoder: Optional[ReverseGeocoder] = None):
         self.bot = bot
         self.db = db
         self.weather_service = weather_service
         self.keyboards = keyboards
+        self.geocoder = geocoder
     
     def register_handlers(self):
         """Регистрация всех обработчиков"""
@@ -143,12 +147,24 @@ class WeatherHandler:
     
     def _get_city_name(self, lat: float, lon: float) -> str:
         """Получение названия города по координатам"""
-        # Реализация через OpenStreetMap
-        return "Вашем городе"  # Упрощенная реализация
+        # Офлайн-поиск по встроенному набору городов, без сетевых запросов
+        if self.geocoder:
+            try:
+                return self.geocoder.city_name(lat, lon)
+            except Exception as e:
+                logger.error(f"Reverse geocoding error: {e}")
+        return "Вашем городе"
     
     def _format_weather_response(self, weather_data: dict) -> str:
         """Форматирование данных о погоде в текст"""
         try:
+            if not weather_data.get('available', True):
+                return (
+                    "⚠️ **Данные о погоде временно недоступны**\n\n"
+                    "Сервис погоды не отвечает. Попробуйте через несколько минут.\n\n"
+                    "💡 *Локация сохранена для уведомлений!*"
+                )
+            
             # Получаем значения из словаря с защитой от отсутствующих ключей
             city = weather_data.get('city', 'Неизвестно')
             temperature = weather_data.get('temperature', 'N/A')
@@ -163,6 +179,14 @@ class WeatherHandler:
             if description and ' ' in description:
                 icon = description.split(' ')[0]  # Берем первый эмодзи из описания
             
+            # Пометка, если API недоступен и показаны сохраненные данные
+            stale_note = ""
+            if weather_data.get('stale') and weather_data.get('updated_at'):
+                stale_note = (
+                    f"🕐 *Данные на {weather_data['updated_at'].strftime('%H:%M')}: "
+                    f"сервис погоды временно недоступен*\n\n"
+                )
+            
             return (
                 f"{icon} **Погода в {city}:**\n\n"
                 f"• 🌡 **Температура:** {temperature}°C\n"
@@ -171,6 +195,7 @@ class WeatherHandler:
                 f"• 📈 **Давление:** {pressure} гПа\n"
                 f"• 🌬 **Ветер:** {wind_speed} м/с\n"
                 f"• 📝 **Описание:** {description}\n\n"
+                f"{stale_note}"
                 f"💡 *Локация сохранена для уведомлений!*"
             )
             
@@ -53,18 +53,68 @@ except ImportError as e:
         def __init__(self):
             self.BOT_TOKEN = os.getenv('BOT_TOKEN')
             self.WEATHER_API_URL = os.getenv('WEATHER_API_URL', 'https://api.open-meteo.com/v1/forecast')
+            self.TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+            self.QUOTES_BASE_URL = os.getenv('QUOTES_BASE_URL')
+            self.QUOTES_REFRESH_INTERVAL = 6 * 3600
+            self.QUOTES_PAGES_PER_REFRESH = 5
             self.DATABASE_CONFIG = {'database': ':memory:'}
             self.VOICE_FILES_DIR = 'temp_voice_files'
             self.PHOTO_FILES_DIR = 'temp_photo_files'
             self.MAX_NOTE_LENGTH = 4000
             self.MAX_HABIT_NAME_LENGTH = 100
+            self.GEOCODER_MAX_DISTANCE_KM = 100
+            self.WEATHER_TIMEOUT = 5
+            self.WEATHER_MAX_CONCURRENT = 4
+            self.METRICS_PORT = int(os.getenv('METRICS_PORT', 0)) or None
+            self.IMAGE_WORKERS = None
+            self.IMAGE_QUEUE_LIMIT = 20
+            self.IMAGE_JOB_TIMEOUT = 60
+            self.PHOTO_MAX_SIDE = 1280
+            self.PHOTO_MAX_PIXELS = 40_000_000
+            self.PHOTO_MAX_FILE_SIZE = 20 * 1024 * 1024
+            self.DOCUMENT_MAX_PIXELS = 100_000_000
+            self.MEDIA_CACHE_MEMORY_SIZE = 500
+            self.FFMPEG_BINARY = os.getenv('FFMPEG_BINARY')
+            self.SPEECH_PARALLEL_CHUNKS = 4
+            self.SPEECH_BACKEND = os.getenv('SPEECH_BACKEND', 'google')
+            self.SPEECH_MODEL_PATH = os.getenv('SPEECH_MODEL_PATH')
+            self.SPEECH_REQUEST_TIMEOUT = 15
+            self.TRANSCRIBE_WORKERS = 2
+            self.TRANSCRIBE_QUEUE_LIMIT = 20
+            self.TRANSCRIBE_JOB_TIMEOUT = 120
+            self.TRANSCRIBE_PER_USER = 1
+            self.TRANSCRIBE_USER_QUEUE_LIMIT = 5
+            self.TRANSCRIBE_LONG_WORKERS = 1
+            self.TRANSCRIBE_LONG_JOB_TIMEOUT = 900
+            self.AUDIO_MAX_DURATION = 900
+            self.AUDIO_MAX_FILE_SIZE = 20 * 1024 * 1024
+            self.AUDIO_LONG_DURATION = 120
+            self.TEMP_DIR = os.getenv('TEMP_DIR')
+            self.TEMP_SPOOL_SIZE = 8 * 1024 * 1024
+            self.TEMP_MAX_DISK_MB = 512
+            self.TEMP_MAX_AGE = 3600
+            self.TEMP_JANITOR_INTERVAL = 300
+            self.MEDIA_CACHE_MAX_ENTRIES = 10000
+            self.QR_CACHE_SIZE = 256
+            self.QR_BULK_WORKERS = None
+            self.QR_BULK_MAX_ROWS = 1000
+            self.QR_BULK_MAX_FILE_SIZE = 1024 * 1024
+            self.QR_BULK_FORMAT = 'png'
+            self.PHOTO_WATERMARK_TEXT = 'tgbot'
+            self.PHOTO_SESSION_CACHE_SIZE = 32
+            self.PHOTO_SESSION_TTL = 600
+            self.MEDIA_GROUP_WINDOW = 1.0
+            self.PHOTO_OUTPUT_FORMAT = 'JPEG'
+            self.PHOTO_QUALITY = 85
+            self.PHOTO_MAX_BYTES = None
+            self.PHOTO_MIN_PSNR = None
     
     config = FallbackConfig()
     logger.info("🔧 Используется fallback конфигурация")
 
 # Попытка импорта основных модулей
 try:
-    from telebot import TeleBot
+    from telebot import TeleBot, apihelper
     
     # Импортируем обработчики с обработкой ошибок
     from handlers.base import StartHandler, HelpHandler
@@ -77,6 +127,12 @@ try:
 
     # Базовые сервисы
     from utils.keyboards import KeyboardManager
+    from utils.metrics import start_metrics_server
+    from services.temp_storage import temp_storage
+    from services.qr_generator import qr_service
+    from services.qr_bulk import QRBulkGenerator
+    from services.quote_store import QuoteStore
+    from services.quote_rotation import QuoteRotation
     
     # Опциональные модули
     try:
@@ -93,6 +149,13 @@ try:
         logger.warning(f"⚠️ WeatherService недоступен: {e}")
         WEATHER_SERVICE_AVAILABLE = False
         
+    try:
+        from services.geocoder import ReverseGeocoder
+        GEOCODER_AVAILABLE = True
+    except ImportError as e:
+        logger.warning(f"⚠️ ReverseGeocoder недоступен: {e}")
+        GEOCODER_AVAILABLE = False
+
     try:
         from services.scheduler import start_scheduler
         SCHEDULER_AVAILABLE = True
@@ -103,6 +166,8 @@ try:
     # VoicePhotoHandler может быть опциональным
     try:
         from handlers.voice_photo import VoicePhotoHandler
+        from services.job_queue import create_process_queue, create_thread_queue
+        from services.media_cache import MediaCache
         VOICE_PHOTO_AVAILABLE = True
     except ImportError as e:
         logger.warning(f"⚠️ VoicePhotoHandler недоступен: {e}")
@@ -124,8 +189,15 @@ class BotManager:
         self.db: Optional[DatabaseManager] = None
         self.keyboards: Optional[KeyboardManager] = None
         self.weather_service: Optional[WeatherService] = None
+        self.geocoder = None
         self.handlers: List = []
         self.scheduler = None
+        self.image_queue = None
+        self.transcription_queue = None
+        self.long_transcription_queue = None
+        self.qr_bulk = None
+        self.quote_store = None
+        self.quote_rotation = None
         self._shutdown_requested = False
 
     def _signal_handler(self, signum, frame):
@@ -158,6 +230,21 @@ class BotManager:
             logger.error(f"❌ Ошибка проверки конфигурации: {e}")
             return False
 
+    def _configure_endpoints(self):
+        """Настройка адресов Telegram Bot API и сайта цитат"""
+        telegram_api_url = getattr(config, 'TELEGRAM_API_URL', None)
+        if telegram_api_url:
+            base_url = telegram_api_url.rstrip('/')
+            apihelper.API_URL = base_url + "/bot{0}/{1}"
+            apihelper.FILE_URL = base_url + "/file/bot{0}/{1}"
+            logger.info(f"🔧 Telegram Bot API: {base_url}")
+
+        quotes_base_url = getattr(config, 'QUOTES_BASE_URL', None)
+        if quotes_base_url:
+            from services.quote_parser import QuoteParser
+            QuoteParser.BASE_URL = quotes_base_url
+            logger.info(f"🔧 Источник цитат: {quotes_base_url}")
+
     def initialize(self):
         """Инициализация всех компонентов бота"""
         try:
@@ -172,6 +259,9 @@ class BotManager:
             # Настройка обработчиков сигналов
             self._setup_signal_handlers()
 
+            # Альтернативные адреса внешних сервисов (например, локальные заглушки)
+            self._configure_endpoints()
+
             # Инициализация основных компонентов
             self.bot = TeleBot(config.BOT_TOKEN)
             self.keyboards = KeyboardManager()
@@ -184,11 +274,44 @@ class BotManager:
                 logger.info("⚠️ База данных недоступна")
 
             if WEATHER_SERVICE_AVAILABLE:
-                self.weather_service = WeatherService(config.WEATHER_API_URL)
+                self.weather_service = WeatherService(
+                    config.WEATHER_API_URL,
+                    timeout=getattr(config, 'WEATHER_TIMEOUT', 5),
+                    max_concurrent=getattr(config, 'WEATHER_MAX_CONCURRENT', 4)
+                )
                 logger.info("✅ Погодный сервис инициализирован")
             else:
                 logger.info("⚠️ Погодный сервис недоступен")
 
+            if GEOCODER_AVAILABLE:
+                try:
+                    self.geocoder = ReverseGeocoder(
+                        max_distance_km=getattr(config, 'GEOCODER_MAX_DISTANCE_KM', 100)
+                    )
+                    logger.info("✅ Офлайн-геокодер инициализирован")
+                except Exception as e:
+                    logger.warning(f"⚠️ Не удалось загрузить набор городов: {e}")
+
+            metrics_port = getattr(config, 'METRICS_PORT', None)
+            if metrics_port:
+                start_metrics_server(metrics_port)
+
+            temp_storage.configure(
+                root=getattr(config, 'TEMP_DIR', None),
+                spool_size=getattr(config, 'TEMP_SPOOL_SIZE', 8 * 1024 * 1024),
+                max_disk_bytes=getattr(config, 'TEMP_MAX_DISK_MB', 512) * 1024 * 1024,
+                max_age=getattr(config, 'TEMP_MAX_AGE', 3600)
+            )
+            temp_storage.start_janitor(getattr(config, 'TEMP_JANITOR_INTERVAL', 300))
+
+            # Цитаты собираются в фоне, кнопка берет их из локального корпуса
+            self.quote_store = QuoteStore(
+                self.db, pages_per_refresh=getattr(config, 'QUOTES_PAGES_PER_REFRESH', 5)
+            )
+            self.quote_store.start_refresher(getattr(config, 'QUOTES_REFRESH_INTERVAL', 6 * 3600))
+            self.quote_rotation = QuoteRotation(self.quote_store, self.db)
+            qr_service.configure(getattr(config, 'QR_CACHE_SIZE', 256))
+
             logger.info("✅ Основные компоненты инициализированы")
 
             # Инициализация обработчиков
@@ -196,7 +319,9 @@ class BotManager:
 
             # Запуск планировщика если доступен
             if SCHEDULER_AVAILABLE and self.db and self.weather_service:
-                self.scheduler = start_scheduler(self.bot, self.db, self.weather_service)
+                self.scheduler = start_scheduler(
+                    self.bot, self.db, self.weather_service, quote_rotation=self.quote_rotation
+                )
                 logger.info("✅ Планировщик запущен")
             else:
                 logger.info("⚠️ Планировщик недоступен")
@@ -210,12 +335,24 @@ class BotManager:
     def _initialize_handlers(self):
         """Инициализация всех обработчиков"""
         try:
+            self.qr_bulk = QRBulkGenerator(
+                workers=getattr(config, 'QR_BULK_WORKERS', None),
+                max_rows=getattr(config, 'QR_BULK_MAX_ROWS', 1000),
+                output_format=getattr(config, 'QR_BULK_FORMAT', 'png')
+            )
+
             # Базовые обработчики (обязательные)
             self.handlers = [
                 StartHandler(self.bot, self.db, self.keyboards),
-                HelpHandler(self.bot, self.db, self.keyboards),
+                HelpHandler(
+                    self.bot, self.db, self.keyboards,
+                    qr_bulk=self.qr_bulk,
+                    quote_rotation=self.quote_rotation,
+                    qr_bulk_max_file_size=getattr(config, 'QR_BULK_MAX_FILE_SIZE', 1024 * 1024)
+                ),
                 WeatherHandler(
-                    self.bot, self.db, self.weather_service, self.keyboards
+                    self.bot, self.db, self.weather_service, self.keyboards,
+                    geocoder=self.geocoder
                 ),
                 FinanceHandler(self.bot, self.db, self.keyboards),
                 NotesHandler(self.bot, self.db, self.keyboards),
@@ -226,8 +363,62 @@ class BotManager:
 
             # Опциональные обработчики
             if VOICE_PHOTO_AVAILABLE:
+                self.image_queue = create_process_queue(
+                    "images",
+                    workers=getattr(config, 'IMAGE_WORKERS', None),
+                    max_queue=getattr(config, 'IMAGE_QUEUE_LIMIT', 20),
+                    job_timeout=getattr(config, 'IMAGE_JOB_TIMEOUT', 60)
+                )
+                self.transcription_queue = create_thread_queue(
+                    "transcription",
+                    workers=getattr(config, 'TRANSCRIBE_WORKERS', 2),
+                    max_queue=getattr(config, 'TRANSCRIBE_QUEUE_LIMIT', 20),
+                    job_timeout=getattr(config, 'TRANSCRIBE_JOB_TIMEOUT', 120),
+                    max_per_user=getattr(config, 'TRANSCRIBE_PER_USER', 1),
+                    max_waiting_per_user=getattr(config, 'TRANSCRIBE_USER_QUEUE_LIMIT', 5)
+                )
+                self.long_transcription_queue = create_thread_queue(
+                    "transcription-long",
+                    workers=getattr(config, 'TRANSCRIBE_LONG_WORKERS', 1),
+                    max_queue=getattr(config, 'TRANSCRIBE_QUEUE_LIMIT', 20),
+                    job_timeout=getattr(config, 'TRANSCRIBE_LONG_JOB_TIMEOUT', 900),
+                    max_per_user=1,
+                    max_waiting_per_user=getattr(config, 'TRANSCRIBE_USER_QUEUE_LIMIT', 5)
+                )
                 self.handlers.append(
-                    VoicePhotoHandler(self.bot, self.db, self.keyboards)
+                    VoicePhotoHandler(
+                        self.bot, self.db, self.keyboards,
+                        image_queue=self.image_queue,
+                        transcription_queue=self.transcription_queue,
+                        long_transcription_queue=self.long_transcription_queue,
+                        audio_max_duration=getattr(config, 'AUDIO_MAX_DURATION', 900),
+                        audio_max_file_size=getattr(config, 'AUDIO_MAX_FILE_SIZE', 20 * 1024 * 1024),
+                        audio_long_duration=getattr(config, 'AUDIO_LONG_DURATION', 120),
+                        photo_max_side=getattr(config, 'PHOTO_MAX_SIDE', 1280),
+                        photo_max_pixels=getattr(config, 'PHOTO_MAX_PIXELS', 40_000_000),
+                        photo_max_file_size=getattr(config, 'PHOTO_MAX_FILE_SIZE', 20 * 1024 * 1024),
+                        media_cache=MediaCache(
+                            self.db,
+                            memory_size=getattr(config, 'MEDIA_CACHE_MEMORY_SIZE', 500),
+                            max_entries=getattr(config, 'MEDIA_CACHE_MAX_ENTRIES', 10000)
+                        ),
+                        photo_watermark=getattr(config, 'PHOTO_WATERMARK_TEXT', 'tgbot'),
+                        photo_session_size=getattr(config, 'PHOTO_SESSION_CACHE_SIZE', 32),
+                        photo_session_ttl=getattr(config, 'PHOTO_SESSION_TTL', 600),
+                        media_group_window=getattr(config, 'MEDIA_GROUP_WINDOW', 1.0),
+                        document_max_pixels=getattr(config, 'DOCUMENT_MAX_PIXELS', 100_000_000),
+                        ffmpeg_binary=getattr(config, 'FFMPEG_BINARY', None),
+                        speech_parallel_chunks=getattr(config, 'SPEECH_PARALLEL_CHUNKS', 4),
+                        speech_backend=getattr(config, 'SPEECH_BACKEND', 'google'),
+                        speech_model_path=getattr(config, 'SPEECH_MODEL_PATH', None),
+                        speech_request_timeout=getattr(config, 'SPEECH_REQUEST_TIMEOUT', 15),
+                        photo_encoding={
+                            'format': getattr(config, 'PHOTO_OUTPUT_FORMAT', 'JPEG'),
+                            'quality': getattr(config, 'PHOTO_QUALITY', 85),
+                            'max_bytes': getattr(config, 'PHOTO_MAX_BYTES', None),
+                            'min_psnr': getattr(config, 'PHOTO_MIN_PSNR', None)
+                        }
+                    )
                 )
                 logger.info("✅ VoicePhotoHandler загружен")
             else:
@@ -277,6 +468,7 @@ class BotManager:
             logger.info(f"   🎯 Обработчиков: {len(self.handlers)}")
             logger.info(f"   💾 База данных: {'✅' if DATABASE_AVAILABLE else '❌'}")
             logger.info(f"   🌤️ Погодный сервис: {'✅' if WEATHER_SERVICE_AVAILABLE else '❌'}")
+            logger.info(f"   🗺 Геокодер: {'✅' if self.geocoder else '❌'}")
             logger.info(f"   📅 Планировщик: {'✅' if SCHEDULER_AVAILABLE else '❌'}")
             logger.info(f"   🎤 Голос/Фото: {'✅' if VOICE_PHOTO_AVAILABLE else '❌'}")
             logger.info(f"   📦 Версия: {BOT_VERSION}")
@@ -311,6 +503,25 @@ class BotManager:
                 self.scheduler.stop()
                 logger.info("✅ Планировщик остановлен")
 
+            if self.image_queue:
+                self.image_queue.shutdown()
+                logger.info("✅ Очередь обработки фото остановлена")
+
+            if self.transcription_queue:
+                self.transcription_queue.shutdown()
+                logger.info("✅ Очередь распознавания речи остановлена")
+
+            if self.long_transcription_queue:
+                self.long_transcription_queue.shutdown()
+
+            if self.qr_bulk:
+                self.qr_bulk.shutdown()
+
+            temp_storage.stop_janitor()
+
+            if self.quote_store:
+                self.quote_store.stop_refresher()
+
             if self.bot:
                 # Останавливаем polling в отдельном потоке, чтобы избежать блокировки
                 import threading
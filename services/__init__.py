@@ -1,5 +1,6 @@
 # Инициализация пакета services
 from .weather_api import WeatherService
+from .geocoder import ReverseGeocoder
 from .qr_generator import QRCodeService
 from .scheduler import start_scheduler
 from .image_processor import ImageProcessor
@@ -7,6 +8,7 @@ from .voice_recognizer import VoiceRecognizer
 
 __all__ = [
     'WeatherService',
+    'ReverseGeocoder',
     'QRCodeService', 
     'start_scheduler',
     'ImageProcessor',
@@ -0,0 +1,201 @@
+import struct
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Битрейты MPEG (кбит/с) по индексу: [версия 1][слой], [версия 2/2.5][слой]
+MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+# Сколько байт после тега ID3 просматривается в поисках первого кадра
+MP3_SYNC_WINDOW = 64 * 1024
+# Сколько байт начала и конца файла скачивать для проверки по заголовкам:
+# страница Ogg не длиннее 65307 байт, так что в конце целиком есть последняя
+PROBE_HEAD_BYTES = 64 * 1024
+PROBE_TAIL_BYTES = 64 * 1024
+
+
+class AudioLimitError(Exception):
+    """Запись превышает допустимую длительность или размер"""
+
+
+def probe_duration(data: bytes, total_size: Optional[int] = None, tail: bytes = b"") -> Optional[float]:
+    """Длительность записи в секундах по заголовкам контейнера, без декодирования
+
+    Поддерживаются WAV, Ogg (Opus, Vorbis), MP3, FLAC и M4A. Для Ogg нужен
+    конец файла (позиция последней страницы), для остальных достаточно
+    начала; total_size - полный размер файла, если data - только его начало,
+    tail - последние PROBE_TAIL_BYTES файла в этом случае.
+    MP3 распознается только по тегу ID3 или кадру в самом начале файла.
+    None - формат не распознан или заголовки повреждены.
+    """
+    total_size = total_size or len(data)
+    try:
+        if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+            return _probe_wav(data, total_size)
+        if data[:4] == b"OggS":
+            if not tail and total_size > len(data):
+                # Последняя страница в начале файла - не конец записи
+                return None
+            return _probe_ogg(data, tail or data)
+        if data[:4] == b"fLaC":
+            return _probe_flac(data)
+        if data[4:8] == b"ftyp":
+            return _probe_mp4(data)
+        if data[:3] == b"ID3" or _is_mp3_sync(data, 0):
+            return _probe_mp3(data, total_size)
+        return None
+    except (struct.error, IndexError, ValueError, ZeroDivisionError) as e:
+        logger.debug(f"Audio probe failed: {e}")
+        return None
+
+
+def _probe_wav(data: bytes, total_size: int) -> Optional[float]:
+    offset = 12
+    byte_rate = None
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        size = struct.unpack_from("<I", data, offset + 4)[0]
+        if chunk_id == b"fmt ":
+            byte_rate = struct.unpack_from("<I", data, offset + 16)[0]
+        elif chunk_id == b"data" and byte_rate:
+            # Размер 0xFFFFFFFF пишут при записи потоком - считаем по размеру файла
+            if size == 0xFFFFFFFF or size == 0:
+                size = total_size - offset - 8
+            return size / byte_rate
+        offset += 8 + size + (size & 1)
+    return None
+
+
+def _probe_ogg(data: bytes, end: bytes) -> Optional[float]:
+    # Частота из заголовка кодека в первой странице
+    if b"OpusHead" in data[:512]:
+        head = data.index(b"OpusHead")
+        pre_skip = struct.unpack_from("<H", data, head + 10)[0]
+        sample_rate = 48000
+    elif b"\x01vorbis" in data[:512]:
+        head = data.index(b"\x01vorbis")
+        pre_skip = 0
+        sample_rate = struct.unpack_from("<I", data, head + 12)[0]
+    else:
+        return None
+
+    # Позиция (granule) последней страницы - число отсчетов от начала
+    last_page = end.rfind(b"OggS")
+    granule = struct.unpack_from("<q", end, last_page + 6)[0]
+    if granule <= 0:
+        return None
+    return max(granule - pre_skip, 0) / sample_rate
+
+
+def _probe_flac(data: bytes) -> Optional[float]:
+    # STREAMINFO - первый блок метаданных: 20 бит частоты и 36 бит числа отсчетов
+    info = data[8:26]
+    sample_rate = (info[10] << 12) | (info[11] << 4) | (info[12] >> 4)
+    total_samples = ((info[13] & 0x0F) << 32) | struct.unpack_from(">I", info, 14)[0]
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def _probe_mp4(data: bytes) -> Optional[float]:
+    # mvhd: версия 0 - 32-битные timescale/duration, версия 1 - 64-битная длительность
+    position = data.find(b"mvhd")
+    if position < 0:
+        return None
+    version = data[position + 4]
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, position + 24)
+    else:
+        timescale, duration = struct.unpack_from(">II", data, position + 16)
+    return duration / timescale if timescale else None
+
+
+def _is_mp3_sync(data: bytes, offset: int) -> bool:
+    """Синхрослово кадра MPEG (11 единичных бит) в позиции offset"""
+    return offset + 4 <= len(data) and data[offset] == 0xFF and data[offset + 1] & 0xE0 == 0xE0
+
+
+def _parse_mp3_header(data: bytes, offset: int) -> Optional[tuple]:
+    """Поля заголовка кадра: (версия MPEG, слой, индекс битрейта, частота, моно, длина кадра)"""
+    if not _is_mp3_sync(data, offset):
+        return None
+    header = struct.unpack_from(">I", data, offset)[0]
+    version_bits = (header >> 19) & 0x3
+    layer = 4 - ((header >> 17) & 0x3)
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 0x3
+    if version_bits == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    version = 1 if version_bits == 3 else 2
+    sample_rate = MP3_SAMPLE_RATES[version_bits][rate_index]
+    mono = (header >> 6) & 0x3 == 3
+    padding = (header >> 9) & 0x1
+    bitrate = MP3_BITRATES[(version, layer)][bitrate_index] * 1000
+    if layer == 1:
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version == 2:
+        frame_length = 72 * bitrate // sample_rate + padding
+    else:
+        frame_length = 144 * bitrate // sample_rate + padding
+    return version, layer, bitrate_index, sample_rate, mono, frame_length
+
+
+def _find_mp3_frame(data: bytes, offset: int) -> Optional[tuple]:
+    """Первый кадр не дальше MP3_SYNC_WINDOW от offset, подтвержденный заголовком следующего кадра
+
+    Одиночное синхрослово легко встретить в случайных данных, поэтому кадр
+    принимается, только если через его длину начинается кадр с той же
+    версией, слоем и частотой.
+    """
+    limit = min(len(data), offset + MP3_SYNC_WINDOW)
+    while True:
+        offset = data.find(b"\xff", offset, limit)
+        if offset < 0:
+            return None
+        frame = _parse_mp3_header(data, offset)
+        if frame:
+            following = _parse_mp3_header(data, offset + frame[5])
+            if following and following[:2] == frame[:2] and following[3] == frame[3]:
+                return (offset,) + frame
+        offset += 1
+
+
+def _probe_mp3(data: bytes, total_size: int) -> Optional[float]:
+    offset = 0
+    if data[:3] == b"ID3":
+        # Размер тега ID3v2 - synchsafe целое (по 7 бит в байте), флаг 0x10 - еще 10 байт футера
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        offset = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    frame = _find_mp3_frame(data, offset)
+    if frame is None:
+        return None
+    offset, version, layer, bitrate_index, sample_rate, mono, _ = frame
+    samples_per_frame = 384 if layer == 1 else (1152 if layer == 2 or version == 1 else 576)
+
+    # Заголовок Xing/Info (VBR) с числом кадров - точная длительность
+    side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+    xing = offset + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack_from(">I", data, xing + 4)[0]
+        if flags & 1:
+            frames = struct.unpack_from(">I", data, xing + 8)[0]
+            return frames * samples_per_frame / sample_rate
+
+    # VBRI (кодировщик Fraunhofer) - 32 байта после заголовка кадра
+    vbri = offset + 36
+    if data[vbri:vbri + 4] == b"VBRI":
+        frames = struct.unpack_from(">I", data, vbri + 14)[0]
+        return frames * samples_per_frame / sample_rate
+
+    # Постоянный битрейт: размер аудиоданных / битрейт
+    bitrate = MP3_BITRATES[(version, layer)][bitrate_index] * 1000
+    return (total_size - offset) * 8 / bitrate
@@ -0,0 +1,169 @@
+import array
+import math
+import logging
+import operator
+from typing import List, NamedTuple, Tuple
+
+from PIL import Image, ImageMath
+
+logger = logging.getLogger(__name__)
+
+# Кадры тише этого уровня (около -50 dBFS для 16 бит) - тишина при любой записи
+SILENCE_RMS = 100
+
+
+class AudioChunk(NamedTuple):
+    """Фрагмент PCM: границы в байтах и признак тишины"""
+    start: int
+    end: int
+    silent: bool
+
+
+def frame_rms(frame: bytes, sample_width: int = 2) -> int:
+    """Среднеквадратичная амплитуда кадра 16-битного PCM"""
+    samples = array.array('h', frame)
+    if not samples:
+        return 0
+    return int(math.sqrt(sum(map(operator.mul, samples, samples)) / len(samples)))
+
+
+def frame_energies(pcm: bytes, frame_bytes: int, sample_width: int = 2) -> List[int]:
+    """Среднеквадратичная амплитуда каждого кадра 16-битного PCM за один проход по буферу
+
+    Полные кадры укладываются строками изображения Pillow (отсчеты - 32-битные
+    числа): квадраты и среднее по строке считаются в C для всего буфера сразу,
+    без цикла по отсчетам в Python. Неполный последний кадр считается отдельно.
+    """
+    if sample_width != 2:
+        raise ValueError(f"Only 16-bit PCM is supported, got sample width {sample_width}")
+    rows = len(pcm) // frame_bytes
+    energies = []
+    if rows:
+        samples = Image.frombytes(
+            'I', (frame_bytes // sample_width, rows), pcm[:rows * frame_bytes], 'raw', 'I;16S'
+        ).convert('F')
+        squares = ImageMath.lambda_eval(lambda args: args['a'] * args['a'], a=samples)
+        means = array.array('f', squares.reduce((squares.width, 1)).tobytes())
+        energies = [int(math.sqrt(mean)) for mean in means]
+    if len(pcm) > rows * frame_bytes:
+        energies.append(frame_rms(pcm[rows * frame_bytes:], sample_width))
+    return energies
+
+
+def _frame_levels(pcm: bytes, frame_bytes: int, sample_width: int) -> Tuple[List[int], List[bool]]:
+    """Громкость кадров и признак «громкий» (речь) для каждого кадра
+
+    Порог тишины подстраивается под запись: вдвое выше уровня шума (10-й
+    перцентиль громкости кадров), но в пределах от 3% до 50% самого громкого
+    кадра и не ниже SILENCE_RMS.
+    """
+    energies = frame_energies(pcm, frame_bytes, sample_width)
+    ordered = sorted(energies)
+    peak = ordered[-1]
+    threshold = max(min(max(ordered[len(ordered) // 10] * 2, peak * 0.03), peak * 0.5), SILENCE_RMS)
+    return energies, [energy >= threshold for energy in energies]
+
+
+def trim_silence(pcm: bytes, sample_rate: int = 16000, sample_width: int = 2, frame_ms: int = 30,
+                 padding_ms: int = 240, max_pause_ms: int = 600, min_speech_ms: int = 90) -> bytes:
+    """Детектор речи по энергии: удаление тишины перед распознаванием
+
+    Речь - серии громких кадров не короче min_speech_ms (одиночные щелчки
+    отбрасываются), расширенные на padding_ms в обе стороны, чтобы не
+    срезать тихие начала и окончания слов. Тишина в начале и в конце
+    удаляется целиком, паузы внутри сокращаются до max_pause_ms - этого
+    хватает split_on_silence для разбиения на фрагменты. Пустой результат -
+    в записи нет речи.
+    """
+    frame_bytes = int(sample_rate * frame_ms / 1000) * sample_width
+    if len(pcm) <= frame_bytes:
+        return pcm if pcm and frame_rms(pcm, sample_width) >= SILENCE_RMS else b""
+
+    _, loud = _frame_levels(pcm, frame_bytes, sample_width)
+    total = len(loud)
+
+    # Серии громких кадров достаточной длины, расширенные на padding
+    min_speech = max(1, min_speech_ms // frame_ms)
+    padding = padding_ms // frame_ms
+    keep = [False] * total
+    run_start = None
+    for index, is_loud in enumerate(loud + [False]):
+        if is_loud and run_start is None:
+            run_start = index
+        elif not is_loud and run_start is not None:
+            if index - run_start >= min_speech:
+                for frame in range(max(run_start - padding, 0), min(index + padding, total)):
+                    keep[frame] = True
+            run_start = None
+
+    max_pause = max(1, max_pause_ms // frame_ms)
+    kept = []
+    pause = 0
+    seen_speech = False
+    for index, is_kept in enumerate(keep):
+        if is_kept:
+            seen_speech = True
+            pause = 0
+        else:
+            pause += 1
+            # Тишина до первой речи и сверх max_pause выбрасывается
+            if not seen_speech or pause > max_pause:
+                continue
+        kept.append(pcm[index * frame_bytes:(index + 1) * frame_bytes])
+
+    # Хвост тишины после последней речи (в kept попало не больше max_pause его кадров)
+    if seen_speech and pause:
+        del kept[len(kept) - min(pause, max_pause):]
+    return b"".join(kept)
+
+
+def split_on_silence(pcm: bytes, sample_rate: int = 16000, sample_width: int = 2,
+                     frame_ms: int = 30, min_silence_ms: int = 300,
+                     min_chunk_s: float = 3.0, max_chunk_s: float = 20.0) -> List[AudioChunk]:
+    """Разбиение PCM на фрагменты по паузам
+
+    Фрагмент режется в середине последней паузы не короче min_silence_ms,
+    если она укладывается в max_chunk_s; если пауз нет - на самом тихом
+    кадре. Фрагменты без единого громкого кадра помечаются как тишина.
+    """
+    frame_bytes = int(sample_rate * frame_ms / 1000) * sample_width
+    if len(pcm) <= frame_bytes:
+        return [AudioChunk(0, len(pcm), frame_rms(pcm, sample_width) < SILENCE_RMS)] if pcm else []
+
+    energies, loud = _frame_levels(pcm, frame_bytes, sample_width)
+
+    # Середины пауз достаточной длины - кандидаты на разрез (в кадрах)
+    min_silence = max(1, min_silence_ms // frame_ms)
+    cut_points = []
+    run_start = None
+    for index, is_loud in enumerate(loud + [True]):
+        if not is_loud and run_start is None:
+            run_start = index
+        elif is_loud and run_start is not None:
+            if index - run_start >= min_silence:
+                cut_points.append((run_start + index) // 2)
+            run_start = None
+
+    min_frames = max(1, int(min_chunk_s * 1000 / frame_ms))
+    max_frames = max(min_frames, int(max_chunk_s * 1000 / frame_ms))
+    total = len(energies)
+    boundaries = [0]
+    while total - boundaries[-1] > max_frames:
+        start = boundaries[-1]
+        candidates = [point for point in cut_points if start + min_frames <= point <= start + max_frames]
+        if candidates:
+            cut = candidates[-1]
+        else:
+            window = range(start + min_frames, start + max_frames)
+            cut = min(window, key=lambda index: energies[index])
+        boundaries.append(cut)
+    boundaries.append(total)
+
+    chunks = []
+    for first, last in zip(boundaries, boundaries[1:]):
+        chunks.append(AudioChunk(
+            start=first * frame_bytes,
+            end=min(last * frame_bytes, len(pcm)),
+            silent=not any(loud[first:last])
+        ))
+    return chunks
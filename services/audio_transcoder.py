@@ -0,0 +1,96 @@
+import io
+import wave
+import shutil
+import logging
+import warnings
+import subprocess
+from typing import Optional
+
+with warnings.catch_warnings():
+    # audioop объявлен устаревшим в Python 3.11 и удален в 3.13
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+logger = logging.getLogger(__name__)
+
+
+class AudioTranscodeError(Exception):
+    """Аудио не удалось декодировать"""
+
+
+class AudioTranscoder:
+    """Декодирование аудио в PCM для распознавания без временных файлов
+
+    На выходе - 16-битный моно PCM (little-endian) с частотой sample_rate.
+    WAV разбирается прямо в процессе; остальные форматы (Ogg/Opus голосовых,
+    MP3, M4A) проходят через ffmpeg: байты подаются в stdin, PCM читается из
+    stdout. Файловая система не используется ни в одном из путей.
+    """
+
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, sample_rate: int = 16000, ffmpeg_binary: Optional[str] = None, timeout: float = 60.0):
+        self.sample_rate = sample_rate
+        self.ffmpeg_binary = ffmpeg_binary or shutil.which("ffmpeg") or "ffmpeg"
+        self.timeout = timeout
+
+    def to_pcm(self, data: bytes) -> bytes:
+        """Декодирование байтов аудио в PCM (AudioTranscodeError при ошибке)"""
+        if not data:
+            raise AudioTranscodeError("Empty audio")
+        if data[:4] == b"RIFF" and data[8:12] == b"WAVE" and audioop is not None:
+            try:
+                return self._wav_to_pcm(data)
+            except (wave.Error, audioop.error, EOFError) as e:
+                # Нестандартный WAV (float, сжатый) - пусть разбирается ffmpeg
+                logger.debug(f"WAV fast path skipped: {e}")
+        return self._ffmpeg_to_pcm(data)
+
+    def duration(self, pcm: bytes) -> float:
+        """Длительность PCM в секундах"""
+        return len(pcm) / (self.sample_rate * self.SAMPLE_WIDTH)
+
+    def _wav_to_pcm(self, data: bytes) -> bytes:
+        with wave.open(io.BytesIO(data)) as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+
+        if width == 1:
+            # 8-битный WAV беззнаковый, audioop ожидает знаковые отсчеты
+            frames = audioop.bias(frames, 1, -128)
+        if width != self.SAMPLE_WIDTH:
+            frames = audioop.lin2lin(frames, width, self.SAMPLE_WIDTH)
+        if channels == 2:
+            frames = audioop.tomono(frames, self.SAMPLE_WIDTH, 0.5, 0.5)
+        elif channels != 1:
+            raise wave.Error(f"{channels} channels")
+        if rate != self.sample_rate:
+            frames, _ = audioop.ratecv(frames, self.SAMPLE_WIDTH, 1, rate, self.sample_rate, None)
+        return frames
+
+    def _ffmpeg_to_pcm(self, data: bytes) -> bytes:
+        command = [
+            self.ffmpeg_binary, "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0", "-vn",
+            "-f", "s16le", "-acodec", "pcm_s16le",
+            "-ac", "1", "-ar", str(self.sample_rate),
+            "pipe:1",
+        ]
+        try:
+            # communicate пишет stdin и читает stdout одновременно, без взаимной блокировки
+            result = subprocess.run(command, input=data, capture_output=True, timeout=self.timeout)
+        except FileNotFoundError:
+            raise AudioTranscodeError(f"ffmpeg not found: {self.ffmpeg_binary}")
+        except subprocess.TimeoutExpired:
+            raise AudioTranscodeError(f"ffmpeg timed out after {self.timeout} s")
+
+        if result.returncode != 0 or not result.stdout:
+            # M4A с индексом в конце файла не читается из неперематываемого stdin
+            error = result.stderr.decode(errors="replace").strip().splitlines()
+            raise AudioTranscodeError(f"ffmpeg failed: {error[-1] if error else result.returncode}")
+        return result.stdout
@@ -0,0 +1,171 @@
+import gzip
+import math
+import logging
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Встроенный набор городов GeoNames (население от 15 000), см. tools/build_cities_dataset.py
+DEFAULT_DATASET_PATH = Path(__file__).parent / "data" / "cities15000.tsv.gz"
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+@dataclass
+class Place:
+    """Найденный населенный пункт"""
+    name: str
+    name_locative: str  # "в Москве" - для фраз вида "Погода в ..."
+    country: str
+    latitude: float
+    longitude: float
+    distance_km: float
+
+
+class ReverseGeocoder:
+    """Офлайн обратное геокодирование: ближайший город по координатам
+
+    Города раскладываются по сетке ячеек cell_size x cell_size градусов.
+    Поиск обходит кольца ячеек вокруг точки и останавливается, как только
+    следующее кольцо гарантированно дальше уже найденного города.
+    """
+
+    def __init__(self, dataset_path: Optional[str] = None, cell_size: float = 1.0,
+                 max_distance_km: float = 100.0):
+        self.dataset_path = Path(dataset_path) if dataset_path else DEFAULT_DATASET_PATH
+        self.cell_size = cell_size
+        self.max_distance_km = max_distance_km
+        self._columns = int(round(360 / cell_size))
+        self._rows = int(round(180 / cell_size))
+
+        self._names: List[str] = []
+        self._names_locative: List[str] = []
+        self._countries: List[str] = []
+        self._latitudes = array('d')
+        self._longitudes = array('d')
+        self._grid: Dict[Tuple[int, int], array] = {}
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _load(self):
+        """Загрузка набора городов и построение индекса"""
+        with gzip.open(self.dataset_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                name, name_locative, country, lat, lon = line.rstrip('\n').split('\t')
+                latitude = float(lat)
+                longitude = float(lon)
+
+                index = len(self._names)
+                self._names.append(name)
+                # Для большинства иностранных городов форма совпадает - храним одну строку
+                self._names_locative.append(name if name_locative == name else name_locative)
+                self._countries.append(country)
+                self._latitudes.append(latitude)
+                self._longitudes.append(longitude)
+
+                cell = self._cell(latitude, longitude)
+                bucket = self._grid.get(cell)
+                if bucket is None:
+                    bucket = self._grid[cell] = array('I')
+                bucket.append(index)
+
+        logger.info(f"🗺 Загружено городов для геокодирования: {len(self._names)}")
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Ячейка сетки для координат"""
+        row = min(int((lat + 90) // self.cell_size), self._rows - 1)
+        column = int((lon + 180) // self.cell_size) % self._columns
+        return row, column
+
+    def _ring(self, row: int, column: int, radius: int):
+        """Ячейки на границе квадрата радиуса radius вокруг (row, column)"""
+        if radius == 0:
+            yield row, column
+            return
+
+        for d_row in range(-radius, radius + 1):
+            r = row + d_row
+            if r < 0 or r >= self._rows:
+                continue
+            if abs(d_row) == radius:
+                d_columns = range(-radius, radius + 1)
+            else:
+                d_columns = (-radius, radius)
+            for d_column in d_columns:
+                yield r, (column + d_column) % self._columns
+
+    def _ring_lower_bound_km(self, lat: float, radius: int) -> float:
+        """Минимальное расстояние до любой точки за пределами колец 0..radius"""
+        gap = radius * self.cell_size
+        by_latitude = gap * KM_PER_DEGREE
+
+        # По долготе расстояние минимально на самой высокой достижимой широте
+        max_lat = min(90.0, abs(lat) + gap)
+        half_gap = math.radians(min(gap, 180.0)) / 2
+        by_longitude = 2 * EARTH_RADIUS_KM * math.asin(
+            min(1.0, math.cos(math.radians(max_lat)) * math.sin(half_gap))
+        )
+        return min(by_latitude, by_longitude)
+
+    @staticmethod
+    def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        """Расстояние между точками по большому кругу"""
+        phi1 = math.radians(lat1)
+        phi2 = math.radians(lat2)
+        d_phi = phi2 - phi1
+        d_lambda = math.radians(lon2 - lon1)
+        a = (math.sin(d_phi / 2) ** 2 +
+             math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+    def nearest(self, lat: float, lon: float) -> Optional[Place]:
+        """Ближайший город не дальше max_distance_km"""
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return None
+
+        row, column = self._cell(lat, lon)
+        best_index = -1
+        best_distance = math.inf
+        visited = set()
+        max_radius = max(self._rows, self._columns // 2)
+
+        for radius in range(max_radius + 1):
+            for cell in self._ring(row, column, radius):
+                if cell in visited:
+                    continue
+                visited.add(cell)
+                for index in self._grid.get(cell, ()):
+                    distance = self._haversine_km(
+                        lat, lon, self._latitudes[index], self._longitudes[index]
+                    )
+                    if distance < best_distance:
+                        best_index = index
+                        best_distance = distance
+
+            lower_bound = self._ring_lower_bound_km(lat, radius)
+            if best_distance <= lower_bound or lower_bound > self.max_distance_km:
+                break
+
+        if best_index < 0 or best_distance > self.max_distance_km:
+            return None
+
+        return Place(
+            name=self._names[best_index],
+            name_locative=self._names_locative[best_index],
+            country=self._countries[best_index],
+            latitude=self._latitudes[best_index],
+            longitude=self._longitudes[best_index],
+            distance_km=best_distance
+        )
+
+    def city_name(self, lat: float, lon: float, default: str = "Вашем городе") -> str:
+        """Название города в предложном падеже (для фраз "Погода в ...")"""
+        place = self.nearest(lat, lon)
+        return place.name_locative if place else default
@@ -1,16 +1,52 @@
+import io
+import math
 import logging
-from PIL import Image, ImageEnhance, ImageFilter, ImageOps
+from PIL import ExifTags, Image, ImageChops, ImageFilter, ImageOps, ImageStat
 from pathlib import Path
-import tempfile
-from typing import Optional
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from services.temp_storage import temp_storage
 
 logger = logging.getLogger(__name__)
 
+# Параметры улучшения фото
+CONTRAST = 1.2      # Увеличение контраста на 20%
+BRIGHTNESS = 1.1    # Увеличение яркости на 10%
+SATURATION = 1.15   # Увеличение насыщенности на 15%
+
+# Лимиты пикселей против «бомб декомпрессии»: крошечный файл с огромными
+# размерами не будет декодирован. Фото проверяются по MAX_IMAGE_PIXELS,
+# изображения-документы - по DOCUMENT_MAX_PIXELS; Pillow отказывается
+# открывать файлы вдвое больше последнего во всех остальных местах
+MAX_IMAGE_PIXELS = 40_000_000
+DOCUMENT_MAX_PIXELS = 100_000_000
+Image.MAX_IMAGE_PIXELS = DOCUMENT_MAX_PIXELS
+
+# Высота полосы при обработке больших изображений и число строк контекста
+# на ее границах (по строке на каждый из двух фильтров 3×3)
+STRIP_ROWS = 256
+STRIP_OVERLAP = 2
+
+# Цепочка операций: последовательность (название, параметры)
+Operation = Tuple[str, Dict[str, Any]]
+DEFAULT_OPERATIONS: Tuple[Operation, ...] = (('enhance', {}),)
+
+# Ориентации EXIF, при которых ширина и высота меняются местами
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+
 class ImageProcessor:
     """Процессор для обработки изображений"""
     
     def __init__(self):
         self.supported_formats = ['.jpg', '.jpeg', '.png', '.bmp', '.webp']
+        # Шаги цепочки: изображение в памяти → новое изображение
+        self.operations = {
+            'enhance': self._enhance,
+            'resize': self._resize,
+            'grayscale': self._grayscale,
+            'watermark': self._watermark,
+        }
     
     def process_image(self, image_path: str) -> Optional[str]:
         """Основная обработка изображения"""
@@ -22,12 +58,7 @@ class ImageProcessor:
             
             # Открытие изображения
             with Image.open(image_path) as img:
-                # Конвертация в RGB если нужно
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Применение улучшений
-                enhanced_img = self._apply_enhancements(img)
+                enhanced_img = self._enhance(img)
                 
                 # Сохранение обработанного изображения
                 output_path = self._get_output_path(image_path)
@@ -39,39 +70,327 @@ class ImageProcessor:
             logger.error(f"Image processing error: {e}")
             return None
     
+    def process_image_bytes(self, source: Union[bytes, BinaryIO], max_side: Optional[int] = None,
+                            max_pixels: int = MAX_IMAGE_PIXELS,
+                            operations: Sequence[Operation] = DEFAULT_OPERATIONS,
+                            encoding: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Обработка изображения в памяти, без временных файлов
+        
+        Принимает байты или файловый объект, возвращает словарь с закодированным
+        изображением в 'data', его форматом и качеством ('format', 'quality')
+        и размерами исходного ('original_size') и обработанного ('size') изображения.
+        Изображение уменьшается до max_side по большей стороне; JPEG сразу
+        декодируется в уменьшенном масштабе. Цепочка operations, например
+        [('enhance', {}), ('resize', {'max_size': (800, 800)}), ('watermark', {'text': '...'})],
+        применяется к одному декодированному изображению, результат кодируется один раз
+        с параметрами encoding (см. encode).
+        """
+        try:
+            buffer = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+            
+            with Image.open(buffer) as img:
+                # Размеры известны из заголовка, до декодирования пикселей
+                original_size = img.size
+                if img.width * img.height > max_pixels:
+                    logger.warning(f"⚠️ Изображение {img.width}×{img.height} превышает лимит {max_pixels} пикселей")
+                    return None
+                
+                # Метаданные в результат не попадают, поэтому поворот из EXIF
+                # применяется к пикселям, иначе фото с камеры окажется повернутым
+                orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+                if orientation in ROTATED_ORIENTATIONS:
+                    original_size = original_size[::-1]
+                result_img = self._decode(img, max_side)
+                if orientation != 1:
+                    result_img = ImageOps.exif_transpose(result_img)
+                
+                for name, params in operations:
+                    result_img = self.operations[name](result_img, **params)
+                
+                data, image_format, quality = self.encode(result_img, **(encoding or {}))
+                
+                return {
+                    'data': data,
+                    'format': image_format,
+                    'quality': quality,
+                    'original_size': original_size,
+                    'size': result_img.size
+                }
+                
+        except Exception as e:
+            logger.error(f"Image processing error: {e}")
+            return None
+    
+    def encode(self, img: Image.Image, format: str = 'JPEG', quality: int = 85,
+               max_bytes: Optional[int] = None, min_psnr: Optional[float] = None,
+               min_quality: int = 40) -> Tuple[bytes, str, int]:
+        """Кодирование результата с подбором качества
+        
+        Без ограничений кодирует с качеством quality. С min_psnr ищет
+        наименьшее качество, при котором PSNR относительно исходных пикселей
+        не ниже порога (дБ), с max_bytes - наибольшее качество в пределах
+        объема; при обоих ограничениях приоритет у объема. Подбор - двоичный
+        поиск в диапазоне [min_quality, quality]. Метаданные не сохраняются.
+        Возвращает (данные, формат, качество).
+        """
+        format = format.upper()
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        
+        encoded: Dict[int, bytes] = {}
+        
+        def encode_at(q: int) -> bytes:
+            if q not in encoded:
+                output = io.BytesIO()
+                if format == 'WEBP':
+                    img.save(output, 'WEBP', quality=q, method=4)
+                else:
+                    img.save(output, 'JPEG', quality=q, optimize=True, progressive=True)
+                encoded[q] = output.getvalue()
+            return encoded[q]
+        
+        best = quality
+        if min_psnr is not None:
+            best = self._search_quality(
+                min_quality, quality, lambda q: self._psnr(img, encode_at(q)) >= min_psnr, lowest=True
+            )
+        if max_bytes is not None and len(encode_at(best)) > max_bytes:
+            best = self._search_quality(
+                min_quality, best, lambda q: len(encode_at(q)) <= max_bytes, lowest=False
+            )
+        
+        return encode_at(best), format, best
+    
+    def _search_quality(self, low: int, high: int, accept: Callable[[int], bool], lowest: bool) -> int:
+        """Двоичный поиск качества: наименьшего (lowest) или наибольшего подходящего
+        
+        Если подходящего нет, возвращается граница диапазона: high для поиска
+        наименьшего и low для поиска наибольшего.
+        """
+        found = high if lowest else low
+        while low <= high:
+            middle = (low + high) // 2
+            if accept(middle):
+                found = middle
+                if lowest:
+                    high = middle - 1
+                else:
+                    low = middle + 1
+            elif lowest:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return found
+    
+    def _psnr(self, img: Image.Image, data: bytes) -> float:
+        """PSNR закодированного изображения относительно исходных пикселей (дБ)"""
+        with Image.open(io.BytesIO(data)) as decoded:
+            difference = ImageChops.difference(img, decoded.convert(img.mode))
+        mse = sum(rms ** 2 for rms in ImageStat.Stat(difference).rms) / len(img.getbands())
+        if mse == 0:
+            return float('inf')
+        return 10 * math.log10(255 ** 2 / mse)
+    
+    def process_image_strips(self, input_path: str, output_path: str,
+                             max_pixels: int = DOCUMENT_MAX_PIXELS, quality: int = 90,
+                             strip_rows: int = STRIP_ROWS) -> Optional[Dict[str, Any]]:
+        """Улучшение большого изображения полосами с ограниченной памятью
+        
+        Результат попиксельно совпадает с _apply_enhancements, но вместо нескольких
+        полноразмерных копий в памяти одно декодированное изображение (W×H×4
+        байт: Pillow хранит RGB по 4 байта на пиксель) и буферы одной полосы:
+        каждая полоса обрабатывается с STRIP_OVERLAP строками контекста и
+        вставляется на место исходной. Потолок пика памяти - 1,15 размера
+        декодированного изображения плюс 64 МБ, проверяется в
+        benchmarks/bench_document_strips.py. Изображения не в RGB сначала
+        конвертируются, на это время пик удваивается.
+        
+        Результат сохраняется в output_path базовым JPEG: optimize и progressive
+        требуют буфер размером W×H. Поворот из EXIF не применяется к пикселям
+        (это еще одна полная копия), а переносится в результат тегом Orientation.
+        
+        Изображение больше max_pixels - {'error': 'too_large', 'original_size'};
+        None - файл не удалось прочитать или обработать.
+        """
+        try:
+            with Image.open(input_path) as img:
+                original_size = img.size
+                if img.width * img.height > max_pixels:
+                    logger.warning(f"⚠️ Изображение {img.width}×{img.height} превышает лимит {max_pixels} пикселей")
+                    return {'error': 'too_large', 'original_size': original_size}
+                
+                orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+                
+                if img.mode != 'RGB':
+                    img = img.convert('RGB')
+                else:
+                    img.load()
+                
+                self._enhance_strips(img, strip_rows)
+                
+                exif = Image.Exif()
+                if orientation != 1:
+                    exif[ExifTags.Base.Orientation] = orientation
+                img.save(output_path, 'JPEG', quality=quality, exif=exif.tobytes())
+                
+                return {
+                    'path': output_path,
+                    'original_size': original_size,
+                    'size': img.size,
+                    'bytes': Path(output_path).stat().st_size
+                }
+        
+        except Image.DecompressionBombError as e:
+            # Pillow отказывается открывать заведомо огромные изображения еще до проверки лимита
+            logger.warning(f"⚠️ {e}")
+            return {'error': 'too_large', 'original_size': None}
+        except Exception as e:
+            logger.error(f"Image strips processing error: {e}")
+            return None
+    
+    def _enhance_strips(self, img: Image.Image, strip_rows: int = STRIP_ROWS):
+        """Применение улучшений полосами на месте (изображение в RGB)"""
+        width, height = img.size
+        
+        # Контрасту нужна средняя яркость всего изображения после SHARPEN:
+        # первый проход собирает гистограмму по полосам со строкой контекста
+        histogram = [0] * 256
+        for top in range(0, height, strip_rows):
+            bottom = min(top + strip_rows, height)
+            start = max(top - 1, 0)
+            region = img.crop((0, start, width, min(bottom + 1, height))).filter(ImageFilter.SHARPEN)
+            region = region.crop((0, top - start, width, bottom - start)).convert('L')
+            histogram = [total + count for total, count in zip(histogram, region.histogram())]
+        lut = self._tone_lut(histogram)
+        
+        # Исходные строки над текущей полосой: к этому моменту в изображении
+        # они уже заменены обработанными, а фильтрам нужен оригинал
+        previous_tail: Optional[Image.Image] = None
+        
+        for top in range(0, height, strip_rows):
+            bottom = min(top + strip_rows, height)
+            region = img.crop((0, top, width, min(bottom + STRIP_OVERLAP, height)))
+            
+            head = 0
+            if previous_tail is not None:
+                head = previous_tail.height
+                extended = Image.new('RGB', (width, head + region.height))
+                extended.paste(previous_tail, (0, 0))
+                extended.paste(region, (0, head))
+                region = extended
+            
+            # Регион содержит исходные строки начиная с top - head
+            start = top - head
+            previous_tail = region.crop((0, max(bottom - STRIP_OVERLAP, start) - start, width, bottom - start))
+            
+            processed = self._saturate(region.filter(ImageFilter.SHARPEN).point(lut))
+            processed = processed.filter(ImageFilter.SMOOTH)
+            img.paste(processed.crop((0, head, width, head + bottom - top)), (0, top))
+    
+    def _decode(self, img: Image.Image, max_side: Optional[int]) -> Image.Image:
+        """Декодирование с уменьшением до max_side по большей стороне"""
+        if not max_side or max(img.size) <= max_side:
+            return img
+        
+        # Для JPEG draft выбирает масштаб 1/2, 1/4 или 1/8 прямо при декодировании,
+        # при котором обе стороны не меньше запрошенных, поэтому ему нужен размер
+        # с пропорциями кадра, а не квадрат; остаток уменьшается thumbnail
+        scale = max_side / max(img.size)
+        img.draft('RGB', (max(1, round(img.width * scale)), max(1, round(img.height * scale))))
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        return img
+    
+    def _enhance(self, img: Image.Image) -> Image.Image:
+        """Декодирование в RGB и применение улучшений"""
+        # Конвертация в RGB если нужно
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        return self._apply_enhancements(img)
+    
     def _apply_enhancements(self, image: Image.Image) -> Image.Image:
-        """Применение улучшений к изображению"""
-        # 1. Увеличение резкости
+        """Применение улучшений к изображению
+        
+        Результат попиксельно совпадает с прежней цепочкой SHARPEN, Contrast,
+        Brightness, Color, SMOOTH (ImageEnhance). Контраст и яркость -
+        поканальные функции, они сводятся к одной таблице Image.point вместо
+        двух смешиваний с полноразмерными «вырожденными» изображениями.
+        """
         image = image.filter(ImageFilter.SHARPEN)
+        image = image.point(self._tone_lut(image.convert('L').histogram()))
+        image = self._saturate(image)
+        return image.filter(ImageFilter.SMOOTH)
+    
+    def _tone_lut(self, luma_histogram: List[int]) -> List[int]:
+        """Таблица контраста и яркости для Image.point по гистограмме яркости
+        
+        Таблица строится теми же Image.blend, что и в ImageEnhance, на шкале
+        0..255, поэтому округление и обрезка совпадают с ними.
+        """
+        mean = int(ImageStat.Stat(luma_histogram).mean[0] + 0.5)
+        ramp = Image.frombytes('L', (256, 1), bytes(range(256)))
+        ramp = Image.blend(Image.new('L', ramp.size, mean), ramp, CONTRAST)
+        ramp = Image.blend(Image.new('L', ramp.size, 0), ramp, BRIGHTNESS)
+        return list(ramp.tobytes()) * 3
+    
+    def _saturate(self, image: Image.Image) -> Image.Image:
+        """Насыщенность, как ImageEnhance.Color: смешивание с яркостной составляющей"""
+        return Image.blend(image.convert('L').convert('RGB'), image, SATURATION)
+    
+    def _resize(self, img: Image.Image, max_size: tuple = (1024, 1024)) -> Image.Image:
+        """Уменьшение с сохранением пропорций"""
+        img = img.copy()
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+        return img
+    
+    def _grayscale(self, img: Image.Image) -> Image.Image:
+        """Черно-белый вариант"""
+        return ImageOps.grayscale(img)
+    
+    def _watermark(self, img: Image.Image, text: str) -> Image.Image:
+        """Водяной знак в правом нижнем углу"""
+        from PIL import ImageDraw, ImageFont
         
-        # 2. Коррекция контраста
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.2)  # Увеличение контраста на 20%
+        # Рисуем на копии в RGB: исходник может быть лениво открытым файлом или Ч/Б
+        img = img.convert('RGB')
         
-        # 3. Коррекция яркости
-        enhancer = ImageEnhance.Brightness(image)
-        image = enhancer.enhance(1.1)  # Увеличение яркости на 10%
+        # Создание объекта для рисования
+        draw = ImageDraw.Draw(img)
         
-        # 4. Насыщенность цветов
-        enhancer = ImageEnhance.Color(image)
-        image = enhancer.enhance(1.15)  # Увеличение насыщенности на 15%
+        # Попытка использования шрифта (запасной вариант если шрифт не найден)
+        try:
+            font = ImageFont.truetype("arial.ttf", 36)
+        except OSError:
+            font = ImageFont.load_default()
+        
+        # Позиционирование водяного знака
+        bbox = draw.textbbox((0, 0), text, font=font)
+        text_width = bbox[2] - bbox[0]
+        text_height = bbox[3] - bbox[1]
         
-        # 5. Легкое размытие для уменьшения шума
-        image = image.filter(ImageFilter.SMOOTH)
+        width, height = img.size
+        x = width - text_width - 10
+        y = height - text_height - 10
         
-        return image
+        # Тень и основной текст
+        draw.text((x+1, y+1), text, font=font, fill=(0, 0, 0))
+        draw.text((x, y), text, font=font, fill=(255, 255, 255))
+        return img
+    
+    def _process_file(self, image_path: str, suffix: str, operation: str, **params) -> Optional[str]:
+        """Одна операция над файлом с сохранением результата во временный каталог"""
+        with Image.open(image_path) as img:
+            result_img = self.operations[operation](img, **params)
+            
+            output_path = self._get_output_path(image_path, suffix)
+            result_img.save(output_path, 'JPEG', quality=85)
+            
+            return output_path
     
     def resize_image(self, image_path: str, max_size: tuple = (1024, 1024)) -> Optional[str]:
         """Изменение размера изображения"""
         try:
-            with Image.open(image_path) as img:
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                output_path = self._get_output_path(image_path, "_resized")
-                img.save(output_path, 'JPEG', quality=85)
-                
-                return output_path
-                
+            return self._process_file(image_path, "_resized", 'resize', max_size=max_size)
         except Exception as e:
             logger.error(f"Image resize error: {e}")
             return None
@@ -79,14 +398,7 @@ class ImageProcessor:
     def convert_to_grayscale(self, image_path: str) -> Optional[str]:
         """Конвертация в черно-белый формат"""
         try:
-            with Image.open(image_path) as img:
-                grayscale_img = ImageOps.grayscale(img)
-                
-                output_path = self._get_output_path(image_path, "_bw")
-                grayscale_img.save(output_path, 'JPEG', quality=85)
-                
-                return output_path
-                
+            return self._process_file(image_path, "_bw", 'grayscale')
         except Exception as e:
             logger.error(f"Grayscale conversion error: {e}")
             return None
@@ -94,53 +406,15 @@ class ImageProcessor:
     def add_watermark(self, image_path: str, watermark_text: str) -> Optional[str]:
         """Добавление водяного знака"""
         try:
-            with Image.open(image_path) as img:
-                from PIL import ImageDraw, ImageFont
-                
-                # Создание объекта для рисования
-                draw = ImageDraw.Draw(img)
-                
-                # Попытка использования шрифта (запасной вариант если шрифт не найден)
-                try:
-                    font = ImageFont.truetype("arial.ttf", 36)
-                except:
-                    font = ImageFont.load_default()
-                
-                # Позиционирование водяного знака
-                bbox = draw.textbbox((0, 0), watermark_text, font=font)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
-                
-                width, height = img.size
-                x = width - text_width - 10
-                y = height - text_height - 10
-                
-                # Рисование текста с тенью
-                shadow_color = (0, 0, 0, 128)
-                text_color = (255, 255, 255, 128)
-                
-                # Тень
-                draw.text((x+1, y+1), watermark_text, font=font, fill=shadow_color)
-                # Основной текст
-                draw.text((x, y), watermark_text, font=font, fill=text_color)
-                
-                output_path = self._get_output_path(image_path, "_watermark")
-                img.save(output_path, 'JPEG', quality=85)
-                
-                return output_path
-                
+            return self._process_file(image_path, "_watermark", 'watermark', text=watermark_text)
         except Exception as e:
             logger.error(f"Watermark error: {e}")
             return None
     
     def _get_output_path(self, original_path: str, suffix: str = "_processed") -> str:
         """Генерация пути для выходного файла"""
-        original_path = Path(original_path)
-        temp_dir = Path(tempfile.gettempdir()) / "telegram_bot"
-        temp_dir.mkdir(exist_ok=True)
-        
-        output_filename = f"{original_path.stem}{suffix}.jpg"
-        return str(temp_dir / output_filename)
+        # Уникальное имя: одинаковые исходные имена у разных задач не перезаписывают друг друга
+        return str(temp_storage.new_path(Path(original_path).stem, f"{suffix}.jpg"))
     
     def get_image_info(self, image_path: str) -> dict:
         """Получение информации об изображении"""
@@ -155,4 +429,29 @@ class ImageProcessor:
                 }
         except Exception as e:
             logger.error(f"Image info error: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+# Экземпляр для процессов-воркеров пула (создается один раз на процесс)
+_worker_processor: Optional[ImageProcessor] = None
+
+
+def _get_worker_processor() -> ImageProcessor:
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = ImageProcessor()
+    return _worker_processor
+
+
+def process_image_document(input_path: str, output_path: str,
+                           max_pixels: int = DOCUMENT_MAX_PIXELS, quality: int = 90) -> Optional[Dict[str, Any]]:
+    """Обработка изображения-документа полосами в процессе-воркере пула"""
+    return _get_worker_processor().process_image_strips(input_path, output_path, max_pixels, quality)
+
+
+def process_image_bytes(data: bytes, max_side: Optional[int] = None,
+                        max_pixels: int = MAX_IMAGE_PIXELS,
+                        operations: Sequence[Operation] = DEFAULT_OPERATIONS,
+                        encoding: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Обработка изображения в памяти в процессе-воркере пула"""
+    return _get_worker_processor().process_image_bytes(data, max_side, max_pixels, operations, encoding)
+
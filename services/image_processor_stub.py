@@ -10,4 +10,26 @@ class ImageProcessor:
     
     def process_image(self, image_path: str) -> str:
         """Заглушка для обработки изображения"""
-        return image_path  # Возвращаем исходный путь без изменений
\ No newline at end of file
+        return image_path  # Возвращаем исходный путь без изменений
+    
+    def process_image_bytes(self, source, max_side=None, max_pixels=None, operations=None, encoding=None) -> None:
+        """Заглушка для обработки в памяти (обработка недоступна)"""
+        return None
+    
+    def process_image_strips(self, input_path, output_path, max_pixels=None, quality=90, strip_rows=None) -> None:
+        """Заглушка для обработки полосами (обработка недоступна)"""
+        return None
+    
+    def get_image_info(self, image_path: str) -> dict:
+        """Заглушка для информации об изображении"""
+        return {}
+
+
+def process_image_bytes(data: bytes, max_side=None, max_pixels=None, operations=None, encoding=None) -> None:
+    """Заглушка обработки в памяти в процессе-воркере"""
+    return None
+
+
+def process_image_document(input_path: str, output_path: str, max_pixels=None, quality=90) -> None:
+    """Заглушка обработки изображения-документа в процессе-воркере"""
+    return None
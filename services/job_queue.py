@@ -0,0 +1,357 @@
+import os
+import time
+import uuid
+import multiprocessing
+import threading
+import logging
+from collections import deque
+from concurrent.futures import CancelledError, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+job_wait_seconds = metrics.histogram(
+    "job_queue_wait_seconds",
+    "Время ожидания задачи в очереди до запуска, по очередям"
+)
+job_service_seconds = metrics.histogram(
+    "job_queue_service_seconds",
+    "Время выполнения задачи воркером, по очередям"
+)
+jobs_rejected = metrics.counter(
+    "job_queue_rejected_total",
+    "Задачи, не принятые в очередь: queue_full, user_limit"
+)
+executor_recycled = metrics.counter(
+    "job_queue_recycled_total",
+    "Перезапуски пула процессов из-за зависшей задачи, по очередям"
+)
+
+
+class QueueFullError(Exception):
+    """Очередь заполнена, задача не принята"""
+
+
+class UserQueueFullError(QueueFullError):
+    """У пользователя уже слишком много задач в ожидании"""
+
+
+class Job:
+    """Задача в очереди"""
+
+    WAITING = "waiting"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    TIMED_OUT = "timed_out"
+
+    def __init__(self, func: Callable, args: tuple, user_id: Optional[int],
+                 on_done: Optional[Callable[[Any], None]],
+                 on_error: Optional[Callable[[BaseException], None]]):
+        self.id = uuid.uuid4().hex[:12]
+        self.func = func
+        self.args = args
+        self.user_id = user_id
+        self.on_done = on_done
+        self.on_error = on_error
+        self.state = self.WAITING
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.future: Optional[Future] = None
+
+
+class JobQueue:
+    """Ограниченная очередь задач поверх пула исполнителей
+
+    Задачи ждут в собственной очереди и передаются в executor только при
+    наличии свободного воркера, поэтому известна позиция каждой задачи,
+    а ожидающие задачи можно отменить. Результаты доставляются в отдельном
+    пуле потоков, чтобы отправка ответов не задерживала диспетчер.
+
+    max_per_user ограничивает число одновременно выполняемых задач одного
+    пользователя (остальные его задачи пропускают вперед чужие), а
+    max_waiting_per_user - число его задач в ожидании.
+
+    Просроченная или отмененная во время выполнения задача не должна навсегда
+    занимать воркер. С executor_factory (пул процессов) просроченная задача
+    перезапускает пул: старые процессы завершаются, остальные выполнявшиеся
+    задачи возвращаются в начало очереди. Потоки завершить нельзя, поэтому
+    пул потоков создается с spare_workers запасными: брошенные задачи
+    дорабатывают в них, а сверх запаса снова занимают слоты, и очередь не
+    принимает в работу больше задач, чем есть воркеров.
+    """
+
+    def __init__(self, name: str, executor: Executor, max_workers: int,
+                 max_queue: int = 20, job_timeout: float = 60.0, delivery_threads: int = 2,
+                 max_per_user: Optional[int] = None, max_waiting_per_user: Optional[int] = None,
+                 executor_factory: Optional[Callable[[], Executor]] = None, spare_workers: int = 0):
+        self.name = name
+        self.executor = executor
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.max_per_user = max_per_user
+        self.max_waiting_per_user = max_waiting_per_user
+        self.spare_workers = spare_workers
+        self._executor_factory = executor_factory
+
+        self._waiting: Deque[Job] = deque()
+        self._running: Dict[str, Job] = {}
+        # Задачи, брошенные по таймауту или отмене, но еще занимающие поток
+        self._abandoned: Dict[str, Job] = {}
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._delivery = ThreadPoolExecutor(
+            max_workers=delivery_threads, thread_name_prefix=f"{name}-delivery"
+        )
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_loop, name=f"{name}-dispatcher", daemon=True
+        )
+        self._dispatcher.start()
+
+    def submit(self, func: Callable, *args, user_id: Optional[int] = None,
+               on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None) -> Job:
+        """Постановка задачи в очередь (QueueFullError, если мест нет)"""
+        job = Job(func, args, user_id, on_done, on_error)
+        with self._cond:
+            if self._stopped:
+                raise QueueFullError(f"Queue {self.name} is stopped")
+            if len(self._waiting) >= self.max_queue:
+                jobs_rejected.inc(queue=self.name, reason="queue_full")
+                raise QueueFullError(f"Queue {self.name} is full")
+            if (self.max_waiting_per_user is not None and user_id is not None and
+                    sum(1 for waiting in self._waiting if waiting.user_id == user_id) >= self.max_waiting_per_user):
+                jobs_rejected.inc(queue=self.name, reason="user_limit")
+                raise UserQueueFullError(f"User {user_id} has too many jobs in {self.name}")
+            self._waiting.append(job)
+            self._cond.notify_all()
+        return job
+
+    def position(self, job: Job) -> int:
+        """Позиция в очереди: 0 - выполняется, N - N-я в ожидании, -1 - завершена"""
+        with self._cond:
+            if job.state == Job.RUNNING:
+                return 0
+            if job.state == Job.WAITING:
+                # Задачи, для которых уже есть свободный воркер, вот-вот запустятся
+                free_slots = max(self.max_workers - self._busy(), 0)
+                for index, waiting in enumerate(self._waiting, start=1):
+                    if waiting is job:
+                        return max(index - free_slots, 0)
+            return -1
+
+    def cancel(self, job_id: str, user_id: Optional[int] = None) -> bool:
+        """Отмена задачи
+
+        Владелец получает CancelledError в on_error. Уже выполняющаяся задача
+        доработает в воркере, но ее результат доставлен не будет: поток сразу
+        уходит в запасные, процесс - до завершения задачи или ее таймаута.
+        """
+        with self._cond:
+            job = next((waiting for waiting in self._waiting if waiting.id == job_id), None)
+            if job:
+                if user_id is not None and job.user_id != user_id:
+                    return False
+                self._waiting.remove(job)
+            else:
+                job = self._running.get(job_id)
+                if not job or job.state != Job.RUNNING:
+                    return False
+                if user_id is not None and job.user_id != user_id:
+                    return False
+                if job.future:
+                    job.future.cancel()
+                if self._executor_factory is None:
+                    self._abandon(job)
+
+            job.state = Job.CANCELLED
+            self._deliver(job.on_error, CancelledError(f"Job {job.id} cancelled"))
+            return True
+
+    @property
+    def pending(self) -> int:
+        """Количество задач в ожидании"""
+        with self._cond:
+            return len(self._waiting)
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                self._check_timeouts()
+                while not self._stopped and not self._has_free_slot():
+                    self._cond.wait(timeout=0.5)
+                    self._check_timeouts()
+                if self._stopped:
+                    return
+
+                job = self._next_waiting()
+                self._waiting.remove(job)
+                job.state = Job.RUNNING
+                job.started_at = time.monotonic()
+                self._running[job.id] = job
+            job_wait_seconds.observe(job.started_at - job.submitted_at, queue=self.name)
+
+            try:
+                job.future = self.executor.submit(job.func, *job.args)
+            except Exception as e:
+                self._finish(job, None, e)
+                continue
+            job.future.add_done_callback(lambda future, job=job: self._on_future_done(job, future))
+
+    def _busy(self) -> int:
+        """Занятые воркеры: выполняющиеся задачи и брошенные сверх запасных"""
+        return len(self._running) + max(len(self._abandoned) - self.spare_workers, 0)
+
+    def _has_free_slot(self) -> bool:
+        return self._busy() < self.max_workers and self._next_waiting() is not None
+
+    def _next_waiting(self) -> Optional[Job]:
+        """Первая ожидающая задача, владелец которой не превысил max_per_user"""
+        if self.max_per_user is None:
+            return self._waiting[0] if self._waiting else None
+        running_per_user: Dict[int, int] = {}
+        for running in self._running.values():
+            running_per_user[running.user_id] = running_per_user.get(running.user_id, 0) + 1
+        for job in self._waiting:
+            if job.user_id is None or running_per_user.get(job.user_id, 0) < self.max_per_user:
+                return job
+        return None
+
+    def _check_timeouts(self):
+        """Сообщение о превышении времени и освобождение воркера (вызывается под блокировкой)"""
+        now = time.monotonic()
+        expired = [job for job in self._running.values() if now - job.started_at > self.job_timeout]
+        for job in expired:
+            if job.state == Job.RUNNING:
+                job.state = Job.TIMED_OUT
+                logger.warning(f"⌛ Задача {job.id} в очереди {self.name} превысила {self.job_timeout} с")
+                self._deliver(job.on_error, TimeoutError(f"Job {job.id} timed out"))
+            if job.id in self._running:
+                self._abandon(job)
+
+    def _abandon(self, job: Job):
+        """Задача больше не считается выполняющейся (вызывается под блокировкой)"""
+        self._running.pop(job.id, None)
+        if self._executor_factory is not None:
+            self._recycle()
+        else:
+            self._abandoned[job.id] = job
+        self._cond.notify_all()
+
+    def _recycle(self):
+        """Замена пула процессов: зависший процесс завершается, остальные задачи запускаются заново"""
+        old_executor = self.executor
+        self.executor = self._executor_factory()
+        # Отмененные задачи заново не запускаются
+        restarted = [job for job in self._running.values() if job.state == Job.RUNNING]
+        self._running.clear()
+        for job in reversed(restarted):
+            job.state = Job.WAITING
+            job.started_at = None
+            job.future = None
+            self._waiting.appendleft(job)
+        executor_recycled.inc(queue=self.name)
+        logger.warning(f"♻️ Очередь {self.name}: пул перезапущен, задач возвращено в очередь: {len(restarted)}")
+
+        # Отдельный процесс из ProcessPoolExecutor не завершить, поэтому весь пул
+        processes = list((getattr(old_executor, '_processes', None) or {}).values())
+        old_executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def _on_future_done(self, job: Job, future: Future):
+        if future is not job.future:
+            # Результат из перезапущенного пула: задача уже снова в очереди
+            return
+        if future.cancelled():
+            self._finish(job, None, None)
+            return
+        error = future.exception()
+        self._finish(job, None if error else future.result(), error)
+
+    def _finish(self, job: Job, result: Any, error: Optional[BaseException]):
+        """Освобождение слота и доставка результата"""
+        if job.started_at is not None:
+            job_service_seconds.observe(time.monotonic() - job.started_at, queue=self.name)
+        with self._cond:
+            self._running.pop(job.id, None)
+            self._abandoned.pop(job.id, None)
+            state = job.state
+            if state == Job.RUNNING:
+                job.state = Job.FAILED if error else Job.DONE
+            self._cond.notify_all()
+
+        # Отмененные и просроченные задачи результатов не получают
+        if state != Job.RUNNING:
+            return
+        if error:
+            logger.error(f"Job {job.id} in {self.name} failed: {error}")
+            self._deliver(job.on_error, error)
+        else:
+            self._deliver(job.on_done, result)
+
+    def _deliver(self, callback: Optional[Callable], value: Any):
+        if callback is None:
+            return
+
+        def run():
+            try:
+                callback(value)
+            except Exception as e:
+                logger.error(f"Job callback error in {self.name}: {e}", exc_info=True)
+
+        try:
+            self._delivery.submit(run)
+        except RuntimeError:
+            # Пул доставки уже остановлен
+            pass
+
+    def shutdown(self, wait: bool = False):
+        """Остановка очереди и пулов"""
+        with self._cond:
+            self._stopped = True
+            for job in self._waiting:
+                job.state = Job.CANCELLED
+            self._waiting.clear()
+            self._cond.notify_all()
+        self.executor.shutdown(wait=wait)
+        self._delivery.shutdown(wait=wait)
+
+
+def create_process_queue(name: str, workers: Optional[int] = None, max_queue: int = 20,
+                         job_timeout: float = 60.0) -> JobQueue:
+    """Очередь для CPU-задач: пул процессов по числу ядер"""
+    workers = workers or os.cpu_count() or 1
+
+    def create_executor() -> Executor:
+        # spawn вместо fork: в процессе бота уже работают потоки telebot и планировщика
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    logger.info(f"⚙️ Очередь {name}: {workers} процессов, до {max_queue} задач в ожидании")
+    return JobQueue(
+        name, create_executor(), max_workers=workers, max_queue=max_queue, job_timeout=job_timeout,
+        executor_factory=create_executor
+    )
+
+
+def create_thread_queue(name: str, workers: int = 2, max_queue: int = 20, job_timeout: float = 120.0,
+                        max_per_user: Optional[int] = None,
+                        max_waiting_per_user: Optional[int] = None,
+                        spare_workers: Optional[int] = None) -> JobQueue:
+    """Очередь для задач, которые в основном ждут сеть или C-код без GIL (скачивание, распознавание речи)
+
+    spare_workers - запасные потоки для брошенных задач (по умолчанию столько
+    же, сколько рабочих); потоки создаются пулом только по мере надобности.
+    """
+    spare_workers = workers if spare_workers is None else spare_workers
+    executor = ThreadPoolExecutor(max_workers=workers + spare_workers, thread_name_prefix=name)
+    logger.info(f"⚙️ Очередь {name}: {workers} потоков, до {max_queue} задач в ожидании")
+    return JobQueue(
+        name, executor, max_workers=workers, max_queue=max_queue, job_timeout=job_timeout,
+        max_per_user=max_per_user, max_waiting_per_user=max_waiting_per_user,
+        spare_workers=spare_workers
+    )
@@ -0,0 +1,105 @@
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from database.models import MediaCacheEntry
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+media_cache_requests = metrics.counter(
+    "media_cache_requests_total",
+    "Обращения к кэшу обработанных медиа по типу и результату: hit, miss"
+)
+
+
+class MediaCache:
+    """Кэш результатов обработки медиа по file_unique_id
+
+    Хранит file_id уже загруженного в Telegram результата или готовый текст
+    расшифровки, чтобы повторно присланное или пересланное фото и голосовое
+    не скачивались и не обрабатывались заново. Свежие записи держатся в памяти
+    (LRU), все записи - в таблице media_cache, размер которой ограничивается
+    по времени последнего использования.
+    """
+
+    PHOTO = "photo"
+    TRANSCRIPT = "transcript"
+
+    # Как часто подрезать таблицу (в числе сохранений)
+    TRIM_EVERY = 100
+
+    def __init__(self, db=None, memory_size: int = 500, max_entries: int = 10000):
+        self.db = db
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, MediaCacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._saves = 0
+
+    @staticmethod
+    def make_key(file_unique_id: str, operation: str, **params) -> str:
+        """Ключ кэша: идентификатор файла, операция и ее параметры"""
+        options = ",".join(f"{name}={value}" for name, value in sorted(params.items()))
+        return f"{operation}:{file_unique_id}:{options}"
+
+    def get(self, cache_key: str) -> Optional[MediaCacheEntry]:
+        """Поиск результата сначала в памяти, затем в базе"""
+        with self._lock:
+            entry = self._memory.get(cache_key)
+            if entry:
+                self._memory.move_to_end(cache_key)
+
+        if entry is None and self.db:
+            try:
+                entry = self.db.get_media_cache_entry(cache_key)
+            except Exception as e:
+                logger.error(f"Media cache read error: {e}")
+            if entry:
+                self._remember(entry)
+
+        kind = cache_key.split(":", 1)[0]
+        media_cache_requests.inc(kind=kind, result="hit" if entry else "miss")
+        return entry
+
+    def put(self, cache_key: str, kind: str, file_id: Optional[str] = None, text: Optional[str] = None):
+        """Сохранение результата обработки"""
+        entry = MediaCacheEntry(
+            cache_key=cache_key,
+            kind=kind,
+            file_id=file_id,
+            text=text,
+            last_used=datetime.now()
+        )
+        self._remember(entry)
+
+        if not self.db:
+            return
+        try:
+            self.db.save_media_cache_entry(entry)
+            self._saves += 1
+            if self._saves % self.TRIM_EVERY == 0:
+                removed = self.db.trim_media_cache(self.max_entries)
+                if removed:
+                    logger.info(f"🧹 Кэш медиа: удалено {removed} старых записей")
+        except Exception as e:
+            logger.error(f"Media cache write error: {e}")
+
+    def invalidate(self, cache_key: str):
+        """Удаление записи (например, если file_id больше не принимается)"""
+        with self._lock:
+            self._memory.pop(cache_key, None)
+        if self.db:
+            try:
+                self.db.delete_media_cache_entry(cache_key)
+            except Exception as e:
+                logger.error(f"Media cache delete error: {e}")
+
+    def _remember(self, entry: MediaCacheEntry):
+        with self._lock:
+            self._memory[entry.cache_key] = entry
+            self._memory.move_to_end(entry.cache_key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
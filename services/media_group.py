@@ -0,0 +1,56 @@
+import threading
+import logging
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MediaGroupCollector:
+    """Сбор сообщений альбома (media group) в одну пачку
+
+    Telegram присылает альбом отдельными сообщениями с общим media_group_id.
+    Сообщения копятся, пока в течение window секунд не перестанут приходить
+    новые (или пока не наберется max_items), затем пачка целиком передается
+    в on_complete, упорядоченная по message_id.
+    """
+
+    def __init__(self, on_complete: Callable[[List[Any]], None], window: float = 1.0, max_items: int = 10):
+        self.on_complete = on_complete
+        self.window = window
+        self.max_items = max_items
+        self._groups: Dict[Tuple[int, str], List[Any]] = {}
+        self._timers: Dict[Tuple[int, str], threading.Timer] = {}
+        self._lock = threading.Lock()
+
+    def add(self, message: Any):
+        """Добавление сообщения альбома"""
+        key = (message.chat.id, message.media_group_id)
+        with self._lock:
+            messages = self._groups.setdefault(key, [])
+            messages.append(message)
+
+            timer = self._timers.pop(key, None)
+            if timer:
+                timer.cancel()
+
+            if len(messages) < self.max_items:
+                timer = threading.Timer(self.window, self._flush, args=(key,))
+                timer.daemon = True
+                self._timers[key] = timer
+                timer.start()
+                return
+
+        self._flush(key)
+
+    def _flush(self, key: Tuple[int, str]):
+        with self._lock:
+            self._timers.pop(key, None)
+            messages = self._groups.pop(key, None)
+        if not messages:
+            return
+
+        messages.sort(key=lambda message: message.message_id)
+        try:
+            self.on_complete(messages)
+        except Exception as e:
+            logger.error(f"Media group processing error: {e}", exc_info=True)
@@ -0,0 +1,171 @@
+import os
+import re
+import csv
+import time
+import zipfile
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, List, Optional, Tuple
+
+from services.job_queue import create_thread_queue
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+qr_bulk_codes = metrics.counter(
+    "qr_bulk_codes_total",
+    "QR-коды, созданные пакетной генерацией из файлов"
+)
+
+
+class QRBulkError(Exception):
+    """Файл для пакетной генерации не подходит (пустой, слишком большой)"""
+
+
+# Первая строка CSV считается заголовком, только если ее первая ячейка - одно из этих названий
+CSV_HEADER_NAMES = {'url', 'link', 'text', 'data', 'payload', 'qr', 'ссылка', 'текст', 'данные'}
+
+
+def parse_payloads(data: bytes, max_rows: int = 1000, file_name: str = "") -> List[str]:
+    """Строки для QR-кодов из файла
+
+    .csv - первая колонка каждой строки (разделитель , ; или табуляция),
+    заголовок пропускается, если называется как в CSV_HEADER_NAMES; любой
+    другой файл - каждая строка целиком, как есть. Пустые строки
+    пропускаются; больше max_rows строк - QRBulkError.
+    """
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        text = data.decode('cp1251', errors='replace')
+
+    lines = text.splitlines()
+    if file_name.lower().endswith('.csv'):
+        try:
+            dialect = csv.Sniffer().sniff("\n".join(lines[:20]), delimiters=",;\t")
+        except csv.Error:
+            # Одна колонка без разделителей
+            dialect = csv.excel
+        rows = [row[0] if row else "" for row in csv.reader(lines, dialect)]
+        if rows and rows[0].strip().casefold() in CSV_HEADER_NAMES:
+            rows = rows[1:]
+    else:
+        rows = lines
+
+    payloads = []
+    for row in rows:
+        row = row.strip()
+        if not row:
+            continue
+        if len(payloads) >= max_rows:
+            raise QRBulkError(f"Too many rows: more than {max_rows}")
+        payloads.append(row)
+
+    if not payloads:
+        raise QRBulkError("No rows with data")
+    return payloads
+
+
+def render_qr_batch(payloads: List[str], output_format: str = 'png') -> Tuple[List[Optional[bytes]], float]:
+    """Картинки для пакета строк и затраченное процессорное время (выполняется в пуле процессов)"""
+    from services.qr_generator import qr_service
+
+    started = time.process_time()
+    images = []
+    for payload in payloads:
+        image = qr_service.generate_qr(payload, output_format=output_format)
+        images.append(image.getvalue() if image else None)
+    return images, time.process_time() - started
+
+
+def archive_name(index: int, payload: str, extension: str = 'png') -> str:
+    """Имя файла в архиве: номер строки и безопасная часть содержимого"""
+    slug = re.sub(r'[^\w.-]+', '_', re.sub(r'^\w+://', '', payload)).strip('_.')[:40]
+    return f"{index:04d}_{slug or 'qr'}.{extension}"
+
+
+class QRBulkGenerator:
+    """Пакетная генерация QR-кодов в ZIP-архив
+
+    Строки делятся на пакеты по batch_size и рендерятся в пуле процессов
+    (создается при первом использовании). В работе одновременно не больше
+    двух пакетов на процесс, и готовые PNG сразу дописываются в архив по
+    порядку, поэтому в памяти держится лишь несколько пакетов, а архив
+    пишется в переданный файл по мере готовности. Сами сборки архивов идут
+    через очередь по одной на пользователя. output_format - png или svg
+    (см. QRCodeService).
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_rows: int = 1000,
+                 batch_size: int = 50, max_queue: int = 10, output_format: str = 'png'):
+        self.workers = workers or os.cpu_count() or 1
+        self.output_format = output_format
+        self.max_rows = max_rows
+        self.batch_size = batch_size
+        self.queue = create_thread_queue(
+            "qr-bulk", workers=1, max_queue=max_queue, job_timeout=600,
+            max_per_user=1, max_waiting_per_user=1
+        )
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def build_zip(self, payloads: List[str], output: BinaryIO) -> dict:
+        """Запись архива картинок в output; возвращает статистику генерации"""
+        pool = self._get_pool()
+        batches = [payloads[start:start + self.batch_size] for start in range(0, len(payloads), self.batch_size)]
+        pending = deque()
+        written = failed = 0
+        cpu_seconds = 0.0
+        started = time.perf_counter()
+
+        # PNG уже сжат, повторное сжатие только тратит время; SVG - текст и хорошо сжимается
+        compression = zipfile.ZIP_DEFLATED if self.output_format == 'svg' else zipfile.ZIP_STORED
+        with zipfile.ZipFile(output, 'w', compression=compression) as archive:
+            next_batch = 0
+            while next_batch < len(batches) or pending:
+                while next_batch < len(batches) and len(pending) < self.workers * 2:
+                    pending.append((next_batch, pool.submit(render_qr_batch, batches[next_batch], self.output_format)))
+                    next_batch += 1
+
+                batch_index, future = pending.popleft()
+                images, batch_cpu = future.result()
+                cpu_seconds += batch_cpu
+                offset = batch_index * self.batch_size
+                for position, image in enumerate(images):
+                    if image is None:
+                        failed += 1
+                        continue
+                    index = offset + position + 1
+                    archive.writestr(archive_name(index, payloads[index - 1], self.output_format), image)
+                    written += 1
+
+        elapsed = time.perf_counter() - started
+        qr_bulk_codes.inc(written)
+        stats = {
+            'codes': written,
+            'failed': failed,
+            'seconds': elapsed,
+            'workers': self.workers,
+            'per_second': written / elapsed if elapsed else 0.0,
+            # Пропускная способность одного ядра: коды на секунду процессорного времени воркеров
+            'per_core': written / cpu_seconds if cpu_seconds else 0.0,
+        }
+        logger.info(
+            f"🔲 Пакет QR: {written} кодов за {elapsed:.2f} с, "
+            f"{stats['per_second']:.0f}/с, {stats['per_core']:.0f}/с на ядро"
+        )
+        return stats
+
+    def shutdown(self):
+        """Остановка очереди и пула процессов"""
+        self.queue.shutdown()
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
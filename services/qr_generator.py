@@ -1,21 +1,83 @@
 import qrcode
 from io import BytesIO
-from typing import Optional
+from typing import List, Optional, Tuple, Union
 import logging
 
+from PIL import Image, ImageColor
+
+from utils.cache import LRUCache
+from utils.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+qr_cache_requests = metrics.counter(
+    "qr_cache_requests_total",
+    "Запросы QR-кодов по результату: file_id (повтор без загрузки), hit (картинка из памяти), miss"
+)
+
+
 class QRCodeService:
-    """Сервис для генерации QR-кодов"""
-    
-    def __init__(self):
+    """Сервис для генерации QR-кодов
+
+    Готовые картинки хранятся в LRU-кэше по содержимому и параметрам кода, а после
+    первой отправки запоминается file_id фото в Telegram: популярные ссылки
+    повторно отправляются по file_id без генерации и загрузки.
+
+    Форматы: png - палитровый PNG с 1 битом на пиксель, собранный прямо из
+    матрицы модулей; svg - векторный код из горизонтальных полос модулей.
+    """
+
+    FORMATS = ('png', 'svg')
+
+    def __init__(self, cache_size: int = 256):
         self.version = 1
         self.box_size = 10
         self.border = 4
         self.error_correction = qrcode.constants.ERROR_CORRECT_L
-    
+        self.configure(cache_size)
+
+    def configure(self, cache_size: int = 256):
+        """Размер кэша PNG; file_id короткие, их помним в 4 раза больше"""
+        self._images = LRUCache(max_size=cache_size)
+        self._file_ids = LRUCache(max_size=cache_size * 4)
+
+    def cache_key(self, data: str, **kwargs) -> tuple:
+        """Ключ кэша: данные и все параметры, влияющие на картинку"""
+        return (
+            data,
+            kwargs.get('version', self.version),
+            kwargs.get('error_correction', self.error_correction),
+            kwargs.get('box_size', self.box_size),
+            kwargs.get('border', self.border),
+            kwargs.get('fill_color', 'black'),
+            kwargs.get('back_color', 'white'),
+            kwargs.get('output_format', 'png'),
+        )
+
+    def get_file_id(self, key: tuple) -> Optional[str]:
+        """file_id уже отправленного QR-кода"""
+        file_id = self._file_ids.get(key)
+        if file_id:
+            qr_cache_requests.inc(result="file_id")
+        return file_id
+
+    def remember_file_id(self, key: tuple, file_id: str):
+        """Сохранение file_id после первой отправки"""
+        self._file_ids.set(key, file_id)
+
+    def forget_file_id(self, key: tuple):
+        """Удаление file_id, который Telegram больше не принимает"""
+        self._file_ids.pop(key)
+
     def generate_qr(self, data: str, **kwargs) -> Optional[BytesIO]:
         """Генерация QR-кода"""
+        key = self.cache_key(data, **kwargs)
+        image = self._images.get(key)
+        if image is not None:
+            qr_cache_requests.inc(result="hit")
+            return BytesIO(image)
+
+        qr_cache_requests.inc(result="miss")
         try:
             qr = qrcode.QRCode(
                 version=kwargs.get('version', self.version),
@@ -23,22 +85,80 @@ class QRCodeService:
                 box_size=kwargs.get('box_size', self.box_size),
                 border=kwargs.get('border', self.border)
             )
-            
+
             qr.add_data(data)
             qr.make(fit=True)
-            
+
             # Настройки цвета
             fill_color = kwargs.get('fill_color', 'black')
             back_color = kwargs.get('back_color', 'white')
-            
-            img = qr.make_image(fill_color=fill_color, back_color=back_color)
-            
-            bio = BytesIO()
-            img.save(bio, 'PNG')
-            bio.seek(0)
-            
-            return bio
-            
+            box_size = kwargs.get('box_size', self.box_size)
+            matrix = qr.get_matrix()
+
+            if kwargs.get('output_format', 'png') == 'svg':
+                image = render_svg(matrix, box_size, fill_color, back_color)
+            else:
+                image = render_png(matrix, box_size, fill_color, back_color)
+            self._images.set(key, image)
+
+            return BytesIO(image)
+
         except Exception as e:
             logger.error(f"QR generation error: {e}")
-            return None
\ No newline at end of file
+            return None
+
+
+Color = Union[str, Tuple[int, ...]]
+
+
+def _rgb(color: Color) -> Tuple[int, int, int]:
+    """Цвет как (r, g, b): кортеж, как принимает qrcode, или строка для ImageColor"""
+    return tuple(color[:3]) if isinstance(color, tuple) else ImageColor.getrgb(color)[:3]
+
+
+def _svg_color(color: Color) -> str:
+    """Цвет для атрибута fill: кортеж - rgb(r,g,b), строка - как есть"""
+    return "rgb({},{},{})".format(*_rgb(color)) if isinstance(color, tuple) else color
+
+
+def render_png(matrix: List[List[bool]], box_size: int = 10,
+               fill_color: Color = 'black', back_color: Color = 'white') -> bytes:
+    """PNG из матрицы модулей: 1 байт на модуль, увеличение без сглаживания, палитра из 2 цветов"""
+    size = len(matrix)
+    modules = bytes(cell for row in matrix for cell in row)
+    image = Image.frombytes('P', (size, size), modules)
+    image.putpalette(_rgb(back_color) + _rgb(fill_color))
+    image = image.resize((size * box_size, size * box_size), Image.NEAREST)
+
+    bio = BytesIO()
+    image.save(bio, 'PNG', bits=1)
+    return bio.getvalue()
+
+
+def render_svg(matrix: List[List[bool]], box_size: int = 10,
+               fill_color: Color = 'black', back_color: Color = 'white') -> bytes:
+    """SVG из матрицы модулей: подряд идущие темные модули строки - один прямоугольник пути"""
+    size = len(matrix)
+    path = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            path.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+
+    pixels = size * box_size
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="{_svg_color(back_color)}"/>'
+        f'<path fill="{_svg_color(fill_color)}" d="{"".join(path)}"/></svg>'
+    ).encode()
+
+
+# Общий экземпляр: кэш работает для всех обработчиков
+qr_service = QRCodeService()
@@ -1,33 +1,182 @@
 import requests
 from bs4 import BeautifulSoup
 import random
+import time
+import threading
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+from utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+quote_scrape_requests = metrics.counter(
+    "quote_scrape_requests_total",
+    "Запросы страниц подборки цитат по ответу: modified (200), not_modified (304)"
+)
+quote_scrape_bytes = metrics.counter(
+    "quote_scrape_bytes_total",
+    "Объем загруженных страниц подборки цитат (байт)"
+)
+quote_parse_seconds = metrics.histogram(
+    "quote_parse_seconds",
+    "Процессорное время разбора одной страницы подборки"
+)
+
 class QuoteParser:
-    """Парсер цитат с сайта citaty.info"""
+    """Парсер цитат с сайта citaty.info
+
+    Для каждой страницы подборки запоминаются ETag/Last-Modified и разобранные
+    цитаты, следующие запросы - условные: на 304 страница не скачивается и не
+    разбирается заново. refresh() обходит подборку постранично порциями,
+    продолжая с места, где остановился прошлый проход.
+    """
+    
+    # Можно переопределить в конфигурации (например, на локальную заглушку)
+    BASE_URL = "https://citaty.info"
+    SELECTION_PATH = "/selection/citaty-so-smyslom-podborka-mudryh-citat"
     
-    def __init__(self):
-        self.base_url = "https://citaty.info"
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = (base_url or self.BASE_URL).rstrip('/')
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        # Номер страницы -> {'etag', 'last_modified', 'quotes'}
+        self._pages: Dict[int, Dict] = {}
+        self._cursor = 1
+        self._lock = threading.Lock()
+    
+    @property
+    def quotes(self) -> List[Dict[str, str]]:
+        """Все цитаты, разобранные к этому моменту"""
+        with self._lock:
+            return [quote for page in sorted(self._pages) for quote in self._pages[page]['quotes']]
+    
+    def fetch_quotes(self) -> List[Dict[str, str]]:
+        """Цитаты первой страницы подборки (условный запрос; ошибки сети пробрасываются)"""
+        return self._fetch_page(0, self._new_stats())[0]
+    
+    def refresh(self, max_pages: int = 5) -> Tuple[List[Dict[str, str]], Dict]:
+        """Проход по подборке: первая страница и до max_pages следующих
+
+        Возвращает цитаты изменившихся страниц и статистику прохода (запросы,
+        ответы 304, ошибки, байты, процессорное время разбора). Пустая страница
+        или 404 - конец подборки: следующий проход начнется со второй страницы.
+        Ошибка на странице прерывает проход, но уже полученные цитаты
+        возвращаются, а страница будет запрошена снова в следующий раз.
+        """
+        stats = self._new_stats()
+        changed = []
+        
+        try:
+            quotes, modified = self._fetch_page(0, stats)
+        except Exception as e:
+            logger.error(f"Quote page 0 fetch error: {e}")
+            stats['errors'] += 1
+            quotes, modified = [], False
+        if modified:
+            changed.extend(quotes)
+        
+        for _ in range(max_pages if not stats['errors'] else 0):
+            page = self._cursor
+            try:
+                quotes, modified = self._fetch_page(page, stats)
+            except Exception as e:
+                logger.error(f"Quote page {page} fetch error: {e}")
+                stats['errors'] += 1
+                break
+            if not quotes:
+                # Страницы дальше конца подборки больше не нужны
+                with self._lock:
+                    for stale in [number for number in self._pages if number >= page]:
+                        del self._pages[stale]
+                self._cursor = 1
+                break
+            if modified:
+                changed.extend(quotes)
+            self._cursor = page + 1
+        
+        logger.info(
+            f"💬 Обновление цитат: {stats['requests']} запросов "
+            f"({stats['not_modified']} без изменений, {stats['errors']} с ошибкой), {stats['bytes'] / 1024:.1f} КБ, "
+            f"разбор {stats['parse_seconds'] * 1000:.0f} мс, цитат на измененных страницах: {len(changed)}"
+        )
+        return changed, stats
+    
+    @staticmethod
+    def _new_stats() -> Dict:
+        return {'requests': 0, 'not_modified': 0, 'errors': 0, 'bytes': 0, 'parse_seconds': 0.0}
+    
+    def reset(self):
+        """Забыть ETag/Last-Modified всех страниц: следующий проход скачает их заново
+
+        Нужно, если цитаты прохода не удалось сохранить - иначе на 304 они
+        больше не попадут в список изменившихся.
+        """
+        with self._lock:
+            self._pages.clear()
+        self._cursor = 1
+    
+    def _fetch_page(self, page: int, stats: Dict) -> Tuple[List[Dict[str, str]], bool]:
+        """Условная загрузка страницы: (цитаты, изменилась ли страница)"""
+        with self._lock:
+            cached = self._pages.get(page)
+        
+        headers = {}
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+        
+        response = self.session.get(
+            f"{self.base_url}{self.SELECTION_PATH}",
+            params={'page': page} if page else None,
+            headers=headers,
+            timeout=10
+        )
+        stats['requests'] += 1
+        
+        if response.status_code == 304 and cached:
+            stats['not_modified'] += 1
+            quote_scrape_requests.inc(status="not_modified")
+            return cached['quotes'], False
+        if response.status_code == 404 and page:
+            # Drupal отвечает 404 на номер страницы за концом подборки
+            with self._lock:
+                self._pages.pop(page, None)
+            return [], True
+        response.raise_for_status()
+        
+        # Объем по заголовку - это байты по сети (для сжатых ответов меньше, чем content)
+        size = int(response.headers.get('Content-Length') or len(response.content))
+        stats['bytes'] += size
+        quote_scrape_bytes.inc(size)
+        quote_scrape_requests.inc(status="modified")
+        
+        started = time.process_time()
+        soup = BeautifulSoup(response.content, 'html.parser')
+        quotes = self._parse_quotes(soup)
+        parse_seconds = time.process_time() - started
+        stats['parse_seconds'] += parse_seconds
+        quote_parse_seconds.observe(parse_seconds)
+        
+        with self._lock:
+            if quotes:
+                self._pages[page] = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'quotes': quotes
+                }
+            else:
+                self._pages.pop(page, None)
+        return quotes, True
     
     def get_random_quote(self) -> Dict[str, str]:
         """Получение случайной цитаты"""
         try:
-            # Получаем страницу со списком цитат
-            url = f"{self.base_url}/selection/citaty-so-smyslom-podborka-mudryh-citat"
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Ищем цитаты
-            quotes = self._parse_quotes(soup)
+            # Ищем цитаты на странице подборки (без изменений - из памяти)
+            quotes = self.fetch_quotes() or self.quotes
             
             if not quotes:
                 return self._get_fallback_quote()
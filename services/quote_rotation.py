@@ -0,0 +1,97 @@
+import random
+import threading
+import logging
+from typing import Dict, Optional
+
+from database.models import QuoteRotationState
+
+logger = logging.getLogger(__name__)
+
+MASK64 = (1 << 64) - 1
+
+
+def _mix(value: int) -> int:
+    """Перемешивание 64-битного числа (финализатор splitmix64)"""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+def permute(index: int, size: int, seed: int, rounds: int = 4) -> int:
+    """Позиция index в псевдослучайной перестановке чисел 0..size-1, заданной seed
+
+    Сеть Фейстеля на двух половинах битов - биекция на [0, 4^half), где
+    4^half - ближайшая степень четверки не меньше size; значения за
+    пределами size проходят через сеть повторно (cycle walking), пока не
+    попадут в диапазон. Так перестановку не нужно хранить: достаточно seed.
+    """
+    if size <= 1:
+        return 0
+    half = ((size - 1).bit_length() + 1) // 2
+    mask = (1 << half) - 1
+    keys = [_mix(seed * rounds + round_index) for round_index in range(rounds)]
+
+    value = index
+    while True:
+        left, right = value >> half, value & mask
+        for key in keys:
+            left, right = right, left ^ (_mix(right ^ key) & mask)
+        value = (left << half) | right
+        if value < size:
+            return value
+
+
+class QuoteRotation:
+    """Цитаты без повторов для каждого пользователя
+
+    Каждый пользователь проходит корпус в своем псевдослучайном порядке
+    (permute с личным seed) и увидит повтор только после всех цитат. Для
+    пользователя хранятся три числа: seed, позиция в перестановке и размер
+    корпуса на начало круга - цитаты, собранные позже, попадают в следующий
+    круг с новым seed. Состояние лежит в таблице quote_rotation, без базы -
+    в памяти.
+    """
+
+    def __init__(self, store, db=None):
+        self.store = store
+        self.db = db
+        self._memory: Dict[int, QuoteRotationState] = {}
+        self._lock = threading.Lock()
+
+    def next_quote(self, user_id: int) -> Dict[str, str]:
+        """Следующая цитата пользователя (резервная, если корпус пуст)"""
+        with self._lock:
+            total = self.store.count()
+            if not total:
+                return self.store.get_random_quote()
+
+            state = self._load(user_id)
+            if state is None or state.position >= state.size:
+                # Новый круг: свой порядок и весь корпус на текущий момент
+                state = QuoteRotationState(
+                    user_id=user_id, seed=random.getrandbits(32), position=0, size=total
+                )
+
+            quote = self.store.get_quote(permute(state.position, state.size, state.seed))
+            state.position += 1
+            self._save(state)
+
+        return quote or self.store.get_random_quote()
+
+    def _load(self, user_id: int) -> Optional[QuoteRotationState]:
+        if self.db is None:
+            return self._memory.get(user_id)
+        try:
+            return self.db.get_quote_rotation(user_id)
+        except Exception as e:
+            logger.error(f"Quote rotation read error: {e}")
+            return None
+
+    def _save(self, state: QuoteRotationState):
+        if self.db is None:
+            self._memory[state.user_id] = state
+            return
+        try:
+            self.db.save_quote_rotation(state)
+        except Exception as e:
+            logger.error(f"Quote rotation write error: {e}")
@@ -0,0 +1,139 @@
+import re
+import random
+import hashlib
+import threading
+import logging
+from typing import Dict, List, Optional
+
+from database.models import Quote
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+quotes_harvested = metrics.counter(
+    "quotes_harvested_total",
+    "Цитаты, полученные сборщиком, по результату: new, duplicate"
+)
+
+
+def quote_hash(text: str) -> str:
+    """Хэш текста цитаты без учета регистра, пробелов и кавычек (для дедупликации)"""
+    normalized = re.sub(r'\s+', ' ', text.casefold()).strip(' «»"\'.…')
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def format_quote(text: str, author: str) -> Dict[str, str]:
+    """Цитата в формате QuoteParser"""
+    return {
+        'text': text,
+        'author': author,
+        'full': f"«{text}»\n\n— {author}"
+    }
+
+
+class QuoteStore:
+    """Локальный корпус цитат
+
+    Цитаты собираются фоновым сборщиком (QuoteParser) и хранятся в таблице
+    quotes без повторов по хэшу текста, так что нажатие кнопки не ходит на
+    сайт; страницы, не изменившиеся с прошлого прохода (ответ 304), не
+    разбираются. Случайная цитата - один поиск по первичному ключу: id идут
+    подряд, берется случайный id от 1 до максимального. Без базы корпус
+    хранится в памяти. Пока корпус пуст, отдаются резервные цитаты парсера.
+    """
+
+    def __init__(self, db=None, parser=None, pages_per_refresh: int = 5):
+        self.db = db
+        self.pages_per_refresh = pages_per_refresh
+        if parser is None:
+            from services.quote_parser import QuoteParser
+            parser = QuoteParser()
+        self.parser = parser
+        self._max_id: Optional[int] = None
+        self._memory: List[Quote] = []
+        self._memory_hashes = set()
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def count(self) -> int:
+        """Размер корпуса"""
+        if self.db is None:
+            return len(self._memory)
+        if self._max_id is None:
+            self._max_id = self.db.get_quotes_max_id()
+        return self._max_id
+
+    def harvest(self) -> int:
+        """Проход сборщика: условные запросы к подборке, сохранение цитат с изменившихся страниц"""
+        changed, _ = self.parser.refresh(self.pages_per_refresh)
+        quotes = [
+            Quote(text=quote['text'], author=quote['author'], text_hash=quote_hash(quote['text']))
+            for quote in changed
+        ]
+        try:
+            added = self.add(quotes)
+        except Exception:
+            # Несохраненные страницы должны прийти целиком в следующий проход, а не как 304
+            self.parser.reset()
+            raise
+        quotes_harvested.inc(added, result="new")
+        quotes_harvested.inc(len(quotes) - added, result="duplicate")
+        logger.info(f"💬 Сбор цитат: получено {len(quotes)}, новых {added}, всего {self.count()}")
+        return added
+
+    def add(self, quotes: List[Quote]) -> int:
+        """Сохранение цитат без повторов; возвращает число новых"""
+        if self.db is None:
+            added = 0
+            with self._lock:
+                for quote in quotes:
+                    if quote.text_hash not in self._memory_hashes:
+                        self._memory_hashes.add(quote.text_hash)
+                        self._memory.append(quote)
+                        added += 1
+            return added
+
+        added = self.db.add_quotes(quotes)
+        self._max_id = self.db.get_quotes_max_id()
+        return added
+
+    def get_quote(self, index: int) -> Optional[Dict[str, str]]:
+        """Цитата по номеру в корпусе (с 0); None, если ее нет"""
+        try:
+            if self.db is None:
+                quote = self._memory[index] if index < len(self._memory) else None
+            else:
+                quote = self.db.get_quote_from_id(index + 1)
+        except Exception as e:
+            logger.error(f"Quote store read error: {e}")
+            return None
+        return format_quote(quote.text, quote.author) if quote else None
+
+    def get_random_quote(self) -> Dict[str, str]:
+        """Случайная цитата из корпуса (резервная, если корпус еще пуст)"""
+        total = self.count()
+        quote = self.get_quote(random.randrange(total)) if total else None
+        return quote or self.parser._get_fallback_quote()
+
+    def start_refresher(self, interval: float = 6 * 3600):
+        """Запуск фонового сборщика (первый проход - сразу)"""
+        if self._refresher and self._refresher.is_alive():
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(
+            target=self._refresher_loop, args=(interval,), name="quote-refresher", daemon=True
+        )
+        self._refresher.start()
+
+    def stop_refresher(self):
+        """Остановка фонового сборщика"""
+        self._stop.set()
+
+    def _refresher_loop(self, interval: float):
+        while not self._stop.is_set():
+            try:
+                self.harvest()
+            except Exception as e:
+                logger.error(f"Quote harvest error: {e}")
+            self._stop.wait(interval)
@@ -13,11 +13,12 @@ logger = logging.getLogger(__name__)
 class NotificationScheduler:
     """Планировщик уведомлений"""
     
-    def __init__(self, bot, db: DatabaseManager, weather_service: WeatherService):
+    def __init__(self, bot, db: DatabaseManager, weather_service: WeatherService, quote_rotation=None):
         self.bot = bot
         self.db = db
         self.weather_service = weather_service
         self.quote_generator = QuoteGenerator()
+        self.quote_rotation = quote_rotation
         self.is_running = False
         self.thread = None
     
@@ -75,6 +76,9 @@ class NotificationScheduler:
                             subscription.longitude,
                             subscription.city_name or "Вашем городе"
                         )
+                        if not weather_data.get('available', True):
+                            logger.warning(f"Weather unavailable for {subscription.user_id}, skipping")
+                            continue
                         
                         message = (
                             f"🌅 **Доброе утро!**\n\n"
@@ -83,6 +87,7 @@ class NotificationScheduler:
                             f"• 💧 Влажность: {weather_data['humidity']}%\n"
                             f"• 🌬 Ветер: {weather_data['wind_speed']} м/с\n"
                             f"• 📝 {weather_data['description']}\n\n"
+                            f"{self._stale_note(weather_data)}"
                             f"Хорошего дня! ☀️"
                         )
                         
@@ -109,6 +114,9 @@ class NotificationScheduler:
                             subscription.longitude, 
                             subscription.city_name or "Вашем городе"
                         )
+                        if not weather_data.get('available', True):
+                            logger.warning(f"Weather unavailable for {subscription.user_id}, skipping")
+                            continue
                         
                         message = (
                             f"🌆 **Добрый вечер!**\n\n"
@@ -117,6 +125,7 @@ class NotificationScheduler:
                             f"• 💧 Влажность: {weather_data['humidity']}%\n"
                             f"• 🌬 Ветер: {weather_data['wind_speed']} м/с\n"
                             f"• 📝 {weather_data['description']}\n\n"
+                            f"{self._stale_note(weather_data)}"
                             f"Спокойной ночи! 🌙"
                         )
                         
@@ -130,6 +139,12 @@ class NotificationScheduler:
         except Exception as e:
             logger.error(f"Evening weather error: {e}")
     
+    def _stale_note(self, weather_data: dict) -> str:
+        """Пометка о том, что показаны сохраненные данные"""
+        if weather_data.get('stale') and weather_data.get('updated_at'):
+            return f"🕐 _Данные на {weather_data['updated_at'].strftime('%H:%M')}_\n\n"
+        return ""
+    
     def _send_daily_quote(self):
         """Отправка ежедневной цитаты"""
         try:
@@ -138,6 +153,9 @@ class NotificationScheduler:
             
             for user in users:
                 try:
+                    # У каждого своя цитата из корпуса, без повторов до конца круга
+                    if self.quote_rotation:
+                        quote = self.quote_rotation.next_quote(user.user_id)
                     message = f"💬 **Цитата дня:**\n\n{quote['full']}"
                     self.bot.send_message(user.user_id, message, parse_mode='Markdown')
                     
@@ -171,8 +189,8 @@ class NotificationScheduler:
         except Exception as e:
             logger.error(f"Reminders check error: {e}")
 
-def start_scheduler(bot, db: DatabaseManager, weather_service: WeatherService):
+def start_scheduler(bot, db: DatabaseManager, weather_service: WeatherService, quote_rotation=None):
     """Запуск планировщика"""
-    scheduler = NotificationScheduler(bot, db, weather_service)
+    scheduler = NotificationScheduler(bot, db, weather_service, quote_rotation)
     scheduler.start()
     return scheduler
\ No newline at end of file
@@ -0,0 +1,129 @@
+import os
+import json
+import socket
+import logging
+from typing import Dict, Optional, Type
+
+logger = logging.getLogger(__name__)
+
+try:
+    import speech_recognition as sr
+except ImportError:
+    sr = None
+
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+
+class SpeechUnrecognized(Exception):
+    """Во фрагменте не найдено речи"""
+
+
+class SpeechBackendError(Exception):
+    """Движок распознавания недоступен или вернул ошибку"""
+
+
+class SpeechBackend:
+    """Движок распознавания речи из 16-битного моно PCM
+
+    Модель загружается один раз при создании (warm_up), после чего recognize
+    можно вызывать из нескольких потоков одновременно.
+    """
+
+    name = "base"
+    # Сколько фрагментов имеет смысл распознавать одновременно (None - без ограничения)
+    max_parallel: Optional[int] = None
+
+    def warm_up(self):
+        """Загрузка модели и проверка доступности"""
+
+    def recognize(self, pcm: bytes, sample_rate: int, language: str = 'ru-RU') -> str:
+        raise NotImplementedError
+
+
+class GoogleSpeechBackend(SpeechBackend):
+    """Google Speech Recognition (веб-API) через speech_recognition
+
+    timeout - предел одного HTTP-запроса (сек): зависший запрос иначе держит
+    поток фрагмента и воркер очереди распознавания бесконечно.
+    """
+
+    name = "google"
+
+    def __init__(self, model_path: Optional[str] = None, timeout: Optional[float] = 15.0):
+        if sr is None:
+            raise SpeechBackendError("speech_recognition is not installed")
+        self.recognizer = sr.Recognizer()
+        self.recognizer.operation_timeout = timeout
+
+    def recognize(self, pcm: bytes, sample_rate: int, language: str = 'ru-RU') -> str:
+        audio_data = sr.AudioData(pcm, sample_rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio_data, language=language, show_all=False)
+        except sr.UnknownValueError:
+            raise SpeechUnrecognized()
+        except sr.RequestError as e:
+            raise SpeechBackendError(str(e))
+        except (socket.timeout, TimeoutError) as e:
+            # Таймаут чтения ответа speech_recognition не оборачивает в RequestError
+            raise SpeechBackendError(f"recognition request timed out: {e}")
+
+
+class VoskSpeechBackend(SpeechBackend):
+    """Локальное распознавание Vosk (Kaldi) на CPU, без сети
+
+    Модель привязана к языку (например, vosk-model-small-ru-0.22), поэтому
+    параметр language игнорируется. Модель общая для всех потоков, на каждый
+    фрагмент создается легкий KaldiRecognizer.
+    """
+
+    name = "vosk"
+    max_parallel = os.cpu_count() or 1
+
+    def __init__(self, model_path: Optional[str] = None, timeout: Optional[float] = None):
+        if vosk is None:
+            raise SpeechBackendError("vosk is not installed")
+        if not model_path or not os.path.isdir(model_path):
+            raise SpeechBackendError(f"Vosk model not found: {model_path}")
+        self.model_path = model_path
+        self.model = None
+
+    def warm_up(self):
+        if self.model is None:
+            vosk.SetLogLevel(-1)
+            try:
+                self.model = vosk.Model(self.model_path)
+            except Exception as e:
+                raise SpeechBackendError(f"Vosk model load failed: {e}")
+            logger.info(f"✅ Модель Vosk загружена: {self.model_path}")
+
+    def recognize(self, pcm: bytes, sample_rate: int, language: str = 'ru-RU') -> str:
+        recognizer = vosk.KaldiRecognizer(self.model, sample_rate)
+        recognizer.AcceptWaveform(pcm)
+        text = json.loads(recognizer.FinalResult()).get("text", "").strip()
+        if not text:
+            raise SpeechUnrecognized()
+        return text
+
+
+BACKENDS: Dict[str, Type[SpeechBackend]] = {
+    GoogleSpeechBackend.name: GoogleSpeechBackend,
+    VoskSpeechBackend.name: VoskSpeechBackend,
+}
+
+
+def create_backend(name: str = "google", model_path: Optional[str] = None,
+                   timeout: Optional[float] = 15.0) -> SpeechBackend:
+    """Создание и прогрев движка по имени из конфигурации (SpeechBackendError, если недоступен)
+
+    timeout - предел запроса к сетевому движку (сек), локальные его не используют.
+    """
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        raise SpeechBackendError(f"Unknown speech backend: {name}")
+
+    backend = backend_class(model_path, timeout)
+    backend.warm_up()
+    return backend
@@ -0,0 +1,152 @@
+import os
+import time
+import uuid
+import tempfile
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+temp_files_removed = metrics.counter(
+    "temp_files_removed_total",
+    "Временные файлы, удаленные уборщиком: expired, disk_limit"
+)
+
+
+class TempStorage:
+    """Временные файлы обработчиков
+
+    Каждое имя уникально (префикс задачи и uuid), поэтому параллельные задачи
+    разных пользователей не пересекаются. Файлы удаляются при выходе из
+    контекста path() или явным release(); то, что осталось после сбоев,
+    подбирает фоновый уборщик: удаляет файлы старше max_age и, если папка
+    заняла больше max_disk_bytes, самые старые из остальных. spool() дает
+    буфер в памяти, который переносится на диск только после spool_size байт.
+    """
+
+    # Файлы моложе этого (сек) уборщик не трогает даже при превышении объема:
+    # ими, скорее всего, еще пользуется задача
+    IN_USE_GRACE = 120
+
+    def __init__(self, root: Optional[str] = None, spool_size: int = 8 * 1024 * 1024,
+                 max_disk_bytes: int = 512 * 1024 * 1024, max_age: float = 3600):
+        self._janitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.configure(root, spool_size, max_disk_bytes, max_age)
+
+    def configure(self, root: Optional[str] = None, spool_size: int = 8 * 1024 * 1024,
+                  max_disk_bytes: int = 512 * 1024 * 1024, max_age: float = 3600):
+        """Настройка из конфигурации (папка создается один раз здесь)"""
+        self.root = Path(root) if root else Path(tempfile.gettempdir()) / "telegram_bot"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.spool_size = spool_size
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+
+    def new_path(self, prefix: str = "job", suffix: str = "") -> Path:
+        """Уникальный путь для файла (сам файл не создается)"""
+        return self.root / f"{prefix}_{uuid.uuid4().hex}{suffix}"
+
+    @contextmanager
+    def path(self, prefix: str = "job", suffix: str = "") -> Iterator[Path]:
+        """Уникальный путь, файл по которому удаляется при выходе из контекста"""
+        path = self.new_path(prefix, suffix)
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    @contextmanager
+    def spool(self):
+        """Файловый объект в памяти, переходящий на диск после spool_size байт"""
+        with tempfile.SpooledTemporaryFile(max_size=self.spool_size, dir=self.root) as buffer:
+            yield buffer
+
+    def release(self, *paths: Path):
+        """Удаление временных файлов"""
+        for path in paths:
+            try:
+                Path(path).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Could not remove temp file {path}: {e}")
+
+    def usage(self) -> int:
+        """Объем файлов во временной папке (байт)"""
+        return sum(stat.st_size for _, stat in self._files())
+
+    def has_room(self, size: int) -> bool:
+        """Поместится ли еще size байт в лимит папки"""
+        return self.usage() + size <= self.max_disk_bytes
+
+    def cleanup(self) -> int:
+        """Проход уборщика: возвращает число удаленных файлов"""
+        now = time.time()
+        files = []
+        removed = 0
+        for path, stat in self._files():
+            if now - stat.st_mtime > self.max_age:
+                self.release(path)
+                temp_files_removed.inc(reason="expired")
+                removed += 1
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            if now - mtime < self.IN_USE_GRACE:
+                break
+            self.release(path)
+            temp_files_removed.inc(reason="disk_limit")
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"🧹 Временные файлы: удалено {removed}, занято {total // 1024} КБ")
+        return removed
+
+    def start_janitor(self, interval: float = 300):
+        """Запуск фонового уборщика"""
+        if self._janitor and self._janitor.is_alive():
+            return
+        self._stop.clear()
+        self._janitor = threading.Thread(
+            target=self._janitor_loop, args=(interval,), name="temp-janitor", daemon=True
+        )
+        self._janitor.start()
+
+    def stop_janitor(self):
+        """Остановка фонового уборщика"""
+        self._stop.set()
+
+    def _janitor_loop(self, interval: float):
+        while not self._stop.is_set():
+            try:
+                self.cleanup()
+            except Exception as e:
+                logger.error(f"Temp storage cleanup error: {e}")
+            self._stop.wait(interval)
+
+    def _files(self):
+        """Файлы папки с их stat (исчезнувшие во время обхода пропускаются)"""
+        files = []
+        try:
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            files.append((entry.path, entry.stat(follow_symlinks=False)))
+                    except FileNotFoundError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return files
+
+
+temp_storage = TempStorage()
@@ -1,102 +1,186 @@
-import os
-import tempfile
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
-import speech_recognition as sr
-from pydub import AudioSegment
+from typing import Callable, List, Optional
 import requests
 
+from services.audio_probe import probe_duration
+from services.audio_segmentation import split_on_silence, trim_silence
+from services.audio_transcoder import AudioTranscoder, AudioTranscodeError
+from services.speech_backends import SpeechBackendError, SpeechUnrecognized, create_backend
+from utils.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+speech_audio_seconds = metrics.counter(
+    "speech_audio_seconds_total",
+    "Секунды аудио до и после удаления тишины: input, sent"
+)
+
+class PartialTranscript(str):
+    """Расшифровка, часть фрагментов которой не распознана из-за ошибки движка
+
+    В тексте такие фрагменты обозначены «[…]»; failed_chunks - их число.
+    Такую расшифровку показывают, но не кэшируют: при повторной отправке
+    записи ее стоит распознать заново.
+    """
+
+    failed_chunks = 0
+
+
 class VoiceRecognizer:
-    """Распознаватель речи из аудио сообщений"""
+    """Распознаватель речи из аудио сообщений
+    
+    Движок выбирается в конфигурации (google или vosk, см. speech_backends).
+    Если выбранный недоступен, используется Google; если недоступен и он -
+    ImportError, и обработчик переключается на заглушку.
+    """
     
-    def __init__(self):
-        self.recognizer = sr.Recognizer()
+    # Длинные записи режутся по паузам на фрагменты такой длины (сек)
+    MIN_CHUNK_SECONDS = 3.0
+    MAX_CHUNK_SECONDS = 20.0
+    
+    def __init__(self, ffmpeg_binary: Optional[str] = None, max_parallel_chunks: int = 4,
+                 backend: str = 'google', model_path: Optional[str] = None,
+                 request_timeout: Optional[float] = 15.0):
+        self.backend = self._create_backend(backend, model_path, request_timeout)
+        logger.info(f"🎤 Движок распознавания речи: {self.backend.name}")
         self.supported_formats = ['.oga', '.ogg', '.wav', '.mp3', '.m4a', '.flac']
+        # Аудио декодируется в PCM в памяти: 16 кГц моно - стандарт для распознавания
+        self.transcoder = AudioTranscoder(sample_rate=16000, ffmpeg_binary=ffmpeg_binary)
+        # Общий пул ограничивает число одновременных запросов к сервису распознавания
+        # (для локального движка - еще и числом ядер)
+        if self.backend.max_parallel:
+            max_parallel_chunks = min(max_parallel_chunks, self.backend.max_parallel)
+        self._chunk_pool = ThreadPoolExecutor(max_workers=max_parallel_chunks, thread_name_prefix="speech-chunk")
+    
+    @property
+    def engine(self) -> str:
+        """Движок и модель, давшие текст (для ключа кэша распознаваний)"""
+        model_path = getattr(self.backend, 'model_path', None)
+        if model_path:
+            return f"{self.backend.name}/{Path(model_path).name}"
+        return self.backend.name
+    
+    @staticmethod
+    def _create_backend(name: str, model_path: Optional[str], request_timeout: Optional[float]):
+        try:
+            return create_backend(name, model_path, request_timeout)
+        except SpeechBackendError as e:
+            if name == 'google':
+                raise ImportError(str(e))
+            logger.error(f"Speech backend {name} unavailable: {e}")
+        try:
+            return create_backend('google', timeout=request_timeout)
+        except SpeechBackendError as e:
+            raise ImportError(str(e))
     
     def recognize_speech(self, audio_path: str, language: str = 'ru-RU') -> str:
         """Распознавание речи из аудио файла"""
         try:
-            # Конвертация в WAV если нужно
-            wav_path = self._convert_to_wav(audio_path)
-            if not wav_path:
+            # Проверка поддержки формата
+            suffix = Path(audio_path).suffix.lower()
+            if suffix not in [fmt.lower() for fmt in self.supported_formats]:
+                logger.error(f"Unsupported audio format: {suffix}")
                 return "Не удалось конвертировать аудио файл"
             
-            # Распознавание речи
-            text = self._recognize_from_wav(wav_path, language)
-            
-            # Очистка временных файлов
-            if wav_path != audio_path:  # Удаляем только если создавали временный файл
-                Path(wav_path).unlink(missing_ok=True)
-            
-            return text
+            return self.recognize_bytes(Path(audio_path).read_bytes(), language)
             
         except Exception as e:
             logger.error(f"Speech recognition error: {e}")
             return "Ошибка распознавания речи"
     
-    def _convert_to_wav(self, audio_path: str) -> Optional[str]:
-        """Конвертация аудио файла в WAV формат"""
+    def recognize_bytes(self, data: bytes, language: str = 'ru-RU',
+                        on_progress: Optional[Callable[[int, int, str], None]] = None) -> str:
+        """Распознавание речи из байтов аудио (скачанное голосовое или аудио файл)"""
         try:
-            audio_path = Path(audio_path)
-            
-            # Если файл уже в WAV формате, возвращаем исходный путь
-            if audio_path.suffix.lower() == '.wav':
-                return str(audio_path)
-            
-            # Проверка поддержки формата
-            if audio_path.suffix.lower() not in [fmt.lower() for fmt in self.supported_formats]:
-                logger.error(f"Unsupported audio format: {audio_path.suffix}")
-                return None
-            
-            # Создание временного файла для WAV
-            temp_dir = Path(tempfile.gettempdir()) / "telegram_bot"
-            temp_dir.mkdir(exist_ok=True)
-            wav_path = temp_dir / f"{audio_path.stem}.wav"
-            
-            # Конвертация с помощью pydub
-            audio = AudioSegment.from_file(str(audio_path))
-            audio = audio.set_frame_rate(16000)  # Стандартная частота для распознавания
-            audio = audio.set_channels(1)  # Моно для лучшего распознавания
-            
-            # Экспорт в WAV
-            audio.export(str(wav_path), format="wav")
-            
-            return str(wav_path)
-            
-        except Exception as e:
+            pcm = self.transcoder.to_pcm(data)
+        except AudioTranscodeError as e:
             logger.error(f"Audio conversion error: {e}")
-            return None
+            return "Не удалось конвертировать аудио файл"
+        
+        return self._recognize_pcm(pcm, language, on_progress)
     
-    def _recognize_from_wav(self, wav_path: str, language: str = 'ru-RU') -> str:
-        """Распознавание речи из WAV файла"""
-        try:
-            with sr.AudioFile(wav_path) as source:
-                # Настройка для шумной среды
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                
-                # Запись аудио данных
-                audio_data = self.recognizer.record(source)
-                
-                # Попытка распознавания через Google Speech Recognition
-                text = self.recognizer.recognize_google(
-                    audio_data,
-                    language=language,
-                    show_all=False
-                )
-                
-                return text
-                
-        except sr.UnknownValueError:
+    def _recognize_pcm(self, pcm: bytes, language: str = 'ru-RU',
+                       on_progress: Optional[Callable[[int, int, str], None]] = None) -> str:
+        """Распознавание речи из PCM буфера
+        
+        Сначала из записи удаляется тишина (записи без речи до движка не
+        доходят), затем она режется по паузам, фрагменты распознаются
+        параллельно и склеиваются по порядку. on_progress(готово, всего,
+        текст) вызывается после каждого фрагмента, кроме последнего; еще не
+        готовые фрагменты обозначены в тексте многоточием. Если движок отказал
+        на части фрагментов, возвращается PartialTranscript.
+        """
+        sample_rate = self.transcoder.sample_rate
+        speech = trim_silence(pcm, sample_rate, AudioTranscoder.SAMPLE_WIDTH)
+        input_seconds = self.transcoder.duration(pcm)
+        sent_seconds = self.transcoder.duration(speech)
+        speech_audio_seconds.inc(input_seconds, stage="input")
+        speech_audio_seconds.inc(sent_seconds, stage="sent")
+        if input_seconds:
+            logger.info(
+                f"🔇 Тишина: убрано {input_seconds - sent_seconds:.1f} с из {input_seconds:.1f} с "
+                f"({(input_seconds - sent_seconds) / input_seconds:.0%})"
+            )
+        if not speech:
             return "Не удалось распознать речь. Возможно, речь нечеткая или слишком тихая."
-        except sr.RequestError as e:
-            logger.error(f"Speech recognition API error: {e}")
+        
+        chunks = [
+            chunk for chunk in split_on_silence(
+                speech, sample_rate, AudioTranscoder.SAMPLE_WIDTH,
+                min_chunk_s=self.MIN_CHUNK_SECONDS, max_chunk_s=self.MAX_CHUNK_SECONDS
+            )
+            if not chunk.silent
+        ]
+        if not chunks:
+            return "Не удалось распознать речь. Возможно, речь нечеткая или слишком тихая."
+        
+        results: List[Optional[str]] = [None] * len(chunks)
+        futures = {
+            self._chunk_pool.submit(self._recognize_chunk, speech[chunk.start:chunk.end], language): index
+            for index, chunk in enumerate(chunks)
+        }
+        failed = 0
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except SpeechUnrecognized:
+                results[index] = ""
+            except SpeechBackendError as e:
+                logger.error(f"Speech recognition API error: {e}")
+                results[index] = "[…]"
+                failed += 1
+            except Exception as e:
+                logger.error(f"Recognition error: {e}")
+                results[index] = "[…]"
+                failed += 1
+            
+            if on_progress and done < len(chunks):
+                try:
+                    on_progress(done, len(chunks), self._join_chunks(results))
+                except Exception as e:
+                    logger.warning(f"Recognition progress callback error: {e}")
+        
+        if failed == len(chunks):
             return "Ошибка сервиса распознавания речи. Попробуйте позже."
-        except Exception as e:
-            logger.error(f"Recognition error: {e}")
-            return "Ошибка при обработке аудио файла."
+        text = self._join_chunks(results)
+        if not text:
+            return "Не удалось распознать речь. Возможно, речь нечеткая или слишком тихая."
+        if failed:
+            text = PartialTranscript(text)
+            text.failed_chunks = failed
+        return text
+    
+    def _recognize_chunk(self, pcm: bytes, language: str) -> str:
+        """Распознавание одного фрагмента выбранным движком"""
+        return self.backend.recognize(pcm, self.transcoder.sample_rate, language)
+    
+    @staticmethod
+    def _join_chunks(results: List[Optional[str]]) -> str:
+        """Склейка фрагментов по порядку (нераспознанные пропускаются)"""
+        return " ".join("…" if text is None else text for text in results if text != "").strip()
     
     def recognize_from_url(self, audio_url: str, language: str = 'ru-RU') -> str:
         """Распознавание речи из URL"""
@@ -105,19 +189,8 @@ class VoiceRecognizer:
             response = requests.get(audio_url, timeout=30)
             response.raise_for_status()
             
-            # Сохранение во временный файл
-            temp_dir = Path(tempfile.gettempdir()) / "telegram_bot"
-            temp_dir.mkdir(exist_ok=True)
-            temp_file = temp_dir / "downloaded_audio"
-            
-            with open(temp_file, 'wb') as f:
-                f.write(response.content)
-            
-            # Распознавание речи
-            text = self.recognize_speech(str(temp_file), language)
-            
-            # Очистка
-            temp_file.unlink(missing_ok=True)
+            # Распознавание прямо из скачанных байтов
+            text = self.recognize_bytes(response.content, language)
             
             return text
             
@@ -136,8 +209,12 @@ class VoiceRecognizer:
     def get_audio_duration(self, audio_path: str) -> Optional[float]:
         """Получение длительности аудио файла"""
         try:
-            audio = AudioSegment.from_file(audio_path)
-            return len(audio) / 1000.0  # Конвертация в секунды
+            data = Path(audio_path).read_bytes()
+            # Сначала по заголовкам контейнера, декодирование - только если формат не распознан
+            duration = probe_duration(data)
+            if duration is not None:
+                return duration
+            return self.transcoder.duration(self.transcoder.to_pcm(data))
         except Exception as e:
             logger.error(f"Audio duration error: {e}")
-            return None
\ No newline at end of file
+            return None
@@ -5,7 +5,10 @@ logger = logging.getLogger(__name__)
 class VoiceRecognizer:
     """Заглушка распознавателя речи"""
     
-    def __init__(self):
+    engine = "stub"
+    
+    def __init__(self, ffmpeg_binary=None, max_parallel_chunks=4, backend='google', model_path=None,
+                 request_timeout=None):
         logger.warning("⚠️ Используется заглушка VoiceRecognizer")
     
     def recognize_speech(self, audio_path: str, language: str = 'ru-RU') -> str:
@@ -15,13 +18,18 @@ class VoiceRecognizer:
             "💡 *Текст распознавания:*\n"
             "Здесь был бы распознанный текст\n\n"
             "⚠️ *Для полного распознавания установите:*\n"
-            "• `pydub`\n"
             "• `speechrecognition`\n"
-            "• `PyAudio`\n\n"
+            "• `ffmpeg` (декодирование голосовых)\n\n"
             "💡 *Команда для установки:*\n"
-            "`pip install pydub speechrecognition pyaudio`"
+            "`pip install speechrecognition`\n\n"
+            "🔌 *Без сети:* `pip install vosk`, модель с alphacephei.com/vosk/models "
+            "и `SPEECH_BACKEND = 'vosk'` в конфигурации"
         )
     
+    def recognize_bytes(self, data: bytes, language: str = 'ru-RU', on_progress=None) -> str:
+        """Заглушка для распознавания из байтов"""
+        return self.recognize_speech("")
+    
     def recognize_from_url(self, audio_url: str, language: str = 'ru-RU') -> str:
         return self.recognize_speech("")
     
@@ -1,45 +1,111 @@
 import requests
-from typing import Dict, Any, Optional
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
 import logging
 
+from utils.metrics import metrics
+from utils.resilience import CircuitBreaker, Bulkhead, CircuitOpenError, BulkheadFullError
+
 logger = logging.getLogger(__name__)
 
+weather_requests = metrics.counter(
+    "weather_requests_total",
+    "Запросы погоды по результату: ok, stale, unavailable"
+)
+weather_latency = metrics.histogram(
+    "weather_api_latency_seconds",
+    "Длительность запросов к API погоды"
+)
+
 class WeatherService:
     """Сервис для работы с погодой"""
-    
-    def __init__(self, api_url: str, timeout: int = 10):
+
+    def __init__(self, api_url: str, timeout: int = 5, max_concurrent: int = 4,
+                 failure_threshold: int = 5, slow_call_seconds: float = 3.0,
+                 reset_timeout: float = 60.0, stale_ttl: int = 3 * 3600, cache_size: int = 1000):
         self.api_url = api_url
         self.timeout = timeout
-    
+        self.stale_ttl = timedelta(seconds=stale_ttl)
+        self.cache_size = cache_size
+        self.breaker = CircuitBreaker(
+            "weather_api",
+            failure_threshold=failure_threshold,
+            slow_call_seconds=slow_call_seconds,
+            reset_timeout=reset_timeout
+        )
+        self.bulkhead = Bulkhead("weather_api", max_concurrent=max_concurrent)
+        # Последние успешные ответы по округленным координатам
+        self._last_good: "OrderedDict[Tuple[float, float], Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
     def get_weather(self, lat: float, lon: float, city_name: str = "Вашем городе") -> Dict[str, Any]:
-        """Получение данных о погоде"""
+        """Получение данных о погоде
+
+        При недоступности API возвращает последние сохраненные данные с пометкой
+        stale и временем updated_at, а если их нет - словарь с available=False.
+        """
+        key = (round(lat, 2), round(lon, 2))
         try:
-            params = {
-                'latitude': lat,
-                'longitude': lon,
-                'current': 'temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,wind_speed_10m,pressure_msl',
-                'timezone': 'auto'
-            }
+            with self.bulkhead:
+                current = self.breaker.call(self._fetch_current, lat, lon)
 
-            response = requests.get(self.api_url, params=params, timeout=self.timeout)
-            data = response.json()
-            current = data.get('current', {})
-            
             weather_desc = self._get_weather_description(current.get('weather_code', 0))
-            
-            return {
+
+            weather = {
                 'city': city_name,
                 'temperature': round(current.get('temperature_2m', 0)),
                 'feels_like': round(current.get('apparent_temperature', 0)),
                 'humidity': round(current.get('relative_humidity_2m', 0)),
                 'wind_speed': round(current.get('wind_speed_10m', 0)),
                 'pressure': round(current.get('pressure_msl', 0)),
-                'description': weather_desc
+                'description': weather_desc,
+                'available': True,
+                'stale': False,
+                'updated_at': datetime.now()
             }
+            self._remember(key, weather)
+            weather_requests.inc(result="ok")
+            return weather
 
+        except (CircuitOpenError, BulkheadFullError) as e:
+            logger.warning(f"Погода не запрошена: {e}")
         except Exception as e:
             logger.error(f"Ошибка получения погоды: {e}")
-            return self._get_fallback_weather(city_name)
+
+        return self._get_cached_weather(key, city_name)
+
+    def _fetch_current(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Запрос текущей погоды к Open-Meteo"""
+        params = {
+            'latitude': lat,
+            'longitude': lon,
+            'current': 'temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,wind_speed_10m,pressure_msl',
+            'timezone': 'auto'
+        }
+
+        started = time.monotonic()
+        try:
+            response = requests.get(self.api_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        finally:
+            weather_latency.observe(time.monotonic() - started)
+
+        current = data.get('current')
+        if not current:
+            raise ValueError("В ответе API нет текущей погоды")
+        return current
+
+    def _remember(self, key: Tuple[float, float], weather: Dict[str, Any]):
+        """Сохранение успешного ответа для работы при сбоях API"""
+        with self._cache_lock:
+            self._last_good[key] = weather
+            self._last_good.move_to_end(key)
+            while len(self._last_good) > self.cache_size:
+                self._last_good.popitem(last=False)
 
     def _get_weather_description(self, weather_code: int) -> str:
         """Преобразование кода погоды в текстовое описание"""
@@ -54,9 +120,14 @@ class WeatherService:
         }
         return weather_mapping.get(weather_code, "Неизвестно")
 
-    def _get_fallback_weather(self, city_name: str) -> Dict[str, Any]:
-        """Резервные данные погоды при ошибке API"""
-        return {
-            'city': city_name, 'temperature': 5, 'feels_like': 3, 'humidity': 75,
-            'wind_speed': 3.0, 'pressure': 1015, 'description': '⛅ Переменная облачность'
-        }
\ No newline at end of file
+    def _get_cached_weather(self, key: Tuple[float, float], city_name: str) -> Dict[str, Any]:
+        """Данные при ошибке API: сохраненные ранее или явная пометка о недоступности"""
+        with self._cache_lock:
+            cached: Optional[Dict[str, Any]] = self._last_good.get(key)
+
+        if cached and datetime.now() - cached['updated_at'] <= self.stale_ttl:
+            weather_requests.inc(result="stale")
+            return {**cached, 'city': city_name, 'stale': True}
+
+        weather_requests.inc(result="unavailable")
+        return {'city': city_name, 'available': False, 'stale': False, 'updated_at': None}
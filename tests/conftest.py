@@ -0,0 +1,14 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database.operations import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Отдельная база SQLite на каждый тест"""
+    return DatabaseManager(str(tmp_path / "test.db"))
@@ -0,0 +1,102 @@
+import io
+import random
+import struct
+import wave
+
+import pytest
+
+from services.audio_probe import probe_duration
+
+# MPEG-1 Layer III, 128 кбит/с, 44,1 кГц, стерео: кадр 417 байт
+MP3_HEADER = b"\xff\xfb\x90\x00"
+MP3_FRAME = MP3_HEADER + bytes(413)
+
+
+def wav_bytes(seconds, rate=16000):
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(bytes(int(seconds * rate) * 2))
+    return output.getvalue()
+
+
+def id3_tag(size, footer=False):
+    synchsafe = bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b"ID3\x04\x00" + (b"\x10" if footer else b"\x00") + synchsafe + bytes(size) + (b"3DI" + bytes(7) if footer else b"")
+
+
+def ogg_page(granule, payload=b""):
+    return b"OggS\x00\x00" + struct.pack("<q", granule) + bytes(13) + payload
+
+
+def opus_head(pre_skip=312):
+    return b"OpusHead\x01\x01" + struct.pack("<H", pre_skip) + bytes(8)
+
+
+def test_wav():
+    assert probe_duration(wav_bytes(2.5)) == pytest.approx(2.5)
+
+
+def test_wav_written_as_stream_uses_total_size():
+    data = bytearray(wav_bytes(1.0))
+    data[40:44] = b"\xff\xff\xff\xff"
+    assert probe_duration(bytes(data[:1024]), total_size=len(data)) == pytest.approx(1.0)
+
+
+def test_cbr_mp3():
+    data = MP3_FRAME * 100
+    assert probe_duration(data) == pytest.approx(len(data) * 8 / 128000)
+
+
+def test_cbr_mp3_after_id3_tag():
+    for tag in (id3_tag(1000), id3_tag(1000, footer=True)):
+        data = tag + MP3_FRAME * 100
+        assert probe_duration(data) == pytest.approx(len(MP3_FRAME * 100) * 8 / 128000)
+
+
+def test_cbr_mp3_from_head_and_total_size():
+    data = MP3_FRAME * 1000
+    assert probe_duration(data[:4096], total_size=len(data)) == pytest.approx(len(data) * 8 / 128000)
+
+
+def test_vbr_mp3_xing_frame_count():
+    # Side info стерео MPEG-1 - 32 байта, за ними заголовок Xing: флаги и число кадров
+    xing = MP3_HEADER + bytes(32) + b"Xing" + struct.pack(">II", 1, 5000)
+    data = xing + bytes(417 - len(xing)) + MP3_FRAME * 10
+    assert probe_duration(data) == pytest.approx(5000 * 1152 / 44100)
+
+
+def test_unconfirmed_mp3_sync_is_rejected():
+    # Синхрослово без следующего кадра на своем месте
+    assert probe_duration(MP3_HEADER + bytes(1000)) is None
+
+
+def test_random_data_is_not_recognized():
+    rng = random.Random(43)
+    for _ in range(200):
+        assert probe_duration(rng.randbytes(4096)) is None
+
+
+def test_ogg_opus_needs_the_last_page():
+    head = ogg_page(0, opus_head()) + ogg_page(0) + bytes(1000)
+    tail = bytes(500) + ogg_page(48000 * 10 + 312)
+    total_size = 1_000_000
+    assert probe_duration(head, total_size=total_size) is None
+    assert probe_duration(head, total_size=total_size, tail=tail) == pytest.approx(10.0)
+    # Запись целиком в data
+    assert probe_duration(head + tail) == pytest.approx(10.0)
+
+
+def test_flac_streaminfo():
+    fields = (44100 << 44) | (1 << 41) | (15 << 36) | (44100 * 7)
+    streaminfo = bytes(10) + fields.to_bytes(8, 'big') + bytes(16)
+    data = b"fLaC" + b"\x80\x00\x00\x22" + streaminfo
+    assert probe_duration(data) == pytest.approx(7.0)
+
+
+def test_m4a_movie_header():
+    mvhd = b"mvhd" + b"\x00" + bytes(3) + bytes(8) + struct.pack(">II", 1000, 65_500)
+    data = struct.pack(">I", 24) + b"ftypM4A " + bytes(12) + b"moov" + mvhd
+    assert probe_duration(data) == pytest.approx(65.5)
@@ -0,0 +1,73 @@
+import array
+import math
+import random
+
+import pytest
+
+from services.audio_segmentation import frame_energies, frame_rms, split_on_silence, trim_silence
+
+RATE = 16000
+FRAME_BYTES = 480 * 2  # 30 мс
+
+
+def tone(seconds, amplitude=8000):
+    return array.array('h', (
+        int(amplitude * math.sin(2 * math.pi * 300 * index / RATE)) for index in range(int(seconds * RATE))
+    )).tobytes()
+
+
+def silence(seconds):
+    return bytes(int(seconds * RATE) * 2)
+
+
+def reference_rms(frame):
+    samples = array.array('h', frame)
+    return int(math.sqrt(sum(sample * sample for sample in samples) / len(samples)))
+
+
+def test_frame_energies_match_per_frame_rms():
+    rng = random.Random(44)
+    samples = array.array('h', (rng.randint(-32768, 32767) for _ in range(480 * 20 + 100)))
+    samples[:480] = array.array('h', [-32768] * 480)
+    pcm = samples.tobytes()
+    expected = [reference_rms(pcm[start:start + FRAME_BYTES]) for start in range(0, len(pcm), FRAME_BYTES)]
+    assert frame_energies(pcm, FRAME_BYTES) == expected
+    assert frame_rms(pcm[:FRAME_BYTES]) == 32768
+
+
+def test_frame_energies_rejects_other_sample_widths():
+    with pytest.raises(ValueError):
+        frame_energies(bytes(FRAME_BYTES), FRAME_BYTES, sample_width=1)
+
+
+def test_trim_silence_drops_edges_and_shortens_pauses():
+    speech = silence(2) + tone(1) + silence(3) + tone(1) + silence(2)
+    trimmed = trim_silence(speech, RATE)
+    seconds = len(trimmed) / (RATE * 2)
+    # Две фразы, паддинг по краям и пауза не длиннее max_pause вместе с паддингом
+    assert 2.0 < seconds < 2.0 + 4 * 0.24 + 0.6 + 0.1
+
+
+def test_trim_silence_drops_clicks_and_pure_silence():
+    assert trim_silence(silence(3), RATE) == b""
+    click = silence(1) + tone(0.03) + silence(1)
+    assert trim_silence(click, RATE) == b""
+
+
+def test_split_on_silence_cuts_in_pauses():
+    speech = tone(2) + silence(0.6) + tone(2) + silence(0.6) + tone(2)
+    chunks = split_on_silence(speech, RATE, min_chunk_s=1.0, max_chunk_s=3.0)
+    assert [chunk.silent for chunk in chunks] == [False, False, False]
+    assert chunks[0].start == 0 and chunks[-1].end == len(speech)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous.end == chunk.start
+    # Разрезы - в паузах, а не внутри фраз
+    cut_seconds = [chunk.start / (RATE * 2) for chunk in chunks[1:]]
+    assert 2.0 <= cut_seconds[0] <= 2.6
+    assert 4.6 <= cut_seconds[1] <= 5.2
+
+
+def test_split_without_pauses_respects_max_chunk():
+    chunks = split_on_silence(tone(10), RATE, min_chunk_s=1.0, max_chunk_s=3.0)
+    assert all(chunk.end - chunk.start <= 3.0 * RATE * 2 for chunk in chunks)
+    assert sum(chunk.end - chunk.start for chunk in chunks) == len(tone(10))
@@ -0,0 +1,53 @@
+import array
+import io
+import math
+import wave
+
+import pytest
+
+from services import audio_transcoder
+from services.audio_transcoder import AudioTranscoder, AudioTranscodeError
+
+
+def wav_bytes(samples, rate=16000, channels=1, width=2):
+    output = io.BytesIO()
+    with wave.open(output, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(width)
+        wav.setframerate(rate)
+        wav.writeframes(samples)
+    return output.getvalue()
+
+
+def tone(seconds, rate=16000, amplitude=8000):
+    return array.array('h', (
+        int(amplitude * math.sin(2 * math.pi * 440 * index / rate)) for index in range(int(seconds * rate))
+    )).tobytes()
+
+
+needs_audioop = pytest.mark.skipif(audio_transcoder.audioop is None, reason="audioop is not available")
+
+
+@needs_audioop
+def test_wav_in_target_format_is_passed_through():
+    pcm = tone(0.5)
+    transcoder = AudioTranscoder(ffmpeg_binary="/nonexistent/ffmpeg")
+    assert transcoder.to_pcm(wav_bytes(pcm)) == pcm
+    assert transcoder.duration(pcm) == 0.5
+
+
+@needs_audioop
+def test_stereo_8bit_wav_is_converted_without_ffmpeg():
+    mono = array.array('B', (128 + (index % 64) for index in range(8000))).tobytes()
+    stereo = bytes(value for sample in mono for value in (sample, sample))
+    transcoder = AudioTranscoder(ffmpeg_binary="/nonexistent/ffmpeg")
+    pcm = transcoder.to_pcm(wav_bytes(stereo, rate=8000, channels=2, width=1))
+    assert transcoder.duration(pcm) == pytest.approx(1.0, abs=0.01)
+
+
+def test_empty_or_undecodable_audio_raises():
+    transcoder = AudioTranscoder(ffmpeg_binary="/nonexistent/ffmpeg")
+    with pytest.raises(AudioTranscodeError):
+        transcoder.to_pcm(b"")
+    with pytest.raises(AudioTranscodeError, match="ffmpeg not found"):
+        transcoder.to_pcm(b"OggS" + bytes(100))
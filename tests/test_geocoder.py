@@ -0,0 +1,67 @@
+import gzip
+import math
+import random
+
+import pytest
+
+from services.geocoder import ReverseGeocoder
+
+
+CITIES = [
+    ("Москва", "Москве", "RU", 55.7558, 37.6173),
+    ("Санкт-Петербург", "Санкт-Петербурге", "RU", 59.9386, 30.3141),
+    ("Анадырь", "Анадыре", "RU", 64.7337, 177.5089),
+    ("Suva", "Suva", "FJ", -18.1416, 178.4419),
+    ("Apia", "Apia", "WS", -13.8333, -171.7667),
+    ("Longyearbyen", "Longyearbyen", "SJ", 78.2232, 15.6267),
+]
+
+
+@pytest.fixture
+def geocoder(tmp_path):
+    path = tmp_path / "cities.tsv.gz"
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for name, locative, country, lat, lon in CITIES:
+            f.write(f"{name}\t{locative}\t{country}\t{lat}\t{lon}\n")
+    return ReverseGeocoder(str(path), max_distance_km=500)
+
+
+def brute_force(geocoder, lat, lon):
+    best = min(
+        range(len(geocoder)),
+        key=lambda i: geocoder._haversine_km(lat, lon, geocoder._latitudes[i], geocoder._longitudes[i])
+    )
+    return geocoder._names[best]
+
+
+def test_nearest_city_and_locative(geocoder):
+    place = geocoder.nearest(55.70, 37.50)
+    assert place.name == "Москва"
+    assert place.name_locative == "Москве"
+    assert place.distance_km < 15
+    assert geocoder.city_name(59.9, 30.3) == "Санкт-Петербурге"
+
+
+def test_nearest_across_antimeridian(geocoder):
+    # Ближайший город - по другую сторону 180-го меридиана
+    assert geocoder.nearest(-16.0, -179.9).name == "Suva"
+    assert geocoder.nearest(64.7, -179.5).name == "Анадырь"
+
+
+def test_nearest_near_pole(geocoder):
+    assert geocoder.nearest(79.0, 5.0).name == "Longyearbyen"
+
+
+def test_too_far_or_invalid_returns_default(geocoder):
+    assert geocoder.nearest(0.0, -30.0) is None
+    assert geocoder.nearest(91.0, 0.0) is None
+    assert geocoder.city_name(0.0, -30.0) == "Вашем городе"
+
+
+def test_matches_brute_force_on_builtin_dataset():
+    geocoder = ReverseGeocoder(max_distance_km=math.inf)
+    rng = random.Random(26)
+    for _ in range(30):
+        lat = math.degrees(math.asin(rng.uniform(-1, 1)))
+        lon = rng.uniform(-180, 180)
+        assert geocoder.nearest(lat, lon).name == brute_force(geocoder, lat, lon)
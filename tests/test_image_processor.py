@@ -0,0 +1,156 @@
+import io
+import random
+
+import pytest
+from PIL import ExifTags, Image, ImageChops, ImageEnhance, ImageFilter
+
+from services.image_processor import BRIGHTNESS, CONTRAST, SATURATION, ImageProcessor
+
+
+def make_image(width, height, seed=0):
+    """Шум поверх градиентов: в изображении есть и резкие перепады, и плавные области"""
+    rng = random.Random(seed)
+    noise = Image.frombytes('RGB', (width, height), rng.randbytes(width * height * 3))
+    gradient = Image.merge('RGB', [
+        Image.linear_gradient('L').resize((width, height)),
+        Image.radial_gradient('L').resize((width, height)),
+        Image.linear_gradient('L').rotate(90).resize((width, height)),
+    ])
+    return Image.blend(gradient, noise, 0.3)
+
+
+def reference_enhance(image):
+    """Исходная цепочка ImageEnhance, с которой должен совпадать процессор"""
+    image = image.filter(ImageFilter.SHARPEN)
+    image = ImageEnhance.Contrast(image).enhance(CONTRAST)
+    image = ImageEnhance.Brightness(image).enhance(BRIGHTNESS)
+    image = ImageEnhance.Color(image).enhance(SATURATION)
+    return image.filter(ImageFilter.SMOOTH)
+
+
+def assert_same_pixels(actual, expected):
+    assert actual.size == expected.size
+    assert ImageChops.difference(actual, expected).getbbox() is None
+
+
+@pytest.fixture
+def processor():
+    return ImageProcessor()
+
+
+@pytest.mark.parametrize("seed, size", [(0, (64, 48)), (1, (257, 130)), (2, (31, 300))])
+def test_enhancement_matches_imageenhance_chain(processor, seed, size):
+    image = make_image(*size, seed=seed)
+    assert_same_pixels(processor._apply_enhancements(image), reference_enhance(image))
+
+
+def test_enhancement_matches_on_dark_image(processor):
+    # Средняя яркость далеко от середины шкалы - другой центр контраста
+    image = Image.eval(make_image(80, 60, seed=3), lambda value: value // 4)
+    assert_same_pixels(processor._apply_enhancements(image), reference_enhance(image))
+
+
+def jpeg_bytes(image, **params):
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=90, **params)
+    return output.getvalue()
+
+
+def test_decode_scales_to_max_side_keeping_aspect(processor):
+    data = jpeg_bytes(make_image(1600, 800))
+    result = processor.process_image_bytes(data, max_side=400, operations=[])
+    assert result['original_size'] == (1600, 800)
+    assert result['size'] == (400, 200)
+    with Image.open(io.BytesIO(result['data'])) as decoded:
+        assert decoded.size == (400, 200)
+
+
+def test_small_image_is_not_upscaled(processor):
+    result = processor.process_image_bytes(jpeg_bytes(make_image(300, 200)), max_side=1280)
+    assert result['size'] == (300, 200)
+
+
+def test_exif_rotation_is_applied_to_pixels(processor):
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    data = jpeg_bytes(make_image(800, 400), exif=exif.tobytes())
+    result = processor.process_image_bytes(data, max_side=200, operations=[])
+    assert result['original_size'] == (400, 800)
+    assert result['size'] == (100, 200)
+
+
+def test_rejects_image_over_pixel_limit(processor):
+    data = jpeg_bytes(make_image(400, 300))
+    assert processor.process_image_bytes(data, max_pixels=100_000) is None
+    assert processor.process_image_bytes(b"not an image") is None
+
+
+def test_operations_chain_is_applied_in_order(processor):
+    data = jpeg_bytes(make_image(1600, 1200))
+    operations = [('enhance', {}), ('resize', {'max_size': (800, 800)}), ('watermark', {'text': "tgbot"})]
+    result = processor.process_image_bytes(data, max_side=1280, operations=operations)
+    assert result['size'] == (800, 600)
+
+    result = processor.process_image_bytes(data, max_side=1280, operations=[('grayscale', {})])
+    with Image.open(io.BytesIO(result['data'])) as decoded:
+        assert decoded.mode == 'L'
+
+
+def test_encode_fits_byte_budget(processor):
+    image = make_image(640, 480, seed=4)
+    unlimited, _, quality = processor.encode(image, quality=90)
+    budget = len(unlimited) // 2
+    data, image_format, chosen = processor.encode(image, quality=90, max_bytes=budget)
+    assert image_format == 'JPEG'
+    assert chosen < quality
+    assert len(data) <= budget
+    # Качество на единицу выше уже не укладывается в объем
+    assert len(processor.encode(image, quality=chosen + 1)[0]) > budget
+
+
+def test_encode_picks_lowest_quality_meeting_psnr(processor):
+    image = make_image(320, 240, seed=5).filter(ImageFilter.GaussianBlur(2))
+    data, _, chosen = processor.encode(image, quality=95, min_psnr=41.0)
+    assert 40 < chosen < 95
+    assert processor._psnr(image, data) >= 41.0
+    lower, _, _ = processor.encode(image, quality=chosen - 1)
+    assert processor._psnr(image, lower) < 41.0
+
+
+def test_encode_webp(processor):
+    data, image_format, _ = processor.encode(make_image(100, 80), format='webp', quality=80)
+    assert image_format == 'WEBP'
+    with Image.open(io.BytesIO(data)) as decoded:
+        assert decoded.format == 'WEBP'
+
+
+@pytest.mark.parametrize("size, strip_rows", [((120, 100), 16), ((90, 65), 7), ((50, 33), 256)])
+def test_strips_match_whole_image_enhancement(processor, size, strip_rows):
+    image = make_image(*size, seed=6)
+    expected = processor._apply_enhancements(image)
+    processor._enhance_strips(image, strip_rows)
+    assert_same_pixels(image, expected)
+
+
+def test_strips_keep_orientation_tag(processor, tmp_path):
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    source = tmp_path / "scan.jpg"
+    source.write_bytes(jpeg_bytes(make_image(300, 200), exif=exif.tobytes()))
+
+    result = processor.process_image_strips(str(source), str(tmp_path / "out.jpg"), strip_rows=64)
+    assert result['size'] == result['original_size'] == (300, 200)
+    with Image.open(result['path']) as output:
+        assert output.size == (300, 200)
+        assert output.getexif().get(ExifTags.Base.Orientation) == 6
+
+
+def test_strips_report_too_large_and_unreadable(processor, tmp_path):
+    source = tmp_path / "scan.png"
+    make_image(400, 300).save(source)
+    result = processor.process_image_strips(str(source), str(tmp_path / "out.jpg"), max_pixels=100_000)
+    assert result == {'error': 'too_large', 'original_size': (400, 300)}
+
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not an image")
+    assert processor.process_image_strips(str(broken), str(tmp_path / "out.jpg")) is None
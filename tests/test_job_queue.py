@@ -0,0 +1,159 @@
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from services.job_queue import (
+    Job, QueueFullError, UserQueueFullError, create_process_queue, create_thread_queue
+)
+
+
+class Outcome:
+    """Результат задачи, доставленный в on_done или on_error"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+    def done(self, value):
+        self.value = value
+        self.event.set()
+
+    def failed(self, error):
+        self.error = error
+        self.event.set()
+
+    def wait(self, timeout=5.0):
+        assert self.event.wait(timeout), "job result was not delivered"
+        return self
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def make_queue():
+    queues = []
+
+    def make(factory=create_thread_queue, **kwargs):
+        queue = factory("test", **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.shutdown()
+
+
+def submit(queue, func, *args, **kwargs):
+    outcome = Outcome()
+    job = queue.submit(func, *args, on_done=outcome.done, on_error=outcome.failed, **kwargs)
+    return job, outcome
+
+
+def test_result_and_error_are_delivered(make_queue):
+    queue = make_queue(workers=1)
+    _, ok = submit(queue, pow, 2, 10)
+    _, failed = submit(queue, int, "not a number")
+    assert ok.wait().value == 1024
+    assert isinstance(failed.wait().error, ValueError)
+
+
+def test_rejects_when_queue_is_full(make_queue):
+    queue = make_queue(workers=1, max_queue=2)
+    release = threading.Event()
+    running, _ = submit(queue, release.wait)
+    wait_until(lambda: running.state == Job.RUNNING)
+
+    first, _ = submit(queue, pow, 1, 1)
+    second, _ = submit(queue, pow, 1, 1)
+    with pytest.raises(QueueFullError):
+        queue.submit(pow, 1, 1)
+    assert queue.position(running) == 0
+    assert (queue.position(first), queue.position(second)) == (1, 2)
+    release.set()
+
+
+def test_cancel_waiting_job(make_queue):
+    queue = make_queue(workers=1)
+    release = threading.Event()
+    running, _ = submit(queue, release.wait)
+    wait_until(lambda: running.state == Job.RUNNING)
+    waiting, outcome = submit(queue, pow, 2, 2)
+
+    assert queue.cancel(waiting.id)
+    assert isinstance(outcome.wait().error, CancelledError)
+    assert queue.pending == 0
+    release.set()
+
+
+def test_timed_out_thread_job_frees_slot_until_spares_run_out(make_queue):
+    queue = make_queue(workers=1, spare_workers=1, job_timeout=0.2)
+    hung = threading.Event()
+    first, first_outcome = submit(queue, hung.wait)
+    assert isinstance(first_outcome.wait().error, TimeoutError)
+    assert first.state == Job.TIMED_OUT
+
+    # Зависшая задача ушла в запасной поток - следующая запускается
+    _, ok = submit(queue, pow, 3, 2)
+    assert ok.wait().value == 9
+
+    # Запасной поток занят второй зависшей задачей - новые задачи ждут
+    second, _ = submit(queue, hung.wait)
+    wait_until(lambda: second.state == Job.TIMED_OUT)
+    blocked, blocked_outcome = submit(queue, pow, 2, 2)
+    time.sleep(0.3)
+    assert blocked.state == Job.WAITING
+
+    hung.set()
+    assert blocked_outcome.wait().value == 4
+
+
+def test_timed_out_process_job_recycles_pool(make_queue):
+    queue = make_queue(create_process_queue, workers=1, job_timeout=1.0)
+    old_executor = queue.executor
+    _, hung = submit(queue, time.sleep, 60)
+    assert isinstance(hung.wait(timeout=30).error, TimeoutError)
+
+    _, ok = submit(queue, pow, 5, 2)
+    assert ok.wait(timeout=30).value == 25
+    assert queue.executor is not old_executor
+
+
+def test_per_user_running_limit_lets_other_users_pass(make_queue):
+    queue = make_queue(workers=2, max_per_user=1)
+    release = threading.Event()
+    first, _ = submit(queue, release.wait, user_id=1)
+    wait_until(lambda: first.state == Job.RUNNING)
+
+    same_user, _ = submit(queue, release.wait, user_id=1)
+    other_user, _ = submit(queue, release.wait, user_id=2)
+    wait_until(lambda: other_user.state == Job.RUNNING)
+    assert same_user.state == Job.WAITING
+    assert queue.position(same_user) == 1
+
+    release.set()
+    wait_until(lambda: same_user.state == Job.DONE)
+
+
+def test_per_user_waiting_limit(make_queue):
+    queue = make_queue(workers=1, max_waiting_per_user=2)
+    release = threading.Event()
+    running, _ = submit(queue, release.wait, user_id=1)
+    wait_until(lambda: running.state == Job.RUNNING)
+
+    submit(queue, pow, 1, 1, user_id=1)
+    submit(queue, pow, 1, 1, user_id=1)
+    with pytest.raises(UserQueueFullError):
+        queue.submit(pow, 1, 1, user_id=1)
+    submit(queue, pow, 1, 1, user_id=2)
+
+    # Чужую задачу отменить нельзя
+    assert not queue.cancel(running.id, user_id=2)
+    release.set()
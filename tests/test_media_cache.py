@@ -0,0 +1,47 @@
+from services.media_cache import MediaCache
+
+
+def test_make_key_is_order_independent():
+    first = MediaCache.make_key("AQAD", "enhance", max_side=1280, format="JPEG")
+    second = MediaCache.make_key("AQAD", "enhance", format="JPEG", max_side=1280)
+    assert first == second
+    assert first != MediaCache.make_key("AQAD", "enhance", format="JPEG", max_side=2560)
+    assert first != MediaCache.make_key("AQAE", "enhance", format="JPEG", max_side=1280)
+
+
+def test_memory_only_cache_evicts_least_recently_used():
+    cache = MediaCache(memory_size=2)
+    cache.put("photo:a:", MediaCache.PHOTO, file_id="A")
+    cache.put("photo:b:", MediaCache.PHOTO, file_id="B")
+    assert cache.get("photo:a:").file_id == "A"
+
+    cache.put("photo:c:", MediaCache.PHOTO, file_id="C")
+    assert cache.get("photo:b:") is None
+    assert cache.get("photo:a:").file_id == "A"
+    assert cache.get("photo:c:").file_id == "C"
+
+
+def test_entries_survive_restart(db):
+    MediaCache(db).put("transcript:v:language=ru-RU", MediaCache.TRANSCRIPT, text="привет")
+
+    entry = MediaCache(db).get("transcript:v:language=ru-RU")
+    assert entry.kind == MediaCache.TRANSCRIPT
+    assert entry.text == "привет"
+
+
+def test_invalidate_removes_from_memory_and_database(db):
+    cache = MediaCache(db)
+    cache.put("photo:a:", MediaCache.PHOTO, file_id="A")
+    cache.invalidate("photo:a:")
+    assert cache.get("photo:a:") is None
+    assert MediaCache(db).get("photo:a:") is None
+
+
+def test_table_is_trimmed_to_max_entries(db):
+    cache = MediaCache(db, memory_size=1, max_entries=10)
+    for index in range(MediaCache.TRIM_EVERY):
+        cache.put(f"photo:{index}:", MediaCache.PHOTO, file_id=str(index))
+
+    fresh = MediaCache(db)
+    assert fresh.get("photo:0:") is None
+    assert fresh.get(f"photo:{MediaCache.TRIM_EVERY - 1}:").file_id == str(MediaCache.TRIM_EVERY - 1)
@@ -0,0 +1,48 @@
+import threading
+from types import SimpleNamespace
+
+from services.media_group import MediaGroupCollector
+
+
+def message(message_id, group="album", chat_id=1):
+    return SimpleNamespace(message_id=message_id, media_group_id=group, chat=SimpleNamespace(id=chat_id))
+
+
+class Batches:
+    def __init__(self):
+        self.items = []
+        self.ready = threading.Event()
+
+    def __call__(self, messages):
+        self.items.append([item.message_id for item in messages])
+        self.ready.set()
+
+
+def test_album_is_delivered_once_sorted_after_window():
+    batches = Batches()
+    collector = MediaGroupCollector(batches, window=0.1)
+    for message_id in (3, 1, 2):
+        collector.add(message(message_id))
+
+    assert batches.ready.wait(2)
+    assert batches.items == [[1, 2, 3]]
+
+
+def test_full_album_is_delivered_without_waiting():
+    batches = Batches()
+    collector = MediaGroupCollector(batches, window=60, max_items=2)
+    collector.add(message(1))
+    collector.add(message(2))
+    assert batches.items == [[1, 2]]
+
+
+def test_groups_are_kept_apart_by_chat_and_group_id():
+    batches = Batches()
+    collector = MediaGroupCollector(batches, window=60, max_items=2)
+    collector.add(message(1, chat_id=1))
+    collector.add(message(2, chat_id=2))
+    collector.add(message(3, group="other", chat_id=1))
+    assert batches.items == []
+
+    collector.add(message(4, chat_id=1))
+    assert batches.items == [[1, 4]]
@@ -0,0 +1,49 @@
+import io
+import zipfile
+
+import pytest
+
+from services.qr_bulk import QRBulkError, QRBulkGenerator, archive_name, parse_payloads
+
+
+def test_csv_takes_first_column_and_skips_known_header():
+    data = "url;comment\nhttps://a.example;first\n\nhttps://b.example;second\n".encode()
+    assert parse_payloads(data, file_name="links.CSV") == ["https://a.example", "https://b.example"]
+
+
+def test_csv_first_row_is_data_unless_named_as_header():
+    data = b"https://a.example,1\nhttps://b.example,2\n"
+    assert parse_payloads(data, file_name="links.csv") == ["https://a.example", "https://b.example"]
+
+
+def test_text_file_keeps_every_line_as_is():
+    data = "url\nпривет, мир\n  https://a.example  \n".encode('cp1251')
+    assert parse_payloads(data, file_name="list.txt") == ["url", "привет, мир", "https://a.example"]
+
+
+def test_row_limit_and_empty_file():
+    with pytest.raises(QRBulkError):
+        parse_payloads(b"a\nb\nc\n", max_rows=2)
+    with pytest.raises(QRBulkError):
+        parse_payloads(b"\n  \n")
+
+
+def test_archive_name_is_safe():
+    assert archive_name(7, "https://example.com/a b?x=1") == "0007_example.com_a_b_x_1.png"
+    assert archive_name(8, "../../", 'svg') == "0008_qr.svg"
+
+
+def test_build_zip_keeps_row_order():
+    payloads = [f"https://example.com/item/{index}" for index in range(7)]
+    generator = QRBulkGenerator(workers=1, batch_size=3)
+    output = io.BytesIO()
+    try:
+        stats = generator.build_zip(payloads, output)
+    finally:
+        generator.shutdown()
+
+    assert stats['codes'] == 7 and stats['failed'] == 0
+    with zipfile.ZipFile(output) as archive:
+        names = archive.namelist()
+        assert names == [archive_name(index + 1, payload) for index, payload in enumerate(payloads)]
+        assert all(archive.read(name).startswith(b"\x89PNG") for name in names)
@@ -0,0 +1,78 @@
+import io
+import re
+from unittest.mock import patch
+from xml.etree import ElementTree
+
+from PIL import Image
+
+from services.qr_generator import QRCodeService, render_png, render_svg
+
+
+def test_repeated_request_is_served_from_cache():
+    service = QRCodeService()
+    first = service.generate_qr("https://example.com").getvalue()
+    with patch("qrcode.QRCode", side_effect=AssertionError("generated again")):
+        assert service.generate_qr("https://example.com").getvalue() == first
+
+
+def test_cache_key_covers_rendering_parameters():
+    service = QRCodeService()
+    base = service.cache_key("https://example.com")
+    assert base == service.cache_key("https://example.com", fill_color='black', box_size=10)
+    assert base != service.cache_key("https://example.com", fill_color='navy')
+    assert base != service.cache_key("https://example.com", output_format='svg')
+    assert base != service.cache_key("https://example.org")
+
+
+def test_file_ids_are_remembered_and_forgotten():
+    service = QRCodeService()
+    key = service.cache_key("https://example.com")
+    assert service.get_file_id(key) is None
+    service.remember_file_id(key, "AgACAgIAAxkBAAI")
+    assert service.get_file_id(key) == "AgACAgIAAxkBAAI"
+    service.forget_file_id(key)
+    assert service.get_file_id(key) is None
+
+
+MATRIX = [
+    [True, False, True],
+    [False, True, False],
+    [True, True, False],
+]
+
+
+def test_png_is_one_bit_palette_scaled_without_smoothing():
+    data = render_png(MATRIX, box_size=4, fill_color=(0, 0, 128), back_color='yellow')
+    # IHDR: глубина 1 бит, тип цвета 3 (палитра)
+    assert data[24:26] == b"\x01\x03"
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.mode in ('P', '1')
+        assert image.size == (12, 12)
+        rgb = image.convert('RGB')
+    for y, row in enumerate(MATRIX):
+        for x, dark in enumerate(row):
+            expected = (0, 0, 128) if dark else (255, 255, 0)
+            for dx, dy in ((0, 0), (3, 3)):
+                assert rgb.getpixel((x * 4 + dx, y * 4 + dy)) == expected
+
+
+def test_svg_covers_exactly_the_dark_modules():
+    data = render_svg(MATRIX, box_size=10, fill_color=(0, 0, 128), back_color='white')
+    root = ElementTree.fromstring(data)
+    assert root.get('width') == "30" and root.get('viewBox') == "0 0 3 3"
+
+    path = root.find('{http://www.w3.org/2000/svg}path')
+    assert path.get('fill') == "rgb(0,0,128)"
+    # Каждая полоса - M{x} {y}h{длина}v1h-{длина}z
+    dark = set()
+    for x, y, length in re.findall(r"M(\d+) (\d+)h(\d+)v1h-\3z", path.get('d')):
+        dark.update((int(x) + offset, int(y)) for offset in range(int(length)))
+    assert dark == {(x, y) for y, row in enumerate(MATRIX) for x, dark in enumerate(row) if dark}
+
+
+def test_generate_qr_in_both_formats():
+    service = QRCodeService()
+    png = service.generate_qr("https://example.com").getvalue()
+    svg = service.generate_qr("https://example.com", output_format='svg').getvalue()
+    assert png.startswith(b"\x89PNG")
+    assert svg.startswith(b"<svg")
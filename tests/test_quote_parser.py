@@ -0,0 +1,111 @@
+import requests
+
+from services.quote_parser import QuoteParser
+
+
+def page_html(*texts):
+    blocks = "".join(
+        f'<div class="node__content"><p>{text}</p><cite>Автор {index}</cite></div>'
+        for index, text in enumerate(texts)
+    )
+    return f"<html><body>{blocks}</body></html>".encode()
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+class FakeSite:
+    """Подборка цитат: страницы с ETag, 404 за концом подборки, сбои по запросу"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.failing = set()
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        page = (params or {}).get('page', 0)
+        self.requests.append(page)
+        if page in self.failing:
+            return FakeResponse(500)
+        if page not in self.pages:
+            return FakeResponse(404)
+        etag = f'"{page}-{hash(self.pages[page])}"'
+        if (headers or {}).get('If-None-Match') == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.pages[page], {'ETag': etag})
+
+
+def make_parser(pages):
+    parser = QuoteParser(base_url="http://quotes.test")
+    parser.session = FakeSite(pages)
+    return parser
+
+
+PAGES = {
+    0: page_html("Первая цитата страницы ноль"),
+    1: page_html("Цитата первой страницы номер один", "Цитата первой страницы номер два"),
+    2: page_html("Цитата второй страницы подборки"),
+}
+
+
+def test_first_pass_collects_all_pages_until_404():
+    parser = make_parser(dict(PAGES))
+    changed, stats = parser.refresh(max_pages=5)
+    assert [quote['text'] for quote in changed] == [
+        "Первая цитата страницы ноль",
+        "Цитата первой страницы номер один",
+        "Цитата первой страницы номер два",
+        "Цитата второй страницы подборки",
+    ]
+    assert changed[0]['author'] == "Автор 0"
+    assert parser.session.requests == [0, 1, 2, 3]
+    assert stats['errors'] == 0
+
+
+def test_unchanged_pages_are_not_parsed_again():
+    parser = make_parser(dict(PAGES))
+    parser.refresh(max_pages=5)
+    parser.session.pages[2] = page_html("Новая цитата второй страницы")
+
+    changed, stats = parser.refresh(max_pages=5)
+    assert [quote['text'] for quote in changed] == ["Новая цитата второй страницы"]
+    assert stats['not_modified'] == 2
+    assert len(parser.quotes) == 4
+
+
+def test_paging_continues_where_previous_pass_stopped():
+    parser = make_parser(dict(PAGES))
+    parser.refresh(max_pages=1)
+    parser.session.requests.clear()
+    parser.refresh(max_pages=1)
+    assert parser.session.requests == [0, 2]
+
+
+def test_error_keeps_quotes_already_fetched():
+    parser = make_parser(dict(PAGES))
+    parser.session.failing.add(2)
+    changed, stats = parser.refresh(max_pages=5)
+    assert len(changed) == 3
+    assert stats['errors'] == 1
+
+    # Страница с ошибкой запрашивается снова в следующем проходе
+    parser.session.failing.clear()
+    changed, _ = parser.refresh(max_pages=5)
+    assert [quote['text'] for quote in changed] == ["Цитата второй страницы подборки"]
+
+
+def test_reset_forgets_validators():
+    parser = make_parser(dict(PAGES))
+    parser.refresh(max_pages=5)
+    parser.reset()
+    changed, stats = parser.refresh(max_pages=5)
+    assert len(changed) == 4
+    assert stats['not_modified'] == 0
@@ -0,0 +1,62 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from database.models import Quote
+from services.quote_rotation import QuoteRotation, permute
+from services.quote_store import QuoteStore, quote_hash
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 10, 17, 64, 100, 1000])
+def test_permute_is_a_bijection(size):
+    for seed in (0, 1, 0xDEADBEEF):
+        assert sorted(permute(index, size, seed) for index in range(size)) == list(range(size))
+
+
+def test_seeds_give_different_orders():
+    orders = {tuple(permute(index, 50, seed) for index in range(50)) for seed in range(5)}
+    assert len(orders) == 5
+
+
+def make_store(db, count):
+    store = QuoteStore(db, parser=MagicMock())
+    store.add([Quote(text=f"Цитата {index}", author="Автор", text_hash=quote_hash(f"Цитата {index}"))
+               for index in range(count)])
+    return store
+
+
+@pytest.mark.parametrize("use_db", [False, True])
+def test_no_repeats_within_a_round(db, use_db):
+    store = make_store(db if use_db else None, 25)
+    rotation = QuoteRotation(store, db if use_db else None)
+    first_round = [rotation.next_quote(user_id=1)['text'] for _ in range(25)]
+    assert len(set(first_round)) == 25
+
+    # Второй круг - снова весь корпус, в новом порядке
+    second_round = [rotation.next_quote(user_id=1)['text'] for _ in range(25)]
+    assert set(second_round) == set(first_round)
+
+
+def test_rotation_state_survives_restart(db):
+    store = make_store(db, 10)
+    seen = [QuoteRotation(store, db).next_quote(user_id=1)['text'] for _ in range(5)]
+    seen += [QuoteRotation(store, db).next_quote(user_id=1)['text'] for _ in range(5)]
+    assert len(set(seen)) == 10
+
+
+def test_quotes_added_mid_round_join_next_round(db):
+    store = make_store(db, 5)
+    rotation = QuoteRotation(store, db)
+    seen = [rotation.next_quote(user_id=1)['text'] for _ in range(3)]
+    store.add([Quote(text="Новая", author="Автор", text_hash=quote_hash("Новая"))])
+    seen += [rotation.next_quote(user_id=1)['text'] for _ in range(2)]
+    assert "Новая" not in seen and len(set(seen)) == 5
+
+    next_round = [rotation.next_quote(user_id=1)['text'] for _ in range(6)]
+    assert "Новая" in next_round and len(set(next_round)) == 6
+
+
+def test_empty_corpus_serves_fallback():
+    store = QuoteStore(parser=MagicMock())
+    store.parser._get_fallback_quote.return_value = {'text': "резерв"}
+    assert QuoteRotation(store).next_quote(user_id=1) == {'text': "резерв"}
@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.quote_store import QuoteStore, quote_hash
+
+
+def fake_parser(*pages):
+    parser = MagicMock()
+    parser.refresh.side_effect = [(quotes, None) for quotes in pages]
+    parser._get_fallback_quote.return_value = {'text': "резерв", 'author': "—", 'full': "«резерв»"}
+    return parser
+
+
+def quote(text, author="Автор"):
+    return {'text': text, 'author': author}
+
+
+def test_quote_hash_ignores_case_spaces_and_quotes():
+    assert quote_hash("«Жизнь  прекрасна.»") == quote_hash("жизнь прекрасна")
+    assert quote_hash("Жизнь прекрасна") != quote_hash("Жизнь сложна")
+
+
+@pytest.mark.parametrize("use_db", [False, True])
+def test_harvest_adds_only_new_quotes(db, use_db):
+    parser = fake_parser(
+        [quote("Первая"), quote("Вторая"), quote("«первая»")],
+        [quote("Вторая"), quote("Третья")],
+    )
+    store = QuoteStore(db if use_db else None, parser=parser)
+    assert store.harvest() == 2
+    assert store.harvest() == 1
+    assert store.count() == 3
+    assert [store.get_quote(index)['text'] for index in range(3)] == ["Первая", "Вторая", "Третья"]
+    assert store.get_quote(3) is None
+
+
+def test_corpus_persists_in_database(db):
+    QuoteStore(db, parser=fake_parser([quote("Первая")])).harvest()
+    store = QuoteStore(db, parser=fake_parser())
+    assert store.count() == 1
+    assert store.get_random_quote()['full'] == "«Первая»\n\n— Автор"
+
+
+def test_empty_corpus_serves_fallback():
+    store = QuoteStore(parser=fake_parser())
+    assert store.get_random_quote()['text'] == "резерв"
+
+
+def test_failed_save_resets_parser_validators():
+    parser = fake_parser([quote("Первая")])
+    store = QuoteStore(MagicMock(), parser=parser)
+    store.db.add_quotes.side_effect = RuntimeError("database is locked")
+    with pytest.raises(RuntimeError):
+        store.harvest()
+    parser.reset.assert_called_once()
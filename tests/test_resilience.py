@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from utils.resilience import Bulkhead, BulkheadFullError, CircuitBreaker, CircuitOpenError
+
+
+def fail():
+    raise ConnectionError("down")
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test-open", failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+    assert calls == []
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker("test-reset", failure_threshold=2)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_slow_call_counts_as_failure():
+    breaker = CircuitBreaker("test-slow", failure_threshold=1, slow_call_seconds=1.0)
+    breaker.record_success(duration=2.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_allows_single_trial():
+    breaker = CircuitBreaker("test-half-open", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_success(duration=0.0)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker("test-reopen", failure_threshold=5, reset_timeout=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.06)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_bulkhead_rejects_over_limit():
+    bulkhead = Bulkhead("test-bulkhead", max_concurrent=2, acquire_timeout=0.05)
+    entered = threading.Barrier(3)
+    release = threading.Event()
+
+    def hold():
+        with bulkhead:
+            entered.wait()
+            release.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    entered.wait()
+    try:
+        with pytest.raises(BulkheadFullError):
+            with bulkhead:
+                pass
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    with bulkhead:
+        pass
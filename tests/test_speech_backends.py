@@ -0,0 +1,41 @@
+import socket
+from unittest.mock import patch
+
+import pytest
+
+from services import speech_backends
+from services.speech_backends import GoogleSpeechBackend, SpeechBackendError, create_backend
+from services.voice_recognizer import VoiceRecognizer
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(SpeechBackendError, match="Unknown speech backend"):
+        create_backend("whisper")
+
+
+def test_vosk_without_model_is_rejected(tmp_path):
+    with pytest.raises(SpeechBackendError):
+        create_backend("vosk", str(tmp_path / "missing-model"))
+
+
+def test_recognizer_falls_back_to_google():
+    recognizer = VoiceRecognizer(backend="vosk", model_path="/nonexistent/model")
+    assert recognizer.backend.name == "google"
+    assert recognizer.engine == "google"
+
+
+def test_engine_includes_model_name():
+    recognizer = VoiceRecognizer()
+    recognizer.backend.model_path = "/models/vosk-model-small-ru-0.22/"
+    recognizer.backend.name = "vosk"
+    assert recognizer.engine == "vosk/vosk-model-small-ru-0.22"
+
+
+@pytest.mark.skipif(speech_backends.sr is None, reason="speech_recognition is not installed")
+def test_google_request_timeout():
+    backend = GoogleSpeechBackend(timeout=2.5)
+    assert backend.recognizer.operation_timeout == 2.5
+
+    with patch.object(backend.recognizer, 'recognize_google', side_effect=socket.timeout("timed out")):
+        with pytest.raises(SpeechBackendError, match="timed out"):
+            backend.recognize(bytes(3200), 16000)
@@ -0,0 +1,65 @@
+import os
+import time
+
+from services.temp_storage import TempStorage
+
+
+def write(path, size, age=0.0):
+    path.write_bytes(bytes(size))
+    if age:
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_paths_are_unique_and_released(tmp_path):
+    storage = TempStorage(str(tmp_path))
+    assert storage.new_path("photo", ".jpg") != storage.new_path("photo", ".jpg")
+
+    with storage.path("photo", ".jpg") as path:
+        assert path.parent == tmp_path and path.name.startswith("photo_") and path.suffix == ".jpg"
+        path.write_bytes(b"data")
+    assert not path.exists()
+
+
+def test_path_is_released_on_error(tmp_path):
+    storage = TempStorage(str(tmp_path))
+    try:
+        with storage.path() as path:
+            path.write_bytes(b"data")
+            raise RuntimeError("task failed")
+    except RuntimeError:
+        pass
+    assert not path.exists()
+
+
+def test_spool_stays_in_memory_until_limit(tmp_path):
+    storage = TempStorage(str(tmp_path), spool_size=1024)
+    with storage.spool() as buffer:
+        buffer.write(bytes(1000))
+        assert not buffer._rolled
+        buffer.write(bytes(1000))
+        assert buffer._rolled
+    assert storage.usage() == 0
+
+
+def test_cleanup_removes_expired_files(tmp_path):
+    storage = TempStorage(str(tmp_path), max_age=600)
+    old = write(tmp_path / "old", 10, age=3600)
+    fresh = write(tmp_path / "fresh", 10)
+    assert storage.cleanup() == 1
+    assert not old.exists() and fresh.exists()
+
+
+def test_cleanup_enforces_disk_limit_oldest_first(tmp_path):
+    storage = TempStorage(str(tmp_path), max_disk_bytes=250, max_age=3600)
+    oldest = write(tmp_path / "oldest", 100, age=1000)
+    older = write(tmp_path / "older", 100, age=900)
+    recent = write(tmp_path / "recent", 100, age=800)
+    # Файл, которым, вероятно, еще пользуется задача, не удаляется
+    in_use = write(tmp_path / "in_use", 100)
+
+    assert not storage.has_room(1)
+    storage.cleanup()
+    assert not oldest.exists() and not older.exists()
+    assert recent.exists() and in_use.exists()
@@ -0,0 +1,78 @@
+import struct
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from handlers.voice_photo import VoicePhotoHandler
+from services.audio_probe import PROBE_HEAD_BYTES, PROBE_TAIL_BYTES
+
+
+@pytest.fixture
+def make_handler(db):
+    def make(**kwargs):
+        return VoicePhotoHandler(
+            MagicMock(), db, MagicMock(), image_queue=MagicMock(),
+            transcription_queue=MagicMock(), long_transcription_queue=MagicMock(), **kwargs
+        )
+    return make
+
+
+PHOTO = {'file_id': "file-1", 'file_unique_id': "unique-1"}
+
+
+def test_photo_cache_key_depends_on_preset_operations(make_handler):
+    handler = make_handler()
+    keys = {handler._photo_cache_key(PHOTO, preset) for preset in VoicePhotoHandler.PHOTO_PRESETS}
+    assert len(keys) == len(VoicePhotoHandler.PHOTO_PRESETS)
+
+    # Другой текст водяного знака - другой результат
+    other = make_handler(photo_watermark="other")
+    assert other._photo_cache_key(PHOTO, 'watermark') != handler._photo_cache_key(PHOTO, 'watermark')
+    assert other._photo_cache_key(PHOTO, 'enhance') == handler._photo_cache_key(PHOTO, 'enhance')
+
+
+def test_photo_cache_key_depends_on_encoding(make_handler):
+    jpeg = make_handler(photo_encoding={'format': 'JPEG', 'quality': 85})
+    webp = make_handler(photo_encoding={'format': 'WEBP', 'quality': 85})
+    budget = make_handler(photo_encoding={'format': 'JPEG', 'quality': 85, 'max_bytes': 200_000})
+    keys = {handler._photo_cache_key(PHOTO, 'enhance') for handler in (jpeg, webp, budget)}
+    assert len(keys) == 3
+
+
+def test_transcript_cache_key_depends_on_engine(make_handler):
+    handler = make_handler()
+    media = SimpleNamespace(file_unique_id="voice-1")
+    google_key = handler._transcript_cache_key(media)
+
+    handler.voice_recognizer.backend.name = "vosk"
+    handler.voice_recognizer.backend.model_path = "/models/vosk-model-small-ru-0.22"
+    assert handler._transcript_cache_key(media) != google_key
+
+
+def test_long_audio_is_rejected_from_header_ranges(make_handler):
+    handler = make_handler(audio_max_duration=900)
+    handler.bot.get_file.return_value = SimpleNamespace(file_size=5_000_000, file_path="music/file_1.ogg")
+    head = b"OggS\x00\x02" + bytes(21) + b"OpusHead\x01\x01" + struct.pack("<H", 312) + bytes(8)
+    tail = b"OggS\x00\x04" + struct.pack("<q", 48000 * 1000) + bytes(13)
+    ranges = []
+
+    def download_range(file_path, byte_range):
+        ranges.append(byte_range)
+        return head if byte_range.startswith("0-") else tail
+
+    handler._download_range = download_range
+    audio = SimpleNamespace(file_id="file-1", file_size=None, duration=None)
+    rejection, _, duration = handler._preflight_audio(audio)
+    assert rejection.startswith("❌ Запись слишком длинная")
+    assert duration == pytest.approx(1000, abs=0.01)
+    assert ranges == [f"0-{PROBE_HEAD_BYTES - 1}", f"-{PROBE_TAIL_BYTES}"]
+
+
+def test_audio_routed_by_reported_duration(make_handler):
+    handler = make_handler(audio_long_duration=120)
+    short = SimpleNamespace(file_id="file-1", file_size=1000, duration=30)
+    long = SimpleNamespace(file_id="file-2", file_size=1000, duration=300)
+    assert handler._preflight_audio(short) == (None, handler.transcription_queue, 30)
+    assert handler._preflight_audio(long) == (None, handler.long_transcription_queue, 300)
+    handler.bot.get_file.assert_not_called()
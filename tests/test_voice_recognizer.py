@@ -0,0 +1,84 @@
+import array
+import math
+
+import pytest
+
+from services.speech_backends import SpeechBackend, SpeechBackendError, SpeechUnrecognized
+from services.voice_recognizer import PartialTranscript, VoiceRecognizer
+
+RATE = 16000
+
+
+def tone(seconds, amplitude):
+    return array.array('h', (
+        int(amplitude * math.sin(2 * math.pi * 300 * index / RATE)) for index in range(int(seconds * RATE))
+    )).tobytes()
+
+
+def silence(seconds):
+    return bytes(int(seconds * RATE) * 2)
+
+
+class FakeBackend(SpeechBackend):
+    """Движок, «узнающий» фрагмент по его громкости"""
+
+    name = "fake"
+    WORDS = {4000: "один", 8000: "два", 12000: "три"}
+
+    def __init__(self, failing=(), unrecognized=()):
+        self.failing = failing
+        self.unrecognized = unrecognized
+
+    def recognize(self, pcm, sample_rate, language='ru-RU'):
+        peak = max(array.array('h', pcm))
+        amplitude = min(self.WORDS, key=lambda level: abs(level - peak))
+        if amplitude in self.failing:
+            raise SpeechBackendError("service unavailable")
+        if amplitude in self.unrecognized:
+            raise SpeechUnrecognized()
+        return self.WORDS[amplitude]
+
+
+@pytest.fixture
+def recognizer():
+    recognizer = VoiceRecognizer(ffmpeg_binary="/nonexistent/ffmpeg")
+    # Короткие фрагменты, чтобы запись из трех фраз разбилась на три
+    recognizer.MIN_CHUNK_SECONDS = 1.0
+    recognizer.MAX_CHUNK_SECONDS = 3.0
+    return recognizer
+
+
+# Три фразы разной громкости, разделенные паузами
+SPEECH = silence(0.5) + tone(2, 4000) + silence(0.8) + tone(2, 8000) + silence(0.8) + tone(2, 12000) + silence(0.5)
+
+
+def test_chunks_are_joined_in_order(recognizer):
+    recognizer.backend = FakeBackend()
+    progress = []
+    text = recognizer._recognize_pcm(SPEECH, on_progress=lambda done, total, text: progress.append((done, total)))
+    assert text == "один два три"
+    assert not isinstance(text, PartialTranscript)
+    assert progress == [(1, 3), (2, 3)]
+
+
+def test_failed_chunks_give_partial_transcript(recognizer):
+    recognizer.backend = FakeBackend(failing=(8000,))
+    text = recognizer._recognize_pcm(SPEECH)
+    assert isinstance(text, PartialTranscript)
+    assert text == "один […] три"
+    assert text.failed_chunks == 1
+
+
+def test_unrecognized_chunks_are_skipped(recognizer):
+    recognizer.backend = FakeBackend(unrecognized=(8000,))
+    assert recognizer._recognize_pcm(SPEECH) == "один три"
+
+
+def test_all_chunks_failed(recognizer):
+    recognizer.backend = FakeBackend(failing=(4000, 8000, 12000))
+    assert recognizer._recognize_pcm(SPEECH) == "Ошибка сервиса распознавания речи. Попробуйте позже."
+
+
+def test_silence_never_reaches_backend(recognizer):
+    recognizer.backend = FakeBackend(failing=(4000, 8000, 12000))
+    assert recognizer._recognize_pcm(silence(5)).startswith("Не удалось распознать речь")
@@ -0,0 +1,127 @@
+"""
+Сборка встроенного набора городов для офлайн-геокодера.
+
+Источник - дамп GeoNames cities15000.txt (города с населением от 15 000):
+https://download.geonames.org/export/dump/cities15000.zip (CC BY 4.0)
+
+Русские названия и формы предложного падежа ("в Москве") подбираются
+с помощью pymorphy3, если он установлен (нужен только для сборки).
+
+Запуск:
+    python tools/build_cities_dataset.py cities15000.txt services/data/cities15000.tsv.gz
+"""
+import sys
+import gzip
+import re
+from difflib import SequenceMatcher
+
+try:
+    import pymorphy3
+    morph = pymorphy3.MorphAnalyzer()
+except ImportError:
+    morph = None
+
+# Только буквы русского алфавита (отсекаем украинские, белорусские и т.п. варианты)
+RUSSIAN_NAME = re.compile(r"^[А-Яа-яЁё][А-Яа-яЁё\- ]*$")
+
+TRANSLIT = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya'
+}
+
+
+def _transliterate(name: str) -> str:
+    """Упрощенная транслитерация для сравнения с латинским названием"""
+    return ''.join(TRANSLIT.get(ch, ch) for ch in name.lower())
+
+
+def _geox_score(name: str) -> float:
+    """Насколько уверенно словарь считает название русским топонимом"""
+    if not morph:
+        return 0.0
+    return max(
+        (parse.score for parse in morph.parse(name) if 'Geox' in parse.tag),
+        default=0.0
+    )
+
+
+def pick_russian_name(name: str, alternate_names: str) -> str:
+    """Выбор русского названия города среди альтернативных"""
+    candidates = [
+        alt for alt in alternate_names.split(',')
+        if RUSSIAN_NAME.match(alt)
+    ]
+    if not candidates:
+        return name
+
+    # Сначала словарные топонимы, затем ближайшие к основному названию
+    latin = name.lower()
+    return max(
+        candidates,
+        key=lambda alt: (
+            _geox_score(alt),
+            SequenceMatcher(None, _transliterate(alt), latin).ratio()
+        )
+    )
+
+
+def _restore_case(inflected: str, original: str) -> str:
+    """Перенос заглавных букв исходного слова на склоненную форму"""
+    parts = inflected.split('-')
+    original_parts = original.split('-')
+    if len(parts) != len(original_parts):
+        return inflected.capitalize()
+    return '-'.join(
+        part.capitalize() if orig[:1].isupper() else part
+        for part, orig in zip(parts, original_parts)
+    )
+
+
+def to_locative(name: str) -> str:
+    """Форма предложного падежа для фраз вида "Погода в Москве" """
+    if not morph or not RUSSIAN_NAME.match(name):
+        return name
+
+    words = []
+    for word in name.split(' '):
+        parses = [p for p in morph.parse(word) if 'nomn' in p.tag]
+        parses.sort(key=lambda p: 'Geox' not in p.tag)
+        inflected = parses[0].inflect({'loct'}) if parses else None
+        words.append(_restore_case(inflected.word, word) if inflected else word)
+    return ' '.join(words)
+
+
+def build(source_path: str, output_path: str) -> int:
+    """Конвертация дампа GeoNames в компактный TSV"""
+    count = 0
+    with open(source_path, encoding='utf-8') as src, \
+            gzip.open(output_path, 'wt', encoding='utf-8') as dst:
+        for line in src:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 9:
+                continue
+
+            city_name = pick_russian_name(fields[1], fields[3])
+            latitude = float(fields[4])
+            longitude = float(fields[5])
+            country = fields[8]
+
+            dst.write(
+                f"{city_name}\t{to_locative(city_name)}\t{country}\t"
+                f"{latitude:.4f}\t{longitude:.4f}\n"
+            )
+            count += 1
+
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+
+    total = build(sys.argv[1], sys.argv[2])
+    print(f"✅ Записано городов: {total}")
@@ -0,0 +1,566 @@
+"""
+Локальные заглушки внешних сервисов для офлайн нагрузочного тестирования.
+
+Поднимает три HTTP сервера:
+  • Open-Meteo      - GET /v1/forecast
+  • citaty.info     - GET /selection/<подборка>?page=N
+  • Telegram Bot API - /bot<token>/<method> и /file/bot<token>/<path>,
+    генерирует входящие обновления от виртуальных пользователей
+    и замеряет время до первого ответа бота.
+
+Для каждого сервера настраиваются задержка, доля ошибок и лимит запросов
+в секунду (сверх лимита отвечает 429). Генерация детерминирована (--seed).
+
+Запуск заглушек:
+    python tools/stub_servers.py --latency-ms 150 --error-rate 0.02 --updates-per-second 20
+
+Бот подключается через config.py:
+    WEATHER_API_URL = "http://127.0.0.1:8081/v1/forecast"
+    QUOTES_BASE_URL = "http://127.0.0.1:8082"
+    TELEGRAM_API_URL = "http://127.0.0.1:8083"
+"""
+import io
+import hashlib
+import json
+import math
+import random
+import argparse
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None
+
+
+@dataclass
+class FaultProfile:
+    """Искусственные задержки, ошибки и ограничение пропускной способности"""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    max_rps: float = 0.0  # 0 - без ограничения
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """HTTP сервер без трассировок при обрывах соединения клиентом"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class StubServer:
+    """Базовый класс заглушки: внедрение сбоев и статистика"""
+
+    name = "stub"
+
+    def __init__(self, port: int, faults: FaultProfile, seed: int = 0):
+        self.port = port
+        self.faults = faults
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.bucket = TokenBucket(faults.max_rps) if faults.max_rps else None
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+        self.httpd: Optional[QuietHTTPServer] = None
+
+    def count(self, key: str, amount: int = 1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    def random(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+    def inject_faults(self) -> Optional[int]:
+        """Задержка и, возможно, код ошибки вместо нормального ответа"""
+        if self.bucket and not self.bucket.take():
+            self.count("throttled")
+            return 429
+
+        delay = self.faults.latency_ms
+        if self.faults.jitter_ms:
+            delay += (self.random() * 2 - 1) * self.faults.jitter_ms
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        if self.faults.error_rate and self.random() < self.faults.error_rate:
+            self.count("errors")
+            return 500
+        return None
+
+    def handle(self, request: "StubRequestHandler"):
+        raise NotImplementedError
+
+    def start(self):
+        server = self
+
+        class Handler(StubRequestHandler):
+            stub = server
+
+        self.httpd = QuietHTTPServer(("127.0.0.1", self.port), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        print(f"🧪 {self.name}: http://127.0.0.1:{self.port}")
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    stub: StubServer = None
+    protocol_version = "HTTP/1.1"
+
+    def _dispatch(self):
+        self.stub.count("requests")
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+        self.stub.count("bytes_in", length)
+
+        status = self.stub.inject_faults()
+        if status:
+            self.send_json({"ok": False, "error_code": status, "description": "Injected fault"}, status)
+            return
+        self.stub.handle(self)
+
+    do_GET = _dispatch
+    do_POST = _dispatch
+
+    @property
+    def query(self) -> Dict[str, str]:
+        parsed = parse_qs(urlparse(self.path).query)
+        return {key: values[0] for key, values in parsed.items()}
+
+    @property
+    def route(self) -> str:
+        return urlparse(self.path).path
+
+    def send_bytes(self, body: bytes, content_type: str, status: int = 200,
+                   headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.stub.count("bytes_out", len(body))
+
+    def send_json(self, payload, status: int = 200):
+        self.send_bytes(json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                        "application/json", status)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class OpenMeteoStub(StubServer):
+    """Заглушка Open-Meteo: детерминированная погода по координатам"""
+
+    name = "Open-Meteo"
+
+    def handle(self, request: StubRequestHandler):
+        if request.route != "/v1/forecast":
+            request.send_json({"error": True, "reason": "Not found"}, 404)
+            return
+
+        query = request.query
+        lat = float(query.get("latitude", 0))
+        lon = float(query.get("longitude", 0))
+        phase = math.sin(lat * 0.7) + math.cos(lon * 0.3)
+        request.send_json({
+            "latitude": lat,
+            "longitude": lon,
+            "current": {
+                "temperature_2m": round(10 + 12 * phase, 1),
+                "apparent_temperature": round(8 + 12 * phase, 1),
+                "relative_humidity_2m": int(60 + 20 * math.sin(lon)),
+                "weather_code": [0, 1, 2, 3, 61, 71][int(abs(lat + lon)) % 6],
+                "wind_speed_10m": round(3 + 2 * abs(math.cos(lat)), 1),
+                "pressure_msl": round(1013 + 8 * phase, 1),
+            }
+        })
+
+
+class QuotesStub(StubServer):
+    """Заглушка citaty.info: страницы подборок с разметкой как на сайте"""
+
+    name = "citaty.info"
+
+    def __init__(self, port: int, faults: FaultProfile, seed: int = 0,
+                 quotes_per_page: int = 20, pages: int = 5):
+        super().__init__(port, faults, seed)
+        self.quotes_per_page = quotes_per_page
+        self.pages = pages
+
+    def _render_page(self, page: int) -> bytes:
+        blocks = []
+        for i in range(self.quotes_per_page):
+            number = page * self.quotes_per_page + i + 1
+            blocks.append(
+                '<div class="node__content">'
+                f'<div class="field-type-text-with-summary">Тестовая цитата номер {number}: '
+                'мудрость приходит с опытом, а опыт - с нагрузочным тестированием.</div>'
+                f'<div class="field-type-taxonomy-term-reference">Автор {number % 17}</div>'
+                '</div>'
+            )
+        return (
+            "<html><head><meta charset='utf-8'></head><body>"
+            + "".join(blocks)
+            + "</body></html>"
+        ).encode("utf-8")
+
+    def handle(self, request: StubRequestHandler):
+        if not request.route.startswith("/selection/"):
+            request.send_bytes(b"Not found", "text/plain", 404)
+            return
+
+        page = int(request.query.get("page", 0))
+        if page >= self.pages:
+            request.send_bytes(b"<html><body></body></html>", "text/html; charset=utf-8")
+            return
+        # Страницы неизменны: ETag по содержимому, на совпадающий If-None-Match - 304
+        body = self._render_page(page)
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if request.headers.get("If-None-Match") == etag:
+            self.count("not_modified")
+            request.send_bytes(b"", "text/html; charset=utf-8", 304, {"ETag": etag})
+            return
+        request.send_bytes(body, "text/html; charset=utf-8", headers={"ETag": etag})
+
+
+class TelegramStub(StubServer):
+    """Заглушка Telegram Bot API с генератором входящих обновлений"""
+
+    name = "Telegram Bot API"
+
+    DEFAULT_SCENARIOS = {
+        "/start": 1,
+        "📊 Случайная цитата": 2,
+        "🌤️ Прогноз погоды": 1,
+        "location": 3,
+        "photo": 1,
+    }
+
+    def __init__(self, port: int, faults: FaultProfile, seed: int = 0,
+                 updates_per_second: float = 5.0, users: int = 100,
+                 scenarios: Optional[Dict[str, float]] = None):
+        super().__init__(port, faults, seed)
+        self.updates_per_second = updates_per_second
+        self.users = users
+        self.scenarios = scenarios or dict(self.DEFAULT_SCENARIOS)
+        if Image is None:
+            self.scenarios.pop("photo", None)
+
+        self.updates: deque = deque()
+        self.updates_cond = threading.Condition()
+        self.next_update_id = 1
+        self.next_message_id = defaultdict(lambda: 1)
+        self.files: Dict[str, bytes] = {}
+        self.files_lock = threading.Lock()
+        self.pending_since: Dict[int, deque] = defaultdict(deque)
+        self.latencies: List[float] = []
+        self.methods = Counter()
+        self._running = False
+
+    # --- Генерация входящих обновлений ---
+
+    def _make_photo(self, index: int) -> bytes:
+        img = Image.new("RGB", (1280, 960), (40 + index % 200, 90, 160))
+        draw = ImageDraw.Draw(img)
+        for i in range(0, 1280, 40):
+            draw.line([(i, 0), (1280 - i, 960)], fill=(255, 200 - i % 200, 80), width=3)
+        bio = io.BytesIO()
+        img.save(bio, "JPEG", quality=90)
+        return bio.getvalue()
+
+    def _store_file(self, data: bytes, prefix: str) -> str:
+        with self.files_lock:
+            file_id = f"{prefix}-{len(self.files) + 1}"
+            self.files[file_id] = data
+        return file_id
+
+    def _build_message(self, chat_id: int, scenario: str) -> dict:
+        message = {
+            "message_id": self.next_message_id[chat_id],
+            "from": {"id": chat_id, "is_bot": False, "first_name": f"User{chat_id}"},
+            "chat": {"id": chat_id, "type": "private", "first_name": f"User{chat_id}"},
+            "date": int(time.time()),
+        }
+        self.next_message_id[chat_id] += 1
+
+        if scenario == "location":
+            message["location"] = {
+                "latitude": round(41 + self.random() * 25, 4),
+                "longitude": round(20 + self.random() * 40, 4),
+            }
+        elif scenario == "photo":
+            index = len(self.files)
+            data = self._make_photo(index)
+            file_id = self._store_file(data, "photo")
+            message["photo"] = [{
+                "file_id": file_id,
+                "file_unique_id": f"u{file_id}",
+                "width": 1280,
+                "height": 960,
+                "file_size": len(data),
+            }]
+        else:
+            message["text"] = scenario
+            if scenario.startswith("/"):
+                message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(scenario)}]
+        return message
+
+    def _generate_updates(self):
+        names = list(self.scenarios)
+        weights = [self.scenarios[name] for name in names]
+        interval = 1.0 / self.updates_per_second
+        next_at = time.monotonic()
+
+        while self._running:
+            with self.rng_lock:
+                chat_id = 100000 + self.rng.randrange(self.users)
+                scenario = self.rng.choices(names, weights)[0]
+            message = self._build_message(chat_id, scenario)
+
+            with self.updates_cond:
+                self.updates.append({"update_id": self.next_update_id, "message": message})
+                self.next_update_id += 1
+                self.pending_since[chat_id].append(time.monotonic())
+                self.updates_cond.notify_all()
+            self.count("updates_emitted")
+
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.monotonic()))
+
+    def start(self):
+        super().start()
+        self._running = True
+        if self.updates_per_second > 0:
+            threading.Thread(target=self._generate_updates, daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        super().stop()
+
+    # --- Обработка вызовов API ---
+
+    def _record_reply(self, chat_id: Optional[int]):
+        """Время от появления обновления до первого ответа бота в этот чат"""
+        if chat_id is None:
+            return
+        with self.updates_cond:
+            pending = self.pending_since.get(chat_id)
+            if pending:
+                self.latencies.append(time.monotonic() - pending.popleft())
+
+    def _sent_message(self, chat_id: int, **content) -> dict:
+        with self.updates_cond:
+            message_id = self.next_message_id[chat_id]
+            self.next_message_id[chat_id] += 1
+        return {
+            "message_id": message_id,
+            "from": {"id": 1, "is_bot": True, "first_name": "StubBot"},
+            "chat": {"id": chat_id, "type": "private"},
+            "date": int(time.time()),
+            **content,
+        }
+
+    def _uploaded_photo(self, request: StubRequestHandler, query: Dict[str, str]) -> list:
+        photo = query.get("photo")
+        if photo and photo in self.files:
+            file_id = photo
+        else:
+            file_id = self._store_file(request.body, "result")
+        return [{"file_id": file_id, "file_unique_id": f"u{file_id}", "width": 1280, "height": 960}]
+
+    def handle(self, request: StubRequestHandler):
+        route = request.route
+        if route.startswith("/file/bot"):
+            file_path = route.split("/", 3)[-1]
+            data = self.files.get(file_path.split("/")[-1])
+            if data is None:
+                request.send_bytes(b"Not found", "text/plain", 404)
+            else:
+                request.send_bytes(data, "application/octet-stream")
+            return
+
+        parts = route.strip("/").split("/")
+        if len(parts) != 2 or not parts[0].startswith("bot"):
+            request.send_json({"ok": False, "error_code": 404, "description": "Not Found"}, 404)
+            return
+
+        method = parts[1]
+        query = request.query
+        self.methods[method] += 1
+        chat_id = int(query["chat_id"]) if "chat_id" in query else None
+
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "StubBot", "username": "stub_bot"}
+        elif method == "getUpdates":
+            result = self._get_updates(int(query.get("offset", 0)), float(query.get("timeout", 0)))
+        elif method == "getFile":
+            file_id = query.get("file_id", "")
+            result = {
+                "file_id": file_id,
+                "file_unique_id": f"u{file_id}",
+                "file_size": len(self.files.get(file_id, b"")),
+                "file_path": f"files/{file_id}",
+            }
+        elif method in ("sendMessage", "editMessageText"):
+            self._record_reply(chat_id)
+            result = self._sent_message(chat_id, text=query.get("text", ""))
+        elif method == "sendPhoto":
+            self._record_reply(chat_id)
+            result = self._sent_message(chat_id, photo=self._uploaded_photo(request, query))
+        elif method == "sendDocument":
+            self._record_reply(chat_id)
+            file_id = self._store_file(request.body, "document")
+            result = self._sent_message(chat_id, document={"file_id": file_id, "file_unique_id": f"u{file_id}"})
+        elif method == "sendMediaGroup":
+            self._record_reply(chat_id)
+            media = json.loads(query.get("media", "[]"))
+            result = [self._sent_message(chat_id, photo=self._uploaded_photo(request, {})) for _ in media]
+        else:
+            # answerCallbackQuery, deleteMessage, sendChatAction и т.п.
+            result = True
+
+        request.send_json({"ok": True, "result": result})
+
+    def _get_updates(self, offset: int, timeout: float) -> list:
+        deadline = time.monotonic() + min(timeout, 1.0)
+        with self.updates_cond:
+            while self.updates and self.updates[0]["update_id"] < offset:
+                self.updates.popleft()
+            while not self.updates and time.monotonic() < deadline:
+                self.updates_cond.wait(deadline - time.monotonic())
+            return list(self.updates)[:100]
+
+    def report(self) -> str:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        unanswered = sum(len(pending) for pending in self.pending_since.values())
+        lines = [
+            f"📨 Обновлений отправлено боту: {self.stats['updates_emitted']}",
+            f"💬 Ответов получено: {len(latencies)}, без ответа: {unanswered}",
+            f"⏱ Время до первого ответа: p50={percentile(0.5):.0f} мс, "
+            f"p95={percentile(0.95):.0f} мс, p99={percentile(0.99):.0f} мс",
+            "📊 Вызовы API: " + ", ".join(f"{name}={count}" for name, count in self.methods.most_common()),
+        ]
+        return "\n".join(lines)
+
+
+def _fault_profile(args, prefix: str) -> FaultProfile:
+    """Профиль сбоев сервера: собственные параметры или общие"""
+    def pick(name):
+        value = getattr(args, f"{prefix}_{name}")
+        return getattr(args, name) if value is None else value
+
+    return FaultProfile(
+        latency_ms=pick("latency_ms"),
+        jitter_ms=pick("jitter_ms"),
+        error_rate=pick("error_rate"),
+        max_rps=pick("max_rps"),
+    )
+
+
+def _parse_scenarios(values: Optional[List[str]]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    scenarios = {}
+    for value in values:
+        name, _, weight = value.rpartition("=")
+        scenarios[name] = float(weight)
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заглушки Open-Meteo, citaty.info и Telegram Bot API")
+    parser.add_argument("--weather-port", type=int, default=8081)
+    parser.add_argument("--quotes-port", type=int, default=8082)
+    parser.add_argument("--telegram-port", type=int, default=8083)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Средняя задержка ответа")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Разброс задержки (±)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 500 (0..1)")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Лимит запросов в секунду (0 - нет)")
+    for prefix in ("weather", "quotes", "telegram"):
+        for option in ("latency-ms", "jitter-ms", "error-rate", "max-rps"):
+            parser.add_argument(f"--{prefix}-{option}", type=float, default=None)
+    parser.add_argument("--updates-per-second", type=float, default=5.0, help="Входящих обновлений в секунду")
+    parser.add_argument("--users", type=int, default=100, help="Количество виртуальных пользователей")
+    parser.add_argument("--scenario", action="append", metavar="ТЕКСТ=ВЕС",
+                        help="Сценарий и его вес, например 'location=3' или '📊 Случайная цитата=1'")
+    parser.add_argument("--duration", type=float, default=0, help="Длительность теста в секундах (0 - до Ctrl+C)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    servers = [
+        OpenMeteoStub(args.weather_port, _fault_profile(args, "weather"), args.seed),
+        QuotesStub(args.quotes_port, _fault_profile(args, "quotes"), args.seed),
+    ]
+    telegram = TelegramStub(
+        args.telegram_port, _fault_profile(args, "telegram"), args.seed,
+        updates_per_second=args.updates_per_second,
+        users=args.users,
+        scenarios=_parse_scenarios(args.scenario),
+    )
+    servers.append(telegram)
+
+    for server in servers:
+        server.start()
+
+    started = time.monotonic()
+    try:
+        while not args.duration or time.monotonic() - started < args.duration:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.stop()
+
+    print(f"\n🏁 Тест длился {time.monotonic() - started:.1f} с")
+    print(telegram.report())
+    for server in servers:
+        stats = server.stats
+        print(
+            f"🧪 {server.name}: запросов {stats['requests']}, ошибок {stats['errors']}, "
+            f"429: {stats['throttled']}, отдано {stats['bytes_out'] / 1024:.0f} КБ"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 # utils/cache.py
+from collections import OrderedDict
 from functools import wraps
-from typing import Any, Dict
+from typing import Any, Dict, Hashable, Optional
+import threading
 import time
 
 class SimpleCache:
@@ -25,6 +27,42 @@ class SimpleCache:
             'timestamp': time.time()
         }
 
+class LRUCache:
+    """Кэш ограниченного размера с вытеснением давно не использованных записей"""
+    
+    def __init__(self, max_size: int = 128, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, stored_at = item
+            if self.ttl is not None and time.monotonic() - stored_at >= self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._items[key] = (value, time.monotonic())
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+    
+    def pop(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._items.pop(key, None)
+            return item[0] if item else None
+    
+    def __len__(self) -> int:
+        return len(self._items)
+
 def cached(ttl: int = 300):
     """Декоратор для кэширования результатов функций"""
     def decorator(func):
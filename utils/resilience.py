@@ -0,0 +1,160 @@
+# utils/resilience.py
+import time
+import threading
+import logging
+from typing import Any, Callable
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+breaker_state_gauge = metrics.gauge(
+    "circuit_breaker_state",
+    "Состояние предохранителя: 0 - closed, 1 - open, 2 - half_open"
+)
+breaker_transitions = metrics.counter(
+    "circuit_breaker_transitions_total",
+    "Переходы предохранителя между состояниями"
+)
+breaker_calls = metrics.counter(
+    "circuit_breaker_calls_total",
+    "Вызовы через предохранитель по результату"
+)
+bulkhead_in_flight = metrics.gauge(
+    "bulkhead_in_flight",
+    "Количество одновременно выполняющихся вызовов"
+)
+bulkhead_rejected = metrics.counter(
+    "bulkhead_rejected_total",
+    "Вызовы, отклоненные из-за превышения лимита параллельности"
+)
+
+
+class CircuitOpenError(Exception):
+    """Вызов отклонен: предохранитель разомкнут"""
+
+
+class BulkheadFullError(Exception):
+    """Вызов отклонен: все слоты параллельности заняты"""
+
+
+class CircuitBreaker:
+    """Предохранитель для вызовов внешних сервисов
+
+    closed    - вызовы проходят, ошибки и медленные ответы подсчитываются;
+    open      - после failure_threshold сбоев подряд вызовы сразу отклоняются;
+    half_open - через reset_timeout секунд пропускается пробный вызов,
+                успех замыкает цепь, сбой снова размыкает.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    STATE_CODES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int = 5, slow_call_seconds: float = 3.0,
+                 reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+        breaker_state_gauge.set(0, name=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._transition(self.HALF_OPEN)
+            return self._state
+
+    def _transition(self, state: str):
+        """Смена состояния (вызывается под блокировкой)"""
+        if state == self._state:
+            return
+        logger.warning(f"⚡ Предохранитель {self.name}: {self._state} → {state}")
+        self._state = state
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+        if state != self.HALF_OPEN:
+            self._trial_in_progress = False
+        breaker_state_gauge.set(self.STATE_CODES[state], name=self.name)
+        breaker_transitions.inc(name=self.name, state=state)
+
+    def allow_request(self) -> bool:
+        """Можно ли выполнить вызов прямо сейчас"""
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self, duration: float):
+        """Учет успешного вызова (медленный считается сбоем)"""
+        if duration > self.slow_call_seconds:
+            breaker_calls.inc(name=self.name, result="slow")
+            self._on_failure()
+            return
+
+        breaker_calls.inc(name=self.name, result="success")
+        with self._lock:
+            self._failures = 0
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        """Учет неудачного вызова"""
+        breaker_calls.inc(name=self.name, result="failure")
+        self._on_failure()
+
+    def _on_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._transition(self.OPEN)
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Выполнение вызова через предохранитель"""
+        if not self.allow_request():
+            breaker_calls.inc(name=self.name, result="rejected")
+            raise CircuitOpenError(f"Circuit {self.name} is open")
+
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success(time.monotonic() - started)
+        return result
+
+
+class Bulkhead:
+    """Ограничение числа одновременных вызовов (изоляция потоков обработчиков)"""
+
+    def __init__(self, name: str, max_concurrent: int = 4, acquire_timeout: float = 0.5):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.acquire_timeout = acquire_timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        bulkhead_in_flight.set(0, name=name)
+
+    def __enter__(self):
+        if not self._semaphore.acquire(timeout=self.acquire_timeout):
+            bulkhead_rejected.inc(name=self.name)
+            raise BulkheadFullError(f"Bulkhead {self.name} is full")
+        bulkhead_in_flight.inc(name=self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        bulkhead_in_flight.dec(name=self.name)
+        self._semaphore.release()
+        return False